@@ -0,0 +1,53 @@
+"""
+Benchmark for settling many input vectors of a library part.
+
+Compares settling every input vector one at a time with the compiled
+`Simulator` against settling them all at once with `BitParallelSimulator`.
+
+Usage: python benchmarks/bench_bitparallel.py [part_type] [n_vectors]
+"""
+
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import logic
+from logic import compiled, bitparallel
+
+
+def main():
+    part_type = sys.argv[1] if len(sys.argv) > 1 else "Xor"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+
+    schematic = logic.part_library[part_type]().schematic
+    netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+    inputs = [netlist.term_index[part["term"]]
+              for part in schematic.parts
+              if isinstance(part, logic.parts.IOPart) and part.name != "out"]
+    vectors = numpy.random.randint(1, 3, (n, len(inputs)))
+
+    start = time.time()
+    for vector in vectors:
+        sim = compiled.Simulator(netlist)
+        for t, state in zip(inputs, vector):
+            sim.set_output(t, int(state))
+        sim.settle()
+    scalar = time.time() - start
+
+    start = time.time()
+    sim = bitparallel.BitParallelSimulator(netlist, n_words=(n + 63) // 64)
+    for t, states in zip(inputs, vectors.T):
+        sim.set_output(t, states)
+    sim.settle()
+    parallel = time.time() - start
+
+    for name, elapsed in (("scalar", scalar), ("bitparallel", parallel)):
+        print "{:>12}: {} x {} in {:.3f} s ({:.1f} us each)".format(
+            name, n, part_type, elapsed, elapsed / n * 1e6)
+
+if __name__ == "__main__":
+    main()
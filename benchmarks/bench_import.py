@@ -0,0 +1,57 @@
+"""
+Benchmark for the time it takes to import the package.
+
+Starts a fresh interpreter for each run, imports `logic` and reports the
+best time, along with whether the GUI toolkits got imported. Also times the
+first lookup in the part library, which loads the library folder, and
+importing the GUI.
+
+Usage: python benchmarks/bench_import.py [n_runs]
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SCRIPT = """
+import sys, time
+start = time.time()
+import logic
+imported = time.time()
+logic.part_library["Nand"]
+library = time.time()
+gui_modules = sorted(m for m in ("gtk", "cairo") if m in sys.modules)
+try:
+    logic.Interface
+    gui = time.time() - library
+except ImportError:
+    gui = None
+print repr((imported - start, library - imported, gui, gui_modules))
+"""
+
+
+def run_once():
+    output = subprocess.check_output([sys.executable, "-c", SCRIPT], cwd=ROOT)
+    return eval(output)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    runs = [run_once() for i in xrange(n)]
+    gui_times = [gui for _, _, gui, _ in runs if gui is not None]
+    print "import logic: {:.1f} ms (best of {})".format(
+        min(run[0] for run in runs) * 1000, n)
+    print "  GUI modules imported with it: {}".format(
+        ", ".join(runs[0][3]) or "none")
+    print "first library lookup: {:.1f} ms".format(
+        min(run[1] for run in runs) * 1000)
+    if gui_times:
+        print "logic.Interface: {:.1f} ms".format(min(gui_times) * 1000)
+    else:
+        print "logic.Interface: gtk isn't available"
+
+if __name__ == "__main__":
+    main()
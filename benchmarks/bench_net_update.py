@@ -0,0 +1,28 @@
+"""
+Micro-benchmark for `Net.update()` on a wide net.
+
+Usage: python benchmarks/bench_net_update.py [n_terminals]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import circuits
+
+
+def main():
+    n_terminals = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    schematic, rail = circuits.wide_rail(n_terminals)
+    schematic.reset()
+
+    repeat = 10
+    best = min(timeit.repeat(rail.update, number=1, repeat=repeat))
+    print "Net.update() on a {}-terminal rail: {:.3f} ms (best of {})".format(
+        n_terminals, best * 1000, repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark for partitioned simulation with several worker processes.
+
+Toggles every switch of a large array of inverter chains and times how long
+settling takes with a single `Simulator` and with a `ParallelSimulator` using
+1, 2, 4, ... worker processes.
+
+Usage: python benchmarks/bench_parallel.py [n_chains] [length] [max_workers]
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import logic
+from logic import compiled, parallel
+import circuits
+
+
+def time_toggles(sim, terms, n_toggles=4):
+    sim.settle()
+    start = time.time()
+    for i in xrange(n_toggles):
+        for t in terms:
+            sim.set_output(t, logic.HIGH if i % 2 == 0 else logic.LOW)
+        sim.settle()
+    return (time.time() - start) / n_toggles
+
+
+def main():
+    n_chains = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else \
+        multiprocessing.cpu_count()
+
+    schematic, switches = circuits.inverter_chains(n_chains, length)
+    netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+    terms = [netlist.term_index[switch["term"]] for switch in switches]
+    print "{} parts, {} nets".format(netlist.n_parts, netlist.n_nets)
+
+    elapsed = time_toggles(compiled.Simulator(netlist), terms)
+    print "{:>10}: {:.3f} s per settle".format("serial", elapsed)
+
+    n_workers = 1
+    while n_workers <= max_workers:
+        with parallel.ParallelSimulator(netlist, n_workers) as sim:
+            elapsed = time_toggles(sim, terms)
+        print "{:>2} workers: {:.3f} s per settle".format(n_workers, elapsed)
+        n_workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark for instantiating library parts.
+
+Compares parsing a part's JSON for every instance, which is what
+`PartLibrary` used to do, against copying the cached prototype.
+
+Usage: python benchmarks/bench_partlib.py [part_type] [n_instances]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import logic
+
+
+def main():
+    part_type = sys.argv[1] if len(sys.argv) > 1 else "Nand"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    filename = os.path.join(os.path.dirname(logic.__file__), "part_library",
+                            part_type.lower() + ".schem")
+    data = json.loads(open(filename).read())
+
+    def from_dict():
+        schematic = logic.Schematic.from_dict(data)
+        return logic.parts.AggregatePart(schematic, part_type)
+
+    def from_prototype():
+        return logic.part_library[part_type]()
+
+    from_prototype()  # Parse the prototype outside of the timing
+    for name, create in (("from_dict", from_dict),
+                         ("prototype", from_prototype)):
+        start = time.time()
+        for i in xrange(n):
+            create()
+        elapsed = time.time() - start
+        print "{:>10}: {} x {} in {:.3f} s ({:.1f} us each)".format(
+            name, n, part_type, elapsed, elapsed / n * 1e6)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark suite over generated circuits of several sizes.
+
+Times loading from a file, a full `update()`, `get_dict()`, hit-testing and
+drawing to an offscreen surface for each circuit in `circuits.py`, and
+writes the results as JSON so runs can be compared. Updates start from the
+reset state with the circuit's inputs driven by a fixed pseudo-random
+pattern. Drawing is skipped if pycairo isn't installed.
+
+Usage: python benchmarks/bench_suite.py [-o results.json] [--repeat N]
+                                        [--quick] [circuit ...]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    import cairo
+except ImportError:
+    cairo = None
+
+import logic
+from logic import _json
+from logic.states import HIGH, LOW
+import circuits
+
+
+def adder(n_bits):
+    s = circuits.ripple_carry_adder(n_bits)
+    inputs = sorted((part for part in s.parts
+                     if isinstance(part, logic.parts.IOPart) and
+                     part.name[0] in "abc"),
+                    key=lambda part: part.name)
+    return s, inputs
+
+
+# Circuit name: (function making a schematic of a given size and the parts
+# driving its inputs, sizes)
+CIRCUITS = {
+    "adder": (adder, (4, 16, 64)),
+    "nand_array": (lambda n: circuits.nand_array(n, n), (4, 8, 16)),
+    "inverter_chains": (lambda n: circuits.inverter_chains(10, n),
+                        (10, 50, 200)),
+    "wide_rail": (lambda n: (circuits.wide_rail(n)[0], []),
+                  (100, 1000, 10000)),
+}
+
+N_HIT_TESTS = 100
+DRAW_SIZE = 1024
+
+
+def best_time(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench_circuit(schematic, inputs, repeat):
+    """Returns a dict of timings, in seconds, for one schematic.
+
+    `inputs` are the switches and IO parts that drive the schematic.
+    """
+    results = {
+        "n_parts": len(schematic.parts),
+        "n_nets": len(schematic.nets),
+        "n_terminals": sum(len(p.terminals) for p in schematic.parts),
+    }
+
+    results["get_dict"] = best_time(schematic.get_dict, repeat)
+
+    fd, filename = tempfile.mkstemp(suffix=".schem")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(schematic.get_dict(), f, cls=_json.JsonEncoder)
+        results["from_file"] = best_time(
+            lambda: logic.Schematic.from_file(filename), repeat)
+    finally:
+        os.remove(filename)
+
+    # The same input states for every run, so the updates have the same
+    # work to do
+    rng = random.Random(0)
+    pattern = [(part["term"], rng.choice((HIGH, LOW))) for part in inputs]
+
+    def drive():
+        schematic.reset()
+        for term, state in pattern:
+            term.output = state
+
+    def update():
+        drive()
+        schematic.update()
+
+    def update_compiled():
+        drive()
+        schematic.update(compiled=True)
+
+    results["update"] = best_time(update, repeat)
+    update_compiled()  # Compile outside of the timing
+    results["update_compiled"] = best_time(update_compiled, repeat)
+
+    # Hit-testing at random points inside the bounding box, per query
+    x, y, width, height = schematic.get_bbox()
+    rng = random.Random(0)
+    points = [(x + rng.random()*width, y + rng.random()*height)
+              for i in xrange(N_HIT_TESTS)]
+
+    def part_at_pos():
+        for point in points:
+            schematic.part_at_pos(point)
+
+    def closest_terminal():
+        for point in points:
+            schematic.get_closest_terminal(point)
+
+    results["part_at_pos"] = best_time(part_at_pos, repeat) / N_HIT_TESTS
+    results["get_closest_terminal"] = \
+        best_time(closest_terminal, repeat) / N_HIT_TESTS
+
+    if cairo is None:
+        results["draw"] = None
+        return results
+
+    # Drawing the whole schematic, scaled to fit
+    surface = cairo.ImageSurface(cairo.FORMAT_RGB24, DRAW_SIZE, DRAW_SIZE)
+
+    def draw():
+        context = cairo.Context(surface)
+        scale = DRAW_SIZE / max(width, height, 1)
+        context.scale(scale, scale)
+        context.translate(-x, -y)
+        schematic.draw(context)
+
+    results["draw"] = best_time(draw, repeat)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("circuits", nargs="*", default=sorted(CIRCUITS),
+                        help="circuits to run (default: all)")
+    parser.add_argument("-o", "--output",
+                        help="JSON file to write (default: print it)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per measurement, the best one counts")
+    parser.add_argument("--quick", action="store_true",
+                        help="only the smallest size of each circuit")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.circuits:
+        make, sizes = CIRCUITS[name]
+        if args.quick:
+            sizes = sizes[:1]
+        for size in sizes:
+            schematic, inputs = make(size)
+            result = bench_circuit(schematic, inputs, args.repeat)
+            result.update(circuit=name, size=size)
+            results.append(result)
+            message = "{} {}: update {:.4f} s".format(
+                name, size, result["update"])
+            if result["draw"] is not None:
+                message += ", draw {:.4f} s".format(result["draw"])
+            print >>sys.stderr, message
+
+    report = {
+        "date": datetime.datetime.utcnow().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = json.dumps(report, indent=4, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print text
+
+if __name__ == "__main__":
+    main()
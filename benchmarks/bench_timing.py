@@ -0,0 +1,58 @@
+"""
+Benchmark for the event scheduler of timed simulation.
+
+Schedules and pops `n_events` events with random short delays, like a
+timed simulation does, with a `TimingWheel` and with a heap.
+
+Usage: python benchmarks/bench_timing.py [n_events] [max_delay]
+"""
+
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from logic.timing import TimingWheel
+
+
+def run_wheel(delays):
+    wheel = TimingWheel()
+    for i, delay in enumerate(delays[:1000]):
+        wheel.schedule(delay, i)
+    i = 1000
+    while wheel.next_time() is not None:
+        for event in wheel.pop():
+            if i < len(delays):
+                wheel.schedule(wheel.now + delays[i], i)
+                i += 1
+
+
+def run_heap(delays):
+    heap = []
+    for i, delay in enumerate(delays[:1000]):
+        heapq.heappush(heap, (delay, i))
+    i = 1000
+    while heap:
+        now, event = heapq.heappop(heap)
+        if i < len(delays):
+            heapq.heappush(heap, (now + delays[i], i))
+            i += 1
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    max_delay = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    delays = [random.randint(0, max_delay) for i in xrange(n)]
+
+    for name, run in (("wheel", run_wheel), ("heap", run_heap)):
+        start = time.time()
+        run(delays)
+        elapsed = time.time() - start
+        print "{:>6}: {} events in {:.3f} s ({:.2f} us each)".format(
+            name, n, elapsed, elapsed / n * 1e6)
+
+if __name__ == "__main__":
+    main()
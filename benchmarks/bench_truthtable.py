@@ -0,0 +1,47 @@
+"""
+Benchmark for generating the truth table of a large subcircuit.
+
+Generates the table of an `n_inputs` parity chain of Xor parts with
+different numbers of worker processes.
+
+Usage: python benchmarks/bench_truthtable.py [n_inputs] [max_processes]
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import logic
+from logic import truthtable
+import circuits
+
+
+def main():
+    n_inputs = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    max_processes = int(sys.argv[2]) if len(sys.argv) > 2 else \
+        multiprocessing.cpu_count()
+
+    schematic = circuits.parity_chain(n_inputs)
+    fd, filename = tempfile.mkstemp(suffix=".schem")
+    try:
+        os.write(fd, json.dumps(schematic.get_dict()))
+        os.close(fd)
+
+        processes = 1
+        while processes <= max_processes:
+            start = time.time()
+            truthtable.generate(filename, processes=processes)
+            elapsed = time.time() - start
+            print "{:>3} processes: {} rows in {:.3f} s".format(
+                processes, 1 << n_inputs, elapsed)
+            processes *= 2
+    finally:
+        os.remove(filename)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Procedural generators for large schematics used by the benchmarks.
+"""
+
+import logic
+from logic import parts
+
+
+def wide_rail(n_terminals):
+    """A Vdd rail connected to the sources of `n_terminals-1` PMOS transistors.
+
+    Returns: (schematic, rail_net)
+
+    """
+    s = logic.Schematic()
+    vdd = parts.VddPart()
+    s.add_part(vdd)
+
+    terms = [vdd["vdd"]]
+    for i in range(n_terminals - 1):
+        transistor = parts.PmosTransistorPart(pos=(2*i, 2))
+        s.add_part(transistor)
+        terms.append(transistor["source"])
+
+    rail = logic.Net(*terms)
+    s.add_net(rail)
+    return s, rail
+
+
+def parity_chain(n_inputs):
+    """A chain of library Xor parts computing the parity of `n_inputs` IO parts.
+
+    The inputs are named "in0", "in1", ... and the output "out".
+
+    """
+    s = logic.Schematic()
+    inputs = []
+    for i in range(n_inputs):
+        io = parts.IOPart(pos=(0, 2*i), name="in{}".format(i))
+        s.add_part(io)
+        inputs.append(io["term"])
+
+    prev = inputs[0]
+    for i in range(1, n_inputs):
+        xor = logic.part_library["Xor"](pos=(3*i, 2*i))
+        s.add_part(xor)
+        s.connect(prev, xor["in1"])
+        s.connect(inputs[i], xor["in2"])
+        prev = xor["out"]
+
+    out = parts.IOPart(pos=(3*n_inputs, 2*n_inputs), name="out")
+    s.add_part(out)
+    s.connect(prev, out["term"])
+    return s
+
+
+def inverter_chains(n_chains, length):
+    """`n_chains` chains of `length` transistor-level inverters.
+
+    Each chain is driven by a switch, ends in a probe, and has its own Vdd
+    and Gnd parts, so the chains only share the nets inside them.
+
+    Returns: (schematic, switches)
+
+    """
+    s = logic.Schematic()
+    switches = []
+    for i in range(n_chains):
+        vdd = parts.VddPart(pos=(0, 4*i - 1))
+        gnd = parts.GndPart(pos=(0, 4*i + 3))
+        switch = parts.SwitchPart(pos=(0, 4*i), outputs=["low", "high"])
+        s.add_parts(vdd, gnd, switch)
+        switches.append(switch)
+
+        vdd_terms = [vdd["vdd"]]
+        gnd_terms = [gnd["gnd"]]
+        prev = switch["term"]
+        for j in range(length):
+            pmos = parts.PmosTransistorPart(pos=(2*j + 1, 4*i))
+            nmos = parts.NmosTransistorPart(pos=(2*j + 1, 4*i + 2))
+            s.add_parts(pmos, nmos)
+            s.connect(prev, pmos["gate"], nmos["gate"])
+            vdd_terms.append(pmos["source"])
+            gnd_terms.append(nmos["source"])
+            prev = pmos["drain"]
+            s.connect(prev, nmos["drain"])
+        probe = parts.ProbePart(pos=(2*length + 1, 4*i))
+        s.add_part(probe)
+        s.connect(prev, probe["term"])
+
+        s.add_net(logic.Net(*vdd_terms))
+        s.add_net(logic.Net(*gnd_terms))
+    return s, switches
+
+
+def ripple_carry_adder(n_bits):
+    """An `n_bits` ripple-carry adder made of library Xor, And and Or parts.
+
+    Each bit is a full adder of two Xors, two Ands and an Or. The inputs are
+    IO parts named "a0", "b0", ... and "cin", the outputs "s0", ... and
+    "cout".
+
+    """
+    s = logic.Schematic()
+
+    def io(name, x, y):
+        part = parts.IOPart(pos=(x, y), name=name)
+        s.add_part(part)
+        return part["term"]
+
+    carry = io("cin", 0, -6)
+    for i in range(n_bits):
+        y = 12*i
+        a, b = io("a{}".format(i), 0, y), io("b{}".format(i), 0, y + 2)
+        xor1 = logic.part_library["Xor"](pos=(8, y + 1))
+        xor2 = logic.part_library["Xor"](pos=(16, y + 3))
+        and1 = logic.part_library["And"](pos=(8, y + 7))
+        and2 = logic.part_library["And"](pos=(16, y + 8))
+        or1 = logic.part_library["Or"](pos=(24, y + 8))
+        s.add_parts(xor1, xor2, and1, and2, or1)
+
+        s.connect(a, xor1["in1"], and1["in1"])
+        s.connect(b, xor1["in2"], and1["in2"])
+        s.connect(xor1["out"], xor2["in1"], and2["in1"])
+        s.connect(carry, xor2["in2"], and2["in2"])
+        s.connect(xor2["out"], io("s{}".format(i), 32, y + 3))
+        s.connect(and1["out"], or1["in1"])
+        s.connect(and2["out"], or1["in2"])
+        carry = or1["out"]
+
+    s.connect(carry, io("cout", 32, 12*n_bits))
+    return s
+
+
+def nand_array(rows, cols):
+    """A `rows` by `cols` grid of library Nand parts.
+
+    Each Nand takes one input from its left neighbor and one from the Nand
+    above it. Switches drive the top row and left column, and probes show
+    the outputs of the bottom row and right column.
+
+    Returns: (schematic, switches)
+
+    """
+    s = logic.Schematic()
+    switches = []
+
+    def source(x, y):
+        switch = parts.SwitchPart(pos=(x, y), outputs=["low", "high"])
+        s.add_part(switch)
+        switches.append(switch)
+        return switch["term"]
+
+    def probe(term, x, y):
+        part = parts.ProbePart(pos=(x, y))
+        s.add_part(part)
+        s.connect(term, part["term"])
+
+    above = [source(8*c + 4, -4) for c in range(cols)]
+    for r in range(rows):
+        left = source(-4, 6*r)
+        for c in range(cols):
+            nand = logic.part_library["Nand"](pos=(8*c + 4, 6*r))
+            s.add_part(nand)
+            s.connect(left, nand["in1"])
+            s.connect(above[c], nand["in2"])
+            left = above[c] = nand["out"]
+        probe(left, 8*cols + 2, 6*r)
+    for c in range(cols):
+        probe(above[c], 8*c + 4, 6*rows)
+    return s, switches
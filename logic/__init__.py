@@ -1,13 +1,26 @@
 
 from schematic import Schematic
-from schematicwidget import SchematicWidget
-from interface import Interface
 from terminal import Terminal
 from parts import Part
 from net import Net, NetNode
 from partlib import PartLibrary
+from states import FLOAT, HIGH, LOW, CONTENTION
+from convergence import OscillationError
 
 import parts
+import states
+import convergence
+import profiling
+import spatial
+import compiled
+import memo
+import gatelevel
+import timing
+import parallel
+import waveform
+import bitparallel
+import batch
+import truthtable
 
 part_library = PartLibrary((
 
@@ -30,6 +43,51 @@ part_library = PartLibrary((
 
 import os
 part_library.load_folder(
-    os.path.join(os.path.dirname(__file__), "part_library")
+    os.path.join(os.path.dirname(__file__), "part_library"), lazy=True
 )
 del os
+
+
+# The GUI modules import gtk and cairo, which headless machines may not have
+# and simulation doesn't need, so they are only imported when one of these
+# names is first looked up. Python 2 modules can't define `__getattr__`, so
+# the package module is replaced by an instance of this class with the same
+# contents.
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+
+    # Name: (module, attribute), or (module, None) for the module itself
+    lazy_names = {
+        "SchematicWidget": ("schematicwidget", "SchematicWidget"),
+        "Interface": ("interface", "Interface"),
+        "schematicwidget": ("schematicwidget", None),
+        "interface": ("interface", None),
+    }
+
+    # Submodules imported above still refer to the original module object,
+    # which has to stay alive for its globals to remain valid. It is kept in
+    # a default argument, so it doesn't show up as an attribute.
+    def __getattr__(self, name, _original=sys.modules[__name__]):
+        try:
+            module_name, attribute = self.lazy_names[name]
+        except KeyError:
+            raise AttributeError("'module' object has no attribute '{}'"
+                                 .format(name))
+        module = __import__(self.__name__ + "." + module_name,
+                            fromlist=[module_name])
+        value = module if attribute is None else getattr(module, attribute)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self.lazy_names))
+
+
+sys.modules[__name__] = _LazyModule(__name__, __doc__)
+sys.modules[__name__].__dict__.update(
+    (name, value) for name, value in globals().items()
+    if name not in ("sys", "types"))
+del sys, types
@@ -0,0 +1,108 @@
+import numpy
+
+import logic
+import compiled
+import bitparallel
+import states
+
+
+def _to_states(values):
+    """Converts an array of states or state names to an int8 state array."""
+    values = numpy.asarray(values)
+    if values.dtype.kind in "SU":
+        values = numpy.vectorize(states.from_name, otypes=[numpy.int8])(values)
+    return values.astype(numpy.int8)
+
+
+class BatchRunner(object):
+    """Drives a schematic with rows of input values, without touching it.
+
+    Arguments:
+        schematic: The `Schematic` to simulate. It is compiled once; the
+            parts and nets themselves are never modified.
+        inputs: Names of the switches or IO parts to drive, in the form
+            accepted by `Schematic.get_terminal_by_name()`.
+        outputs: Names of the probes or terminals to read.
+
+    """
+
+    def __init__(self, schematic, inputs, outputs):
+        self.schematic = schematic
+        self.input_names = list(inputs)
+        self.output_names = list(outputs)
+        self.netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+
+        self._inputs = []
+        for name in self.input_names:
+            term = schematic.get_terminal_by_name(name)
+            if not isinstance(term.part, (logic.parts.SwitchPart,
+                                          logic.parts.IOPart)):
+                raise ValueError('"{}" is not a switch or IO part.'.format(
+                    name))
+            self._inputs.append(self.netlist.term_index[term])
+
+        # Terminals merged away by flattening (see `Netlist`) are read
+        # through their net instead.
+        self._outputs = []
+        port_terms = set(self.netlist.port_terms.tolist())
+        for name in self.output_names:
+            t = self.netlist.term_index[schematic.get_terminal_by_name(name)]
+            if t in port_terms:
+                self._outputs.append((None, self.netlist.term_net[t]))
+            else:
+                self._outputs.append((t, None))
+
+    def run(self, stimulus, independent_rows=False, n_words=16):
+        """Settles the schematic for every row of `stimulus`.
+
+        `stimulus` is an N x K array with one column per input, holding
+        states or state names. Returns an N x M int8 array of the states
+        seen by each output after each row has settled.
+
+        Rows are applied one after another to a single simulation, so
+        circuits with memory see them as a sequence. If `independent_rows`
+        is True, every row instead starts from the reset state, and rows are
+        settled `64 * n_words` at a time (1024 by default) with a
+        `BitParallelSimulator` of `n_words` 64 bit words per net.
+        """
+        stimulus = _to_states(stimulus).reshape(-1, len(self._inputs))
+        if independent_rows:
+            return self._run_bitparallel(stimulus, n_words)
+        else:
+            return self._run_sequential(stimulus)
+
+    def _run_sequential(self, stimulus):
+        sim = compiled.Simulator(self.netlist)
+        result = numpy.empty((len(stimulus), len(self._outputs)),
+                             dtype=numpy.int8)
+        inputs = self._inputs
+        outputs = self._outputs
+        for i, row in enumerate(stimulus.tolist()):
+            for t, value in zip(inputs, row):
+                sim.set_output(t, value)
+            sim.settle()
+            result[i] = [sim.inputs[t] if n is None else sim.net_values[n]
+                         for t, n in outputs]
+        return result
+
+    def _run_bitparallel(self, stimulus, n_words):
+        sim = bitparallel.BitParallelSimulator(self.netlist, n_words)
+        result = numpy.empty((len(stimulus), len(self._outputs)),
+                             dtype=numpy.int8)
+        for start in xrange(0, len(stimulus), sim.n_lanes):
+            chunk = stimulus[start:start+sim.n_lanes]
+            sim.reset()
+            for t, column in zip(self._inputs, chunk.T):
+                sim.set_output(t, column)
+            sim.settle()
+            for j, (t, n) in enumerate(self._outputs):
+                values = sim.get_input(t) if n is None else sim.get_net(n)
+                result[start:start+len(chunk), j] = values[:len(chunk)]
+        return result
+
+
+def run_batch(schematic, inputs, outputs, stimulus, independent_rows=False,
+              n_words=16):
+    """Shortcut for `BatchRunner(schematic, inputs, outputs).run(stimulus)`."""
+    runner = BatchRunner(schematic, inputs, outputs)
+    return runner.run(stimulus, independent_rows, n_words)
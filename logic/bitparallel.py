@@ -0,0 +1,199 @@
+from __future__ import division
+
+import numpy
+
+import compiled
+from convergence import OscillationError
+from states import HIGH, LOW
+
+# Bit-parallel simulation runs many independent copies ("lanes") of the same
+# netlist at once. Every signal is stored as two bit-planes of uint64 words,
+# with one bit per lane: the high plane holds the HIGH bit of each lane's
+# state and the low plane its LOW bit. Since states combine with a bitwise OR
+# (see `logic.states`), FLOAT is (0, 0), HIGH is (1, 0), LOW is (0, 1) and
+# CONTENTION is (1, 1), and resolving a net is an OR of its drivers' planes.
+#
+# Instead of following events, every pass resolves all nets and then
+# evaluates all transistors with whole-array operations, until nothing
+# changes. Lanes don't interact, so each one settles exactly as if it was
+# simulated alone.
+
+_BIT_SHIFTS = numpy.arange(64, dtype=numpy.uint64)
+_ONE = numpy.uint64(1)
+_ALL = ~numpy.uint64(0)
+
+
+def pack(states, n_words):
+    """Packs a sequence of states, one per lane, into `(high, low)` planes."""
+    states = numpy.asarray(states)
+    bits = numpy.zeros((2, n_words*64), dtype=numpy.uint64)
+    bits[0, :len(states)] = (states & HIGH) != 0
+    bits[1, :len(states)] = (states & LOW) != 0
+    bits = bits.reshape(2, n_words, 64) << _BIT_SHIFTS
+    high, low = numpy.bitwise_or.reduce(bits, axis=2)
+    return high, low
+
+
+def unpack(high, low):
+    """Unpacks `(high, low)` planes into an array with one state per lane."""
+    high = (high[:, None] >> _BIT_SHIFTS) & _ONE
+    low = (low[:, None] >> _BIT_SHIFTS) & _ONE
+    return (high * HIGH + low * LOW).astype(numpy.int8).ravel()
+
+
+def _segmented_or_scan(values, pos_in_segment, max_length):
+    """Inclusive OR scan of `values` restarting at each segment.
+
+    Takes log2(max_length) whole-array steps, each OR-ing in the value `k`
+    positions back if it lies in the same segment.
+    """
+    k = 1
+    while k < max_length:
+        shifted = numpy.zeros_like(values)
+        shifted[k:] = values[:-k]
+        shifted[pos_in_segment < k] = 0
+        values = values | shifted
+        k *= 2
+    return values
+
+
+class BitParallelSimulator(object):
+    """Settles `64*n_words` independent stimulus patterns of a netlist at once.
+
+    The netlist must be flattened (see `Netlist.from_schematic()`) and made
+    only of transistors, sources and passive parts.
+    """
+
+    def __init__(self, netlist, n_words=1):
+        kinds = set(netlist.part_kind.tolist())
+        if kinds & set((compiled.KIND_AGGREGATE, compiled.KIND_OBJECT,
+                        compiled.KIND_GATE)):
+            raise ValueError("Bit-parallel simulation needs a flattened "
+                             "netlist of primitive parts.")
+
+        self.netlist = netlist
+        self.n_words = n_words
+
+        # Nets, as segments of `net_terms`
+        offsets = netlist.net_offsets
+        lengths = numpy.diff(offsets)
+        self._net_terms = netlist.net_terms
+        self._net_of_position = numpy.repeat(
+            numpy.arange(netlist.n_nets), lengths)
+        self._pos_in_segment = (numpy.arange(len(self._net_terms)) -
+                                offsets[self._net_of_position])
+        self._max_net_length = lengths.max() if len(lengths) else 0
+        self._nonempty_nets = numpy.flatnonzero(lengths)
+        self._segment_starts = offsets[self._nonempty_nets]
+
+        # Transistor terminals. NMOS transistors come first, then PMOS.
+        transistors = []
+        for kind in (compiled.KIND_NMOS, compiled.KIND_PMOS):
+            for p in numpy.flatnonzero(netlist.part_kind == kind):
+                transistors.append(netlist.get_part_terminals(p))
+        transistors = numpy.array(transistors, dtype=numpy.int32).reshape(-1, 3)
+        self._gates, self._sources, self._drains = transistors.T
+        self._n_nmos = int((netlist.part_kind == compiled.KIND_NMOS).sum())
+
+        self.reset()
+
+    @property
+    def n_lanes(self):
+        return self.n_words * 64
+
+    def reset(self):
+        """Puts every lane in the state `Schematic.reset()` does."""
+        shape = (self.netlist.n_terminals, self.n_words)
+        reset = self.netlist.term_reset
+        self.out_high = numpy.zeros(shape, dtype=numpy.uint64)
+        self.out_low = numpy.zeros(shape, dtype=numpy.uint64)
+        self.out_high[(reset & HIGH) != 0] = _ALL
+        self.out_low[(reset & LOW) != 0] = _ALL
+        self.in_high = numpy.zeros(shape, dtype=numpy.uint64)
+        self.in_low = numpy.zeros(shape, dtype=numpy.uint64)
+        self.net_high = numpy.zeros((self.netlist.n_nets, self.n_words),
+                                    dtype=numpy.uint64)
+        self.net_low = numpy.zeros_like(self.net_high)
+
+    def set_output(self, t, states):
+        """Sets the output of terminal `t` in every lane.
+
+        `states` is either one state for all lanes or a sequence of up to
+        `n_lanes` states, one per lane.
+        """
+        if numpy.ndim(states) == 0:
+            states = numpy.full(self.n_lanes, states, dtype=numpy.int8)
+        self.out_high[t], self.out_low[t] = pack(states, self.n_words)
+
+    def get_output(self, t):
+        return unpack(self.out_high[t], self.out_low[t])
+
+    def get_input(self, t):
+        return unpack(self.in_high[t], self.in_low[t])
+
+    def get_net(self, n):
+        return unpack(self.net_high[n], self.net_low[n])
+
+    def settle(self, max_iterations=None):
+        """Repeats full passes until nothing changes.
+
+        Returns the number of passes made. Raises `OscillationError` if the
+        netlist hasn't settled after `max_iterations` passes, which defaults
+        to twice the number of parts.
+        """
+        if max_iterations is None:
+            max_iterations = max(10, 2 * self.netlist.n_parts)
+
+        for i in xrange(max_iterations):
+            self._resolve_nets()
+            if not self._update_transistors():
+                return i + 1
+        raise OscillationError("Netlist did not settle after {} passes.".format(
+            max_iterations))
+
+    def _resolve_nets(self):
+        for outputs, inputs, net_values in (
+                (self.out_high, self.in_high, self.net_high),
+                (self.out_low, self.in_low, self.net_low)):
+            values = outputs[self._net_terms]
+            if not len(values):
+                continue
+
+            # Like `Net.update()`: the input to each terminal is `ones & ~own`
+            # (bits set by some driver other than itself) or `twos` (bits set
+            # by at least two drivers). A bit is in `twos` if some driver sets
+            # it and an earlier driver on the net already did.
+            before = _segmented_or_scan(values, self._pos_in_segment,
+                                        self._max_net_length)
+            before[1:] = before[:-1]
+            before[self._pos_in_segment == 0] = 0
+            twos = numpy.zeros_like(net_values)
+            net_values[self._nonempty_nets] = numpy.bitwise_or.reduceat(
+                values, self._segment_starts)
+            twos[self._nonempty_nets] = numpy.bitwise_or.reduceat(
+                values & before, self._segment_starts)
+
+            nets = self._net_of_position
+            inputs[self._net_terms] = \
+                (net_values[nets] & ~values) | twos[nets]
+
+    def _update_transistors(self):
+        gates, sources, drains = self._gates, self._sources, self._drains
+        gate_high = self.in_high[gates]
+        gate_low = self.in_low[gates]
+        active = numpy.empty_like(gate_high)
+        n = self._n_nmos
+        active[:n] = gate_high[:n] & ~gate_low[:n]
+        active[n:] = gate_low[n:] & ~gate_high[n:]
+
+        changed = False
+        for outputs, inputs in ((self.out_high, self.in_high),
+                                (self.out_low, self.in_low)):
+            new_sources = active & inputs[drains]
+            new_drains = active & inputs[sources]
+            if not (numpy.array_equal(outputs[sources], new_sources) and
+                    numpy.array_equal(outputs[drains], new_drains)):
+                changed = True
+                outputs[sources] = new_sources
+                outputs[drains] = new_drains
+        return changed
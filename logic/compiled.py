@@ -0,0 +1,726 @@
+from __future__ import division
+import collections
+import itertools
+
+import numpy
+
+import logic
+from states import FLOAT, HIGH, LOW
+
+# A `Netlist` is a `Schematic` lowered to flat, integer-indexed arrays.
+# Terminals, parts and nets are each numbered from 0. Membership is stored in
+# compressed sparse row (CSR) form: the terminals of net `n` are
+#
+#     net_terms[net_offsets[n]:net_offsets[n+1]]
+#
+# and the terminals of part `p` are found the same way through `part_offsets`
+# and `part_terms`.
+#
+# A `Simulator` holds the dynamic state for a netlist (one state per terminal
+# input and output) and settles it with the same event-driven algorithm as
+# `Schematic.update()`. Results are only copied back to the `Terminal` and
+# `Net` objects when `Simulator.write_back()` is called.
+
+# Part kinds. Only NMOS, PMOS, AGGREGATE, OBJECT and GATE parts do any work
+# when updated; the others just hold their outputs until reset.
+KIND_PASSIVE = 0    # Probes, IO parts, drawings
+KIND_VDD = 1
+KIND_GND = 2
+KIND_SWITCH = 3
+KIND_NMOS = 4
+KIND_PMOS = 5
+KIND_AGGREGATE = 6  # Simulated by a child `Simulator`
+KIND_OBJECT = 7     # Unknown part, falls back to calling `Part.update()`
+KIND_GATE = 8       # Transistors replaced by a truth table, see `gatelevel`
+KIND_NAMES = ("passive", "vdd", "gnd", "switch", "nmos", "pmos", "aggregate",
+              "object", "gate")
+
+
+def part_kind(part):
+    """Returns the kind code used to simulate `part`."""
+    if isinstance(part, logic.parts.NmosTransistorPart):
+        return KIND_PMOS if part.pmos else KIND_NMOS
+    elif isinstance(part, logic.parts.AggregatePart):
+        return KIND_AGGREGATE
+    elif isinstance(part, logic.parts.VddPart):
+        return KIND_VDD
+    elif isinstance(part, logic.parts.GndPart):
+        return KIND_GND
+    elif isinstance(part, logic.parts.SwitchPart):
+        return KIND_SWITCH
+    elif type(part).update.__func__ is logic.Part.update.__func__:
+        return KIND_PASSIVE
+    else:
+        return KIND_OBJECT
+
+
+def _part_terminals(part, kind):
+    """Terminals of `part` in the order the simulator expects them."""
+    if kind in (KIND_NMOS, KIND_PMOS):
+        return [part["gate"], part["source"], part["drain"]]
+    else:
+        return [part.terminals[name] for name in sorted(part.terminals)]
+
+
+def _reset_output(part, kind):
+    """State of `part`'s terminal outputs just after `Part.reset()`."""
+    if kind == KIND_VDD:
+        return HIGH
+    elif kind == KIND_GND:
+        return LOW
+    elif kind == KIND_SWITCH:
+        return part.outputs[0]
+    else:
+        return FLOAT
+
+
+def _csr(lists):
+    """Returns `(offsets, values)` arrays for a list of integer lists."""
+    offsets = numpy.zeros(len(lists)+1, dtype=numpy.int32)
+    offsets[1:] = numpy.cumsum([len(l) for l in lists])
+    values = numpy.fromiter(
+        (v for l in lists for v in l), dtype=numpy.int32, count=offsets[-1])
+    return offsets, values
+
+
+class Netlist(object):
+    """A `Schematic` lowered to integer-indexed arrays.
+
+    Arguments:
+        terminals: List of `Terminal` objects, one per terminal index.
+        parts: List of `(kind, part, terminal_indexes)` tuples.
+        nets: List of `(net_objects, terminal_indexes)` tuples. A flattened
+            netlist can simulate several `Net` objects as one net.
+        subnetlists: Dict mapping the part index of each aggregate part to a
+            `(netlist, ports)` tuple, where `ports` is a list of
+            `(terminal, subnetlist_terminal)` index pairs.
+        ports: List of `(terminal, net, inner_terms, is_io)` tuples for
+            terminals that were merged away when flattening, see
+            `get_port_states()`. They don't drive or belong to their net.
+            `inner_terms` lists the terminals of the net inside the
+            aggregate part the terminal is a port of, or is None if the
+            inside can't be told apart from the outside. `is_io` is True for
+            the IO part terminal of the port and False for the aggregate
+            part's terminal.
+        gate_tables: Dict mapping the part index of each gate part to its
+            truth table, see `logic.gatelevel`.
+
+    """
+
+    def __init__(self, terminals, parts, nets, subnetlists=None, ports=(),
+                 gate_tables=None):
+        self.term_objects = list(terminals)
+        self.part_objects = [part for kind, part, terms in parts]
+        self.net_objects = [tuple(objects) for objects, terms in nets]
+        self.subnetlists = dict(subnetlists or {})
+        self.gate_tables = dict(gate_tables or {})
+        self.flattened = False
+        self.gate_level = False
+
+        self.term_index = dict(
+            (term, i) for i, term in enumerate(self.term_objects))
+        self.part_index = dict(
+            (part, i) for i, part in enumerate(self.part_objects))
+        self.net_index = dict((net, i)
+            for i, objects in enumerate(self.net_objects) for net in objects)
+
+        self.part_kind = numpy.array([kind for kind, part, terms in parts],
+                                     dtype=numpy.int8)
+        self.part_offsets, self.part_terms = _csr(
+            [terms for kind, part, terms in parts])
+        self.net_offsets, self.net_terms = _csr(
+            [terms for objects, terms in nets])
+        self.port_terms = numpy.array([port[0] for port in ports],
+                                      dtype=numpy.int32)
+        self.net_ports = collections.defaultdict(list)
+        for t, n, inner_terms, is_io in ports:
+            self.net_ports[n].append((t, inner_terms, is_io))
+
+        self.term_part = numpy.full(self.n_terminals, -1, dtype=numpy.int32)
+        self.term_net = numpy.full(self.n_terminals, -1, dtype=numpy.int32)
+        self.term_reset = numpy.zeros(self.n_terminals, dtype=numpy.int8)
+        for p, (kind, part, terms) in enumerate(parts):
+            self.term_part[terms] = p
+            self.term_reset[terms] = _reset_output(part, kind)
+        for n, (objects, terms) in enumerate(nets):
+            self.term_net[terms] = n
+        for port in ports:
+            self.term_net[port[0]] = port[1]
+
+    @property
+    def n_terminals(self):
+        return len(self.term_objects)
+
+    @property
+    def n_parts(self):
+        return len(self.part_objects)
+
+    @property
+    def n_nets(self):
+        return len(self.net_objects)
+
+    def get_net_terminals(self, n):
+        return self.net_terms[self.net_offsets[n]:self.net_offsets[n+1]]
+
+    def get_part_terminals(self, p):
+        return self.part_terms[self.part_offsets[p]:self.part_offsets[p+1]]
+
+    def get_port_states(self, n, outputs):
+        """Returns `[(terminal, output, input)]` for the ports of net `n`.
+
+        `outputs` holds the output of every terminal. Like the terminals of
+        an aggregate part and its IO parts when it isn't flattened, the
+        aggregate part's terminal outputs what the inside of the part drives
+        and sees what the outside drives, and the IO part terminal the other
+        way around.
+        """
+        ports = self.net_ports.get(n)
+        if not ports:
+            return []
+
+        # Drivers of each state bit, so the outside of a port can be told
+        # from the inside without going over the whole net again
+        merged = FLOAT
+        highs = lows = 0
+        for t in self.get_net_terminals(n).tolist():
+            value = outputs[t]
+            merged |= value
+            highs += value & HIGH
+            lows += (value & LOW) >> 1
+
+        states = []
+        for t, inner_terms, is_io in ports:
+            if inner_terms is None:
+                states.append((t, merged, merged))
+                continue
+            inside = FLOAT
+            inner_highs = inner_lows = 0
+            for i in inner_terms:
+                value = outputs[i]
+                inside |= value
+                inner_highs += value & HIGH
+                inner_lows += (value & LOW) >> 1
+            outside = (HIGH if highs > inner_highs else FLOAT) | \
+                (LOW if lows > inner_lows else FLOAT)
+            if is_io:
+                states.append((t, outside, inside))
+            else:
+                states.append((t, inside, outside))
+        return states
+
+    @classmethod
+    def from_schematic(cls, schematic, flatten=False, gates=False):
+        """Lowers `schematic` to a netlist.
+
+        Aggregate parts are normally simulated by a child netlist, like
+        `AggregatePart.update()` does. If `flatten` is True, their
+        sub-schematics are instead inlined (recursively) into one flat
+        netlist: each IO part terminal is merged with the aggregate terminal
+        it pairs with, joining the nets on either side into one.
+
+        If `gates` is True, complementary CMOS gates are replaced by gate
+        parts, see `logic.gatelevel.lower()`. This implies `flatten`: the
+        library gates are aggregate parts, whose transistors are only found
+        once they are inlined.
+        """
+        flatten = flatten or gates
+        builder = _NetlistBuilder(flatten)
+        builder.add_schematic(schematic)
+        netlist = builder.build(cls)
+        netlist.flattened = flatten
+        if gates:
+            netlist = logic.gatelevel.lower(netlist)
+        return netlist
+
+
+class _NetlistBuilder(object):
+    """Collects the lists that make up a `Netlist`."""
+
+    def __init__(self, flatten):
+        self.flatten = flatten
+        self.terminals = []
+        self.term_index = {}
+        self.parts = []
+        self.subnetlists = {}
+        self.nets = []  # [net_objects, terminal_indexes] pairs
+        self.net_parent = []  # Union-find forest of merged nets
+        self.port_nets = {}  # Maps port terminals to their net, or None
+        self.port_pairs = []  # (aggregate terminal, IO part terminal) pairs
+
+    def add_terminal(self, term):
+        i = len(self.terminals)
+        self.term_index[term] = i
+        self.terminals.append(term)
+        return i
+
+    def add_port(self, term):
+        self.port_nets[self.add_terminal(term)] = None
+
+    def add_schematic(self, schematic, io_parts=()):
+        aggregates = []
+        for part in schematic.parts:
+            kind = part_kind(part)
+            if part in io_parts:
+                self.add_port(part["term"])
+            elif kind == KIND_AGGREGATE and self.flatten:
+                for term in part.terminals.itervalues():
+                    self.add_port(term)
+                aggregates.append(part)
+            else:
+                self.add_part(part, kind)
+
+        for net in schematic.nets:
+            n = len(self.nets)
+            indexes = []
+            for term in net.terminals:
+                i = self.term_index[term]
+                if i in self.port_nets:
+                    self.port_nets[i] = n
+                elif i not in indexes:
+                    indexes.append(i)
+            self.nets.append(([net], indexes))
+            self.net_parent.append(n)
+
+        for part in aggregates:
+            internals = [internal for external, internal in part.terminal_pairs]
+            self.add_schematic(part.schematic,
+                               set(term.part for term in internals))
+            for external, internal in part.terminal_pairs:
+                pair = (self.term_index[external], self.term_index[internal])
+                self.port_pairs.append(pair)
+                self.merge_nets(self.port_nets[pair[0]],
+                                self.port_nets[pair[1]])
+
+    def add_part(self, part, kind):
+        indexes = map(self.add_terminal, _part_terminals(part, kind))
+        if kind == KIND_AGGREGATE:
+            sub = Netlist.from_schematic(part.schematic)
+            ports = [(self.term_index[external], sub.term_index[internal])
+                     for external, internal in part.terminal_pairs]
+            self.subnetlists[len(self.parts)] = (sub, ports)
+        self.parts.append((kind, part, indexes))
+
+    def find_net(self, n):
+        while self.net_parent[n] != n:
+            self.net_parent[n] = n = self.net_parent[self.net_parent[n]]
+        return n
+
+    def merge_nets(self, n1, n2):
+        if n1 is not None and n2 is not None:
+            self.net_parent[self.find_net(n2)] = self.find_net(n1)
+
+    def build(self, cls):
+        # Renumber the nets that are left after merging
+        roots = {}
+        nets = []
+        for n, (objects, indexes) in enumerate(self.nets):
+            root = self.find_net(n)
+            if root not in roots:
+                roots[root] = len(nets)
+                nets.append(([], []))
+            objects_out, indexes_out = nets[roots[root]]
+            objects_out.extend(objects)
+            indexes_out.extend(indexes)
+
+        # Before merging, the nets of a merged net form a tree, with each
+        # aggregate terminal's net above its IO part terminal's net, unless
+        # an inner net has more than one IO part on it
+        children = collections.defaultdict(list)
+        n_parents = collections.defaultdict(int)
+        for external, internal in self.port_pairs:
+            outer, inner = self.port_nets[external], self.port_nets[internal]
+            if outer is not None and inner is not None:
+                children[outer].append(inner)
+                n_parents[inner] += 1
+
+        ports = []
+        for external, internal in self.port_pairs:
+            inner_terms = self.inner_terms(internal, children, n_parents)
+            for t, is_io in ((external, False), (internal, True)):
+                n = self.port_nets[t]
+                if n is not None:
+                    ports.append((t, roots[self.find_net(n)], inner_terms,
+                                  is_io))
+        ports.sort()
+
+        return cls(self.terminals, self.parts, nets, self.subnetlists, ports)
+
+    def inner_terms(self, internal, children, n_parents):
+        """Returns the terminals below the net of IO part terminal
+        `internal` in the tree of merged nets, or None if that isn't a
+        tree."""
+        n = self.port_nets[internal]
+        if n is None:
+            return []
+        terms = []
+        stack = [n]
+        while stack:
+            n = stack.pop()
+            if n_parents[n] > 1:
+                return None
+            terms.extend(self.nets[n][1])
+            stack.extend(children[n])
+        return terms
+
+
+class Simulator(object):
+    """Simulates a `Netlist`, giving the same results as `Schematic.update()`.
+
+    The static structure of the netlist stays in numpy arrays, but the
+    per-terminal state vectors (`outputs`, `inputs`) and the hot-loop copies
+    of the CSR arrays are plain lists of ints, which are much faster than
+    numpy arrays to index one element at a time.
+
+    Changes made through `set_output()` are remembered, and `settle()` only
+    propagates from them, so the cost of a settle is proportional to the part
+    of the netlist that the changes affect.
+
+    If `active_parts` is given, only the parts with those indexes are
+    evaluated. The outputs of other parts only change through `set_output()`.
+    """
+
+    def __init__(self, netlist, active_parts=None):
+        self.netlist = netlist
+
+        self._part_kind = netlist.part_kind.tolist()
+        self._gate_tables = netlist.gate_tables
+        active = netlist.part_kind >= KIND_NMOS
+        if active_parts is not None:
+            mask = numpy.zeros(netlist.n_parts, dtype=bool)
+            mask[list(active_parts)] = True
+            active &= mask
+        self._part_active = active.tolist()
+        self._part_offsets = netlist.part_offsets.tolist()
+        self._part_terms = netlist.part_terms.tolist()
+        self._net_offsets = netlist.net_offsets.tolist()
+        self._net_terms = netlist.net_terms.tolist()
+        self._term_part = netlist.term_part.tolist()
+        self._term_net = netlist.term_net.tolist()
+
+        self.children = {}
+        for p, (sub, ports) in netlist.subnetlists.iteritems():
+            self.children[p] = (Simulator(sub), ports)
+
+        # Length of the arrays returned by `get_state()`
+        self._child_order = [child for p, (child, ports)
+                             in sorted(self.children.iteritems())]
+        self.state_size = netlist.n_terminals + netlist.n_nets + 1 + sum(
+            child.state_size for child in self._child_order)
+
+        # Work queue. Nets are queued as their index `n` and parts as `~p`.
+        self._queue = collections.deque()
+        self._net_queued = [False] * netlist.n_nets
+        self._part_queued = [False] * netlist.n_parts
+
+        # Nets and parts evaluated since the last `write_back()`
+        self._touched_nets = set()
+        self._touched_parts = set()
+
+        self.reset()
+
+    def reset(self):
+        """Puts every terminal and net in the state `Schematic.reset()` does."""
+        self.outputs = self.netlist.term_reset.tolist()
+        self.inputs = [FLOAT] * self.netlist.n_terminals
+        self.net_values = [FLOAT] * self.netlist.n_nets
+        for child, ports in self.children.itervalues():
+            child.reset()
+        self._state_replaced()
+
+    def load(self):
+        """Copies the current state of the schematic objects in."""
+        for i, term in enumerate(self.netlist.term_objects):
+            self.outputs[i] = term.output
+            self.inputs[i] = term.input
+        for n, objects in enumerate(self.netlist.net_objects):
+            self.net_values[n] = objects[0]._output
+        for child, ports in self.children.itervalues():
+            child.load()
+        self._state_replaced()
+
+
+    def get_state(self):
+        """Returns the whole simulation state as one int8 array.
+
+        Terminals take a byte each, holding their output in bits 0-1 and
+        their input in bits 2-3. Nets follow, with their value in bits 0-1
+        and bit 2 set if they are queued to be resolved, then a byte telling
+        whether the next settle has to be full, and the states of the child
+        simulators in part order.
+        """
+        values = []
+        self._get_state(values)
+        return numpy.array(values, dtype=numpy.int8)
+
+    def _get_state(self, values):
+        values.extend([output | input << 2 for output, input
+                       in itertools.izip(self.outputs, self.inputs)])
+        values.extend([value | queued << 2 for value, queued
+                       in itertools.izip(self.net_values, self._net_queued)])
+        values.append(self._needs_full_settle)
+        for child in self._child_order:
+            child._get_state(values)
+
+    def set_state(self, state):
+        """Restores a state returned by `get_state()`.
+
+        Only the nets that were queued when the state was taken are queued
+        afterwards, so restoring a settled state leaves nothing to settle.
+        The next `write_back()` copies everything.
+        """
+        if len(state) != self.state_size:
+            raise ValueError("State doesn't match this simulator.")
+        self._set_state(numpy.asarray(state).tolist(), 0)
+
+    def _set_state(self, values, offset):
+        n_terms = self.netlist.n_terminals
+        n_nets = self.netlist.n_nets
+
+        terms = values[offset:offset+n_terms]
+        self.outputs[:] = [value & 3 for value in terms]
+        self.inputs[:] = [value >> 2 & 3 for value in terms]
+        offset += n_terms
+        nets = values[offset:offset+n_nets]
+        self.net_values[:] = [value & 3 for value in nets]
+        self._net_queued[:] = [bool(value & 4) for value in nets]
+        self._part_queued[:] = [False] * self.netlist.n_parts
+        self._queue.clear()
+        self._queue.extend(n for n, value in enumerate(nets) if value & 4)
+        offset += n_nets
+        self._needs_full_settle = bool(values[offset])
+        self._needs_full_write_back = True
+        offset += 1
+
+        for child in self._child_order:
+            offset = child._set_state(values, offset)
+        return offset
+
+    def _state_replaced(self):
+        # Nothing is known about which parts of the state are consistent, so
+        # the next settle and write back have to cover everything.
+        self._needs_full_settle = True
+        self._needs_full_write_back = True
+
+    def write_back(self):
+        """Copies the simulated state out to the schematic objects.
+
+        Only terminals and nets that were evaluated since the last write back
+        are copied. Outputs are written without going through the
+        `Terminal.output` setter, so the schematic doesn't see them as new
+        changes to propagate.
+        """
+        netlist = self.netlist
+        if self._needs_full_write_back:
+            nets = xrange(netlist.n_nets)
+            parts = xrange(netlist.n_parts)
+        else:
+            nets = self._touched_nets
+            parts = self._touched_parts
+
+        terms = set()
+        for n in nets:
+            value = self.net_values[n]
+            terms.update(self._net_terms[
+                self._net_offsets[n]:self._net_offsets[n+1]])
+            for net in netlist.net_objects[n]:
+                net._output = value
+            for t, output, input in netlist.get_port_states(n, self.outputs):
+                term = netlist.term_objects[t]
+                term._output = output
+                term.input = input
+        for p in parts:
+            terms.update(self._part_terms[
+                self._part_offsets[p]:self._part_offsets[p+1]])
+            if p in self.children:
+                self.children[p][0].write_back()
+
+        for i in terms:
+            term = netlist.term_objects[i]
+            term._output = self.outputs[i]
+            term.input = self.inputs[i]
+
+        self._touched_nets.clear()
+        self._touched_parts.clear()
+        self._needs_full_write_back = False
+
+    def set_output(self, t, value):
+        """Sets the output of terminal `t`, to be propagated by `settle()`."""
+        if self.outputs[t] != value:
+            self.outputs[t] = value
+            if self._term_part[t] >= 0:
+                self._touched_parts.add(self._term_part[t])
+            n = self._term_net[t]
+            if n >= 0 and not self._net_queued[n]:
+                self._net_queued[n] = True
+                self._queue.append(n)
+
+    def settle(self, full=False, max_events=None):
+        """Propagates changes until nothing changes.
+
+        Only the changes made since the last settle are propagated, unless
+        `full` is True or the state was reset or loaded, in which case every
+        net and part is evaluated.
+
+        Raises `logic.OscillationError` like `Schematic.update()` does.
+        """
+        queue = self._queue
+        net_queued = self._net_queued
+        part_queued = self._part_queued
+        part_active = self._part_active
+        net_offsets = self._net_offsets
+        net_terms = self._net_terms
+        part_offsets = self._part_offsets
+        part_terms = self._part_terms
+        term_part = self._term_part
+        term_net = self._term_net
+        outputs = self.outputs
+        touched_nets = self._touched_nets
+        touched_parts = self._touched_parts
+
+        if full or self._needs_full_settle:
+            queue.clear()
+            queue.extend(xrange(self.netlist.n_nets))
+            queue.extend(~p for p in xrange(self.netlist.n_parts)
+                         if part_active[p])
+            net_queued[:] = [True] * len(net_queued)
+            part_queued[:] = part_active
+            self._needs_full_settle = False
+
+        detector = logic.convergence.CycleDetector(
+            max_events,
+            warmup=4 * (self.netlist.n_parts + self.netlist.n_nets),
+            n_terminals=self.netlist.n_terminals)
+        n_events = 0
+        generation_left = len(queue)
+
+        while queue:
+            item = queue.popleft()
+            n_events += 1
+            if item >= 0:
+                net_queued[item] = False
+                touched_nets.add(item)
+                if self._update_net(item):
+                    if detector.verifying:
+                        detector.changed_nets.add(item)
+                    for t in net_terms[net_offsets[item]:net_offsets[item+1]]:
+                        p = term_part[t]
+                        if part_active[p] and not part_queued[p]:
+                            part_queued[p] = True
+                            queue.append(~p)
+            else:
+                p = ~item
+                part_queued[p] = False
+                touched_parts.add(p)
+                if detector.armed:
+                    table = detector.table
+                    terms = part_terms[part_offsets[p]:part_offsets[p+1]]
+                    h = detector.state_hash
+                    for t in terms:
+                        h ^= table[4*t + outputs[t]]
+                    changed = self._update_part(p)
+                    for t in terms:
+                        h ^= table[4*t + outputs[t]]
+                    detector.state_hash = h
+                else:
+                    changed = self._update_part(p)
+                for t in changed:
+                    n = term_net[t]
+                    if n >= 0 and not net_queued[n]:
+                        net_queued[n] = True
+                        queue.append(n)
+
+            generation_left -= 1
+            if generation_left == 0:
+                generation_left = len(queue)
+                if detector.end_generation(n_events, queue,
+                                           lambda: enumerate(outputs)):
+                    nets = detector.changed_nets or \
+                        [i for i in queue if i >= 0]
+                    raise logic.OscillationError(detector.message, [
+                        net for n in sorted(nets)
+                        for net in self.netlist.net_objects[n]])
+
+    def _update_net(self, n):
+        """Resolves net `n` like `Net.update()` does.
+
+        Returns True if the input of any terminal on the net changed.
+        """
+        outputs = self.outputs
+        inputs = self.inputs
+        terms = self._net_terms[self._net_offsets[n]:self._net_offsets[n+1]]
+
+        ones = twos = 0
+        for t in terms:
+            s = outputs[t]
+            twos |= ones & s
+            ones |= s
+
+        was_updated = False
+        for t in terms:
+            value = (ones & ~outputs[t]) | twos
+            if inputs[t] != value:
+                inputs[t] = value
+                was_updated = True
+
+        self.net_values[n] = ones
+        return was_updated
+
+    def _update_part(self, p):
+        """Updates part `p`, returning the terminals whose output changed."""
+        kind = self._part_kind[p]
+        outputs = self.outputs
+        inputs = self.inputs
+        terms = self._part_terms[self._part_offsets[p]:self._part_offsets[p+1]]
+        changed = []
+
+        if kind == KIND_NMOS or kind == KIND_PMOS:
+            g, s, d = terms
+            gate = inputs[g]
+            if (kind == KIND_NMOS and gate == HIGH) or \
+                    (kind == KIND_PMOS and gate == LOW):
+                new_s, new_d = inputs[d], inputs[s]
+            else:
+                new_s = new_d = FLOAT
+            if outputs[g] != FLOAT:
+                outputs[g] = FLOAT
+                changed.append(g)
+            if outputs[s] != new_s:
+                outputs[s] = new_s
+                changed.append(s)
+            if outputs[d] != new_d:
+                outputs[d] = new_d
+                changed.append(d)
+
+        elif kind == KIND_AGGREGATE:
+            child, ports = self.children[p]
+            for external, internal in ports:
+                child.set_output(internal, inputs[external])
+            child.settle()
+            for external, internal in ports:
+                value = child.inputs[internal]
+                if outputs[external] != value:
+                    outputs[external] = value
+                    changed.append(external)
+
+        elif kind == KIND_GATE:
+            index = 0
+            for i in xrange(len(terms) - 1):
+                index |= inputs[terms[i]] << 2*i
+            out = terms[-1]
+            value = self._gate_tables[p][index]
+            if outputs[out] != value:
+                outputs[out] = value
+                changed.append(out)
+
+        else:  # KIND_OBJECT
+            term_objects = self.netlist.term_objects
+            for t in terms:
+                term_objects[t].input = inputs[t]
+            self.netlist.part_objects[p].update()
+            for t in terms:
+                value = term_objects[t].output
+                if outputs[t] != value:
+                    outputs[t] = value
+                    changed.append(t)
+
+        return changed
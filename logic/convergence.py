@@ -0,0 +1,131 @@
+import random
+
+from states import ALL
+
+# A settle loop processes a FIFO queue of nets and parts. It is split into
+# generations: generation `g+1` is whatever generation `g` added to the
+# queue. The state at the end of a generation is the output of every
+# terminal plus the contents of the queue, so if it is seen twice the loop
+# will go around the same cycle forever.
+#
+# To notice that cheaply, terminal outputs are hashed with Zobrist hashing:
+# every (terminal, state) pair gets a random 64 bit key, and the state hash is
+# the XOR of the keys of every terminal's output. The settle loop keeps it up
+# to date by XOR-ing out a part's terminals before updating the part and
+# XOR-ing them back in after. Only the hash of each generation is stored.
+#
+# A repeated hash only suggests a cycle. With a period of `p` generations, the
+# loop is followed for `p` more generations while recording which nets
+# change, and it is only reported as an oscillation if the same hash and
+# queue come back at the end.
+#
+# Nothing is hashed until the loop has done `warmup` events. Settle loops use a
+# few times their number of parts and nets, which a settling schematic rarely
+# needs, so ordinary updates pay almost nothing for this.
+
+
+class OscillationError(RuntimeError):
+    """Raised when a schematic doesn't settle.
+
+    `nets` holds the nets that kept changing.
+    """
+
+    def __init__(self, message, nets=()):
+        super(OscillationError, self).__init__(message)
+        self.nets = list(nets)
+
+
+class CycleDetector(object):
+    """Watches a settle loop for repeating states and runaway event counts.
+
+    Arguments:
+        max_events: Number of events (net and part evaluations) after which
+            the loop is stopped, or None for no limit.
+        warmup: Number of events before hashing starts.
+        n_terminals: If the settle loop numbers its terminals from 0, their
+            count. The keys are then kept in the flat list `table`, with the
+            key of terminal `t` having output `state` at `4*t + state`, which
+            is faster to use than calling `key()`.
+
+    """
+
+    def __init__(self, max_events=None, warmup=0, n_terminals=None):
+        self.max_events = max_events
+        self.warmup = warmup
+        self.n_terminals = n_terminals
+        self.table = None
+        self.armed = False
+        self.state_hash = 0
+        self.generation = 0
+        self.message = None
+
+        # While `verifying`, nets that change are added to `changed_nets`
+        self.verifying = False
+        self.changed_nets = set()
+
+        self._seen = {}
+        self._keys = {}
+        self._verify_start = None
+        self._verify_end = None
+        self._verify_hash = None
+        self._verify_queue = None
+
+    def key(self, t, state):
+        """Returns the Zobrist key of terminal `t` having output `state`."""
+        if self.table is not None:
+            return self.table[4*t + state]
+        keys = self._keys.get(t)
+        if keys is None:
+            keys = self._keys[t] = [random.getrandbits(64) for s in ALL]
+        return keys[state]
+
+    def hash_outputs(self, outputs):
+        """XOR of the keys of an iterable of `(terminal, state)` pairs."""
+        h = 0
+        for t, state in outputs:
+            h ^= self.key(t, state)
+        return h
+
+    def end_generation(self, n_events, queue, get_outputs):
+        """Called by the settle loop each time a generation is done.
+
+        `queue` holds the items of the next generation, and `get_outputs`
+        returns every `(terminal, state)` pair. Returns True if the loop
+        should stop, with the reason in `message`.
+        """
+        self.generation += 1
+
+        if self.max_events is not None and n_events > self.max_events:
+            self.message = "Did not settle within {} events.".format(
+                self.max_events)
+            return True
+
+        if not self.armed:
+            if n_events > self.warmup:
+                self.armed = True
+                if self.n_terminals is not None:
+                    self.table = [random.getrandbits(64)
+                                  for i in xrange(4 * self.n_terminals)]
+                self.state_hash = self.hash_outputs(get_outputs())
+            return False
+
+        h = self.state_hash
+        if self.verifying:
+            if self.generation < self._verify_end:
+                return False
+            if h == self._verify_hash and set(queue) == self._verify_queue:
+                self.message = "Oscillating with a period of {} " \
+                    "generations.".format(self._verify_end - self._verify_start)
+                return True
+            self.verifying = False
+            self.changed_nets.clear()
+
+        first_seen = self._seen.get(h)
+        if first_seen is not None:
+            self.verifying = True
+            self._verify_start = self.generation
+            self._verify_end = 2*self.generation - first_seen
+            self._verify_hash = h
+            self._verify_queue = set(queue)
+        self._seen[h] = self.generation
+        return False
@@ -0,0 +1,364 @@
+import itertools
+
+import logic
+from compiled import Netlist, KIND_NMOS, KIND_PMOS, KIND_VDD, KIND_GND, \
+    KIND_PASSIVE, KIND_GATE
+from states import FLOAT, HIGH, LOW, ALL
+
+# Gate recognition finds complementary CMOS gates in a netlist: an output net
+# pulled up to a Vdd rail by a network of PMOS transistors and down to a Gnd
+# rail by a network of NMOS transistors, where for every HIGH/LOW combination
+# of the gate inputs exactly one of the two networks conducts. `lower()`
+# replaces each one with a single gate part that looks up its output in a
+# truth table indexed by the states of its inputs.
+#
+# Switch level simulation lets values flow both ways through transistors, so
+# a gate only behaves like a boolean function if nothing else can push values
+# back into it. A gate is only replaced when that can be shown from the
+# structure of the netlist:
+#
+#   - Its transistors are the only drivers of the output net. Anything else
+#     on it is a transistor gate or a passive part other than an IO part.
+#     IO parts can drive a net from outside. That is why the library's Not,
+#     Nand and Nor cells aren't recognized when their own schematic is
+#     simulated, where the output is an IO part, but are once they are
+#     flattened into a schematic that uses them.
+#   - The nets inside its networks only connect its own transistors'
+#     sources and drains.
+#   - Leaving out the rails, its networks have no cycles, so values can't go
+#     around a loop and latch.
+#   - Its inputs aren't its output, internal or rail nets.
+#   - Every rail it connects to is only driven by Vdd (or Gnd) parts and
+#     transistors of replaced gates.
+#
+# Under those conditions a transistor with a FLOAT or CONTENTION gate is off,
+# and once the inputs have settled, the output is HIGH if the pull-up network
+# conducts, LOW if the pull-down network does, and FLOAT if neither does,
+# which is what the truth tables hold. The transistors then only pass the
+# rail's own value back to it. Anything that doesn't qualify stays at switch
+# level.
+#
+# This only holds for settled values. While the inputs are changing, both
+# networks can conduct for a moment, and the transistors pass the CONTENTION
+# on the output back to the rails and to other gates on them, which a gate
+# part doesn't. So a netlist that settles at switch level settles to the same
+# values with gates, but how it gets there differs: some, like a Nand array
+# whose inputs change together, oscillate at switch level and settle with
+# gates.
+#
+# The transistors and internal nets of a replaced gate are not simulated any
+# more, so their terminals aren't updated by `Simulator.write_back()`.
+
+MAX_INPUTS = 4
+
+
+class Gate(object):
+    """A complementary gate found by `find_gates()`.
+
+    Attributes:
+        part_type: "Gate", so timed simulation can give gates a delay.
+        output: Index of the output net.
+        inputs: Indexes of the input nets, in truth table order.
+        pull_up: Part indexes of the PMOS transistors.
+        pull_down: Part indexes of the NMOS transistors.
+        internal_nets: Indexes of the nets inside the two networks.
+        rails: Indexes of the Vdd and Gnd nets it connects to.
+        table: Output state for every combination of input states. The
+            state of input `i` is in bits `2*i` and `2*i + 1` of the index.
+
+    """
+
+    part_type = "Gate"
+
+    def __init__(self, output, inputs, pull_up, pull_down, internal_nets,
+                 rails, table):
+        self.output = output
+        self.inputs = inputs
+        self.pull_up = pull_up
+        self.pull_down = pull_down
+        self.internal_nets = internal_nets
+        self.rails = rails
+        self.table = table
+
+    def __str__(self):
+        return "<Gate {} inputs, {} transistors>".format(
+            len(self.inputs), len(self.pull_up) + len(self.pull_down))
+
+    __repr__ = __str__
+
+
+class _Finder(object):
+    """Structural queries on a netlist, in plain lists."""
+
+    def __init__(self, netlist):
+        self.netlist = netlist
+        self.kinds = netlist.part_kind.tolist()
+        self.term_part = netlist.term_part.tolist()
+        self.term_net = netlist.term_net.tolist()
+        self.part_terms = [netlist.get_part_terminals(p).tolist()
+                           for p in xrange(netlist.n_parts)]
+        self.net_terms = [netlist.get_net_terminals(n).tolist()
+                          for n in xrange(netlist.n_nets)]
+
+        # Source and drain terminals of transistors, by net
+        self.channels = [[] for n in xrange(netlist.n_nets)]
+        for p, kind in enumerate(self.kinds):
+            if kind in (KIND_NMOS, KIND_PMOS):
+                for t in self.part_terms[p][1:]:
+                    n = self.term_net[t]
+                    if n >= 0:
+                        self.channels[n].append((p, t))
+
+        # Nets with Vdd or Gnd parts on them. Only the ones with nothing but
+        # sources and transistors on them can be rails.
+        self.rail_kind = {}
+        bad = set()
+        for n, terms in enumerate(self.net_terms):
+            kinds = set(self.kinds[self.term_part[t]] for t in terms)
+            if KIND_VDD in kinds or KIND_GND in kinds:
+                if kinds <= set((KIND_VDD, KIND_NMOS, KIND_PMOS)):
+                    self.rail_kind[n] = KIND_VDD
+                elif kinds <= set((KIND_GND, KIND_NMOS, KIND_PMOS)):
+                    self.rail_kind[n] = KIND_GND
+                else:
+                    bad.add(n)
+        self.bad_rails = bad
+
+    def is_gate_terminal(self, t):
+        p = self.term_part[t]
+        return self.kinds[p] in (KIND_NMOS, KIND_PMOS) and \
+            self.part_terms[p][0] == t
+
+    def other_channel_net(self, p, t):
+        g, s, d = self.part_terms[p]
+        return self.term_net[d if t == s else s]
+
+    def network(self, output, kind, rail_kind):
+        """Collects the transistors of `kind` between `output` and rails.
+
+        Returns `(transistors, internal_nets, rails)`, or None if the network
+        doesn't qualify.
+        """
+        transistors = []
+        seen = set([output])
+        internal = []
+        rails = set()
+        stack = [output]
+        while stack:
+            n = stack.pop()
+            for p, t in self.channels[n]:
+                if self.kinds[p] != kind:
+                    if n == output:
+                        continue
+                    return None
+                if p in transistors:
+                    continue
+                transistors.append(p)
+                other = self.other_channel_net(p, t)
+                if other < 0 or other in self.bad_rails:
+                    return None
+                if other in self.rail_kind:
+                    if self.rail_kind[other] != rail_kind:
+                        return None
+                    rails.add(other)
+                elif other not in seen:
+                    seen.add(other)
+                    internal.append(other)
+                    stack.append(other)
+        if not rails:
+            return None
+
+        # Internal nets may only hold sources and drains of the network
+        members = set(transistors)
+        for n in internal:
+            for t in self.net_terms[n]:
+                if self.term_part[t] not in members or \
+                        self.is_gate_terminal(t):
+                    return None
+
+        # No cycles once the rails are left out
+        parent = dict((n, n) for n in seen)
+
+        def find(n):
+            while parent[n] != n:
+                n = parent[n]
+            return n
+
+        for p in transistors:
+            g, s, d = self.part_terms[p]
+            a, b = self.term_net[s], self.term_net[d]
+            if a in self.rail_kind or b in self.rail_kind:
+                continue
+            a, b = find(a), find(b)
+            if a == b:
+                return None
+            parent[a] = b
+
+        return transistors, internal, rails
+
+    def gate(self, output, max_inputs):
+        """Returns the `Gate` driving net `output`, or None."""
+        if output in self.rail_kind or output in self.bad_rails:
+            return None
+        pull_up = self.network(output, KIND_PMOS, KIND_VDD)
+        pull_down = self.network(output, KIND_NMOS, KIND_GND)
+        if pull_up is None or pull_down is None:
+            return None
+        pull_up, up_internal, up_rails = pull_up
+        pull_down, down_internal, down_rails = pull_down
+        transistors = set(pull_up + pull_down)
+
+        # Nothing else may drive the output
+        for t in self.net_terms[output]:
+            p = self.term_part[t]
+            if p in transistors or self.is_gate_terminal(t):
+                continue
+            if self.kinds[p] != KIND_PASSIVE or isinstance(
+                    self.netlist.part_objects[p], logic.parts.IOPart):
+                return None
+
+        internal = up_internal + down_internal
+        rails = up_rails | down_rails
+        excluded = set(internal) | rails | set([output])
+        inputs = []
+        for p in pull_up + pull_down:
+            n = self.term_net[self.part_terms[p][0]]
+            if n < 0 or n in excluded:
+                return None
+            if n not in inputs:
+                inputs.append(n)
+        if len(inputs) > max_inputs:
+            return None
+
+        table = self.truth_table(output, inputs, pull_up, pull_down)
+        if table is None:
+            return None
+        return Gate(output, inputs, pull_up, pull_down, internal,
+                    sorted(rails), table)
+
+    def conducts(self, output, transistors, on):
+        """True if transistors for which `on(p)` is True connect `output` to
+        a rail."""
+        seen = set([output])
+        stack = [output]
+        while stack:
+            n = stack.pop()
+            for p, t in self.channels[n]:
+                if p in transistors and on(p):
+                    other = self.other_channel_net(p, t)
+                    if other in self.rail_kind:
+                        return True
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+        return False
+
+    def truth_table(self, output, inputs, pull_up, pull_down):
+        """Returns the truth table of a gate, or None if the networks aren't
+        complementary."""
+        gate_input = {}
+        for p in pull_up + pull_down:
+            gate_input[p] = inputs.index(self.term_net[self.part_terms[p][0]])
+        pull_up = set(pull_up)
+        pull_down = set(pull_down)
+
+        table = []
+        for states in itertools.product(ALL, repeat=len(inputs)):
+            states = states[::-1]  # Input 0 varies fastest
+            up = self.conducts(output, pull_up,
+                               lambda p: states[gate_input[p]] == LOW)
+            down = self.conducts(output, pull_down,
+                                 lambda p: states[gate_input[p]] == HIGH)
+            if all(state in (HIGH, LOW) for state in states) and up == down:
+                return None
+            table.append((HIGH if up else FLOAT) | (LOW if down else FLOAT))
+        return table
+
+
+def find_gates(netlist, max_inputs=MAX_INPUTS):
+    """Returns the `Gate`s of `netlist` that can be simulated as gates."""
+    finder = _Finder(netlist)
+    gates = []
+    for n in xrange(netlist.n_nets):
+        if finder.channels[n]:
+            gate = finder.gate(n, max_inputs)
+            if gate is not None:
+                gates.append(gate)
+
+    # Drop gates on rails that something else still drives through a
+    # transistor, until every rail left only has replaced transistors.
+    while True:
+        replaced = set(p for gate in gates
+                       for p in gate.pull_up + gate.pull_down)
+        dirty_rails = set(n for n in finder.rail_kind
+                          if any(p not in replaced
+                                 for p, t in finder.channels[n]))
+        kept = [gate for gate in gates if not dirty_rails & set(gate.rails)]
+        if len(kept) == len(gates):
+            return gates
+        gates = kept
+
+
+def lower(netlist, max_inputs=MAX_INPUTS):
+    """Returns a copy of `netlist` with its gates replaced by gate parts.
+
+    Each gate part's terminals are one gate terminal on each input net,
+    followed by one transistor terminal on the output net. The other
+    terminals of the replaced transistors are taken off their nets.
+    Aggregate parts' child netlists are left alone, so this does the most
+    for flattened netlists.
+    """
+    gates = find_gates(netlist, max_inputs)
+    finder = _Finder(netlist)
+
+    replaced = {}
+    removed_terms = set()
+    gate_parts = []
+    for gate in gates:
+        terms = []
+        transistors = gate.pull_up + gate.pull_down
+        for n in gate.inputs:
+            for p in transistors:
+                t = finder.part_terms[p][0]
+                if finder.term_net[t] == n:
+                    terms.append(t)
+                    break
+        terms.append(next(t for p in transistors
+                          for t in finder.part_terms[p][1:]
+                          if finder.term_net[t] == gate.output))
+        for p in transistors:
+            replaced[p] = gate
+            removed_terms.update(finder.part_terms[p])
+        removed_terms.difference_update(terms)
+        gate_parts.append((KIND_GATE, gate, terms))
+
+    parts = []
+    subnetlists = {}
+    for p in xrange(netlist.n_parts):
+        if p not in replaced:
+            if p in netlist.subnetlists:
+                subnetlists[len(parts)] = netlist.subnetlists[p]
+            parts.append((finder.kinds[p], netlist.part_objects[p],
+                          finder.part_terms[p]))
+    gate_tables = {}
+    for part in gate_parts:
+        gate_tables[len(parts)] = part[1].table
+        parts.append(part)
+
+    nets = [(objects, [t for t in finder.net_terms[n]
+                       if t not in removed_terms])
+            for n, objects in enumerate(netlist.net_objects)]
+    ports = []
+    for n, net_ports in netlist.net_ports.iteritems():
+        for t, inner_terms, is_io in net_ports:
+            if inner_terms is not None:
+                inner_terms = [i for i in inner_terms
+                               if i not in removed_terms]
+            ports.append((t, n, inner_terms, is_io))
+    ports.sort()
+
+    lowered = Netlist(netlist.term_objects, parts, nets, subnetlists, ports,
+                      gate_tables)
+    lowered.flattened = netlist.flattened
+    lowered.gate_level = True
+    return lowered
@@ -40,7 +40,7 @@ class Interface(gtk.Window):
             ))),
         ))
 
-        part_classes = dict(logic.part_library)
+        part_classes = dict(logic.part_library.items())
         del part_classes['Lines']
         del part_classes['Circle']
         del part_classes['Curve']
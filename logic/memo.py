@@ -0,0 +1,202 @@
+import hashlib
+
+import logic
+import compiled
+from compiled import KIND_PASSIVE, KIND_VDD, KIND_GND, KIND_NMOS, KIND_PMOS
+
+# Memoized evaluation of aggregate parts. `AggregatePart.update()` normally
+# settles the part's whole inner schematic. When that schematic is
+# combinational, the values it settles to only depend on the inputs of the
+# aggregate's terminals, so the outputs seen for one input vector can be kept
+# in a table shared by every part with the same inner schematic and looked up
+# the next time. Tables are found by part type and a hash of the structure of
+# the schematic, see `schematic_key()`, so parts that share a part type but
+# not a schematic don't share a table.
+#
+# A schematic counts as combinational when it can be shown from its structure
+# that it can't remember anything:
+#
+#   - It is made only of transistors, Vdd and Gnd parts and passive parts,
+#     once nested aggregates are flattened. Switches and unknown parts can
+#     change their outputs outside of `update()`.
+#   - Grouping nets into channel-connected components (nets joined by
+#     transistor sources and drains, not counting Vdd and Gnd rails), no
+#     component drives its own inputs through transistor gates, directly or
+#     through other components.
+#   - Inside a component, the transistors don't form a loop, through which
+#     values could go around and keep each other alive.
+#
+# This assumes rails keep the value of their Vdd or Gnd parts, which only
+# stops being true in a circuit that shorts them.
+#
+# Memoization is off unless `AggregatePart.memoize` is set, on the class or
+# on single parts. A part found in a table jumps straight to its settled
+# outputs, without the values its inner schematic goes through on the way.
+# A schematic that settles without memoization settles to the same values
+# with it, but whether it oscillates can differ: a Nand whose inputs both go
+# from HIGH to LOW at once oscillates when it is simulated, but not when its
+# outputs are looked up, and the other way around, outputs that come all at
+# once can start an oscillation the transients would have avoided.
+
+MAX_ENTRIES = 1 << 12
+
+# `TruthTableCache` by `(part_type, schematic_key())`, or None for schematics
+# that aren't combinational
+caches = {}
+
+
+def schematic_key(schematic):
+    """Returns a hash of what `schematic` is made of and how it is connected.
+
+    Schematics with the same parts, by name and part type, and the same nets
+    get the same key, wherever the parts are drawn. It is kept by the
+    schematic until its structure changes, and copies of it inherit it.
+    """
+    if schematic._memo_key is None:
+        parts = []
+        for part in schematic.parts:
+            inner = None
+            if isinstance(part, logic.parts.AggregatePart):
+                inner = schematic_key(part.schematic)
+            parts.append((part.part_type, part.name, inner))
+        nets = [sorted(str(term)[1:-1] for term in net.terminals)
+                for net in schematic.nets]
+        description = repr((sorted(parts), sorted(nets)))
+        schematic._memo_key = hashlib.sha1(description).hexdigest()
+    return schematic._memo_key
+
+
+def is_combinational(schematic):
+    """True if `schematic` can't hold any state, see above."""
+    netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+    kinds = netlist.part_kind.tolist()
+    if not set(kinds) <= set((KIND_PASSIVE, KIND_VDD, KIND_GND, KIND_NMOS,
+                              KIND_PMOS)):
+        return False
+
+    term_net = netlist.term_net.tolist()
+    rails = set(term_net[t] for p, kind in enumerate(kinds)
+                if kind in (KIND_VDD, KIND_GND)
+                for t in netlist.get_part_terminals(p).tolist())
+    transistors = [netlist.get_part_terminals(p).tolist()
+                   for p, kind in enumerate(kinds)
+                   if kind in (KIND_NMOS, KIND_PMOS)]
+
+    # Channel-connected components, failing on loops inside them
+    parent = range(netlist.n_nets)
+
+    def find(n):
+        while parent[n] != n:
+            parent[n] = n = parent[parent[n]]
+        return n
+
+    for g, s, d in transistors:
+        s, d = term_net[s], term_net[d]
+        if s < 0 or d < 0 or s in rails or d in rails:
+            continue
+        s, d = find(s), find(d)
+        if s == d:
+            return False
+        parent[s] = d
+
+    # Components each component drives the transistor gates of
+    drives = {}
+    for g, s, d in transistors:
+        g = term_net[g]
+        if g < 0 or g in rails:
+            continue
+        for n in (term_net[s], term_net[d]):
+            if n >= 0 and n not in rails:
+                drives.setdefault(find(g), set()).add(find(n))
+                break
+
+    # Depth first search for a cycle
+    VISITING, DONE = 1, 2
+    marks = {}
+    for start in drives:
+        if start in marks:
+            continue
+        marks[start] = VISITING
+        stack = [(start, iter(drives[start]))]
+        while stack:
+            component, successors = stack[-1]
+            for other in successors:
+                mark = marks.get(other)
+                if mark == VISITING:
+                    return False
+                if mark is None:
+                    marks[other] = VISITING
+                    stack.append((other, iter(drives.get(other, ()))))
+                    break
+            else:
+                marks[component] = DONE
+                stack.pop()
+    return True
+
+
+class TruthTableCache(object):
+    """Outputs of an aggregate part type, by input vector.
+
+    Input vectors are packed into an integer, with the input of terminal
+    pair `i` in bits `2*i` and `2*i + 1`. Once `max_entries` vectors are
+    stored, new ones are no longer added.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.table = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def lookup(self, key):
+        """Returns the outputs stored for `key`, or None."""
+        outputs = self.table.get(key)
+        if outputs is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return outputs
+
+    def store(self, key, outputs):
+        if len(self.table) < self.max_entries:
+            self.table[key] = outputs
+
+
+def get_cache(part):
+    """Returns the `TruthTableCache` for `part`'s inner schematic.
+
+    Returns None if that schematic isn't combinational. That is only checked
+    once for each part type and schematic, since every part of a library
+    type has a copy of the same schematic.
+    """
+    key = (part.part_type, schematic_key(part.schematic))
+    try:
+        return caches[key]
+    except KeyError:
+        cache = None
+        if is_combinational(part.schematic):
+            cache = TruthTableCache()
+        caches[key] = cache
+        return cache
+
+
+def stats():
+    """Returns `{part_type: (entries, hits, misses)}` for the cached types.
+
+    Tables of different schematics with the same part type are added up.
+    """
+    result = {}
+    for (part_type, key), cache in caches.iteritems():
+        if cache is not None:
+            entries, hits, misses = result.get(part_type, (0, 0, 0))
+            result[part_type] = (entries + len(cache), hits + cache.hits,
+                                 misses + cache.misses)
+    return result
+
+
+def clear():
+    """Forgets every table, for example after a part type was redefined."""
+    caches.clear()
@@ -1,4 +1,3 @@
-
 from __future__ import division
 from collections import OrderedDict
 import math
@@ -7,6 +6,8 @@ import numpy
 
 import logic
 import _geometry
+import states
+from states import FLOAT
 
 
 class Net(object):
@@ -16,7 +17,9 @@ class Net(object):
         self._scale = kwargs.pop("scale", None)
         if kwargs:
             raise ValueError("Unexpected keyword arguments: {}".format(kwargs))
-        self._output = "float"
+        self._output = FLOAT
+        self.parent_schematic = None
+        self._bbox = None
 
         self.nodes = []
         for i, item in enumerate(items):
@@ -41,6 +44,7 @@ class Net(object):
                 if isinstance(item, logic.Terminal):
                     item.connect(self)
 
+            node.net = self
             self.nodes.append(node)
 
         for term in self.terminals:
@@ -83,12 +87,7 @@ class Net(object):
 
     @property
     def color(self):
-        return {
-            "high": (0, 1, 0),
-            "low": (0, 0, 0),
-            "contention": (1, 0, 0),
-            "float": (0.7, 0.7, 0.7),
-        }[self._output]
+        return states.NET_COLORS[self._output]
 
     @property
     def scale(self):
@@ -99,6 +98,8 @@ class Net(object):
             return max(part_scales) if part_scales else 1
 
     def get_bbox(self):
+        if self._bbox is not None:
+            return self._bbox
         left = top = float('inf')
         right = bot = float('-inf')
         for node in self.nodes:
@@ -106,41 +107,46 @@ class Net(object):
             top = min(top, node.pos[1])
             right = max(right, node.pos[0])
             bot = max(bot, node.pos[1])
-        return (left, top, right-left, bot-top)
+        self._bbox = (left, top, right-left, bot-top)
+        return self._bbox
+
+    def _bbox_changed(self):
+        """Throws away the cached bounding box and tells the schematic.
+
+        Called when nodes change, and by parts connected to the net when
+        they move.
+        """
+        old_bbox, self._bbox = self._bbox, None
+        if self.parent_schematic is not None:
+            self.parent_schematic._item_bbox_changed(self, old_bbox)
 
     def update(self):
 
-        def combine(terms):
-            output = "float"
-            states = [term.output for term in terms]
-            for state in states:
-                if state in ("high", "low"):
-                    if output in ("high", "low") and state != output:
-                        return "contention"
-                    else:
-                        output = state
-                elif state == "contention":
-                    return "contention"
-            return output
+        # The input to each terminal is found by looking at every terminal but
+        # the one in question, so no feedback effects can happen where a
+        # terminal affects itself. States combine with a bitwise OR, so this
+        # only needs one pass over the drivers: `ones` has the bits set by at
+        # least one driver and `twos` those set by at least two, which makes
+        # the combination of everything but a driver in state `s` equal to
+        # `(ones & ~s) | twos`.
+        terms = set(self.terminals)
+        ones = twos = FLOAT
+        for term in terms:
+            twos |= ones & term.output
+            ones |= term.output
 
         was_updated = False
-        for term in self.terminals:
-            # Consider the input to each terminal by looking at every terminal
-            # but the one in question. This way no feedback effects can happen
-            # where a terminal affects itself.
-            others = set(self.terminals)
-            others.remove(term)
-
-            prev = term.input
-            term.input = combine(others)
-            if term.input != prev:
+        for term in terms:
+            value = (ones & ~term.output) | twos
+            if term.input != value:
+                term.input = value
                 was_updated = True
 
-        self._output = combine(self.terminals)
+        self._output = ones
         return was_updated
 
     def reset(self):
-        self._output = "float"
+        self._output = FLOAT
 
     def validate(self):
 
@@ -187,6 +193,8 @@ class Net(object):
             for r in to_remove[::-1]:
                 node.neighbors.pop(r)
 
+        self._geometry_changed()
+
     def connect(self, *items):
         node_items = [n.terminal for n in self.nodes]
 
@@ -198,6 +206,7 @@ class Net(object):
                 node_idx = node_items.index(item)
             else:
                 node = NetNode(item, ())
+                node.net = self
                 self.nodes.append(node)
                 node_idx = len(self.nodes) - 1
             if prev_node_idx is not None:
@@ -218,6 +227,13 @@ class Net(object):
             self.nodes[-1].append(0)
 
         self.validate()
+        self._geometry_changed()
+
+    def _geometry_changed(self):
+        """Called when nodes are added, removed or moved."""
+        if self.parent_schematic is not None:
+            self.parent_schematic._net_changed(self)
+        self._bbox_changed()
 
     @property
     def terminals(self):
@@ -276,6 +292,7 @@ class Net(object):
         n2 = self.nodes[n2_idx]
 
         new_n = NetNode(pos, (n1_idx, n2_idx))
+        new_n.net = self
         new_idx = len(self.nodes)
         self.nodes.append(new_n)
 
@@ -287,6 +304,8 @@ class Net(object):
             if n2.neighbors[i] == n1_idx:
                 n2.neighbors[i] = new_idx
 
+        self._geometry_changed()
+
     def simplify_nodes(self):
         pass  #TODO
         """
@@ -312,6 +331,24 @@ class Net(object):
     def get_dict(self):
         return {"nodes": [n.get_dict() for n in self.nodes]}
 
+    def copy(self, memo):
+        """Returns a copy of this net.
+
+        `memo` must map each terminal of this net to the terminal the copy
+        should connect to instead.
+        """
+        net = object.__new__(self.__class__)
+        net._scale = self._scale
+        net._output = self._output
+        net.parent_schematic = None
+        net._bbox = self._bbox
+        net.nodes = [node.copy(memo) for node in self.nodes]
+        for node in net.nodes:
+            node.net = net
+        for term in net.terminals:
+            term.net = net
+        return net
+
     @classmethod
     def combine(cls, net1, term1, net2, term2):
         assert term1 in net1.terminals
@@ -320,10 +357,12 @@ class Net(object):
 
         for node in net1.nodes:
             new_node = NetNode(node.pos_or_terminal, node.neighbors)
+            new_node.net = result
             result.nodes.append(new_node)
         for node in net2.nodes:
             new_neighbors = [n+len(net1.nodes) for n in node.neighbors]
             new_node = NetNode(node.pos_or_terminal, new_neighbors)
+            new_node.net = result
             result.nodes.append(new_node)
 
         for term in result.terminals:
@@ -343,18 +382,21 @@ class NetNode(object):
             self.terminal = None
 
         self.neighbors = list(neighbors)
+        self.net = None  # Set by the net this node is added to
 
     @property
     def pos(self):
         if self._pos is not None:
             return self._pos
         else:
-            return self.terminal.part.point_schematic_to_object(self.terminal.pos)
+            return self.terminal.absolute_pos
 
     @pos.setter
     def pos(self, value):
         assert None not in (self._pos, value)
         self._pos = value
+        if self.net is not None:
+            self.net._geometry_changed()
 
     @property
     def pos_or_terminal(self):
@@ -371,6 +413,12 @@ class NetNode(object):
     def external(self):
         return not self.internal
 
+    def copy(self, memo):
+        if self._pos is not None:
+            return NetNode(self._pos, self.neighbors)
+        else:
+            return NetNode(memo[self.terminal], self.neighbors)
+
     def get_dict(self):
         if self._pos is not None:
             location = self._pos
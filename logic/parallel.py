@@ -0,0 +1,298 @@
+import collections
+import multiprocessing
+
+import numpy
+
+import compiled
+from compiled import Netlist, Simulator
+from convergence import OscillationError
+
+# Partitioned simulation splits the parts of a netlist between worker
+# processes. Each worker runs a `Simulator` over the whole netlist that only
+# evaluates the parts it owns, and treats the outputs of every other part as
+# fixed inputs ("ghosts").
+#
+# Nets whose terminals all belong to one partition are private to its
+# worker. A boundary net has terminals in several partitions, and every
+# worker touching it resolves it on its own from the same terminal outputs.
+# The only thing that has to be exchanged is the output of each terminal on
+# a boundary net, which lives in a shared memory array.
+#
+# Settling happens in rounds, with the parent process as the barrier:
+#
+#   1. Each worker reads the ghost outputs it cares about from shared memory,
+#      and settles its partition.
+#   2. It writes the boundary outputs it owns back to shared memory, and
+#      reports whether any of them changed.
+#
+# When a round changes nothing, every worker has settled against the final
+# outputs of every other worker, and the whole netlist has settled.
+#
+# Workers are forked with a copy of the netlist, so this needs a platform
+# that forks processes.
+
+
+def partition_parts(netlist, n_partitions):
+    """Splits the parts of `netlist` into `n_partitions` lists of indexes.
+
+    Parts are ordered by a breadth first search through the nets connecting
+    them, so that connected parts tend to end up in the same partition, and
+    the order is then cut into pieces with about the same number of parts
+    that do any work. Power rails connect nearly everything, so the search
+    doesn't go through nets driven by a `VddPart` or `GndPart`.
+    """
+    part_kind = netlist.part_kind.tolist()
+    term_part = netlist.term_part.tolist()
+    term_net = netlist.term_net.tolist()
+
+    rails = set()
+    for p, kind in enumerate(part_kind):
+        if kind in (compiled.KIND_VDD, compiled.KIND_GND):
+            rails.update(term_net[t] for t in netlist.get_part_terminals(p))
+
+    order = []
+    visited = [False] * netlist.n_parts
+    for start in xrange(netlist.n_parts):
+        if visited[start]:
+            continue
+        visited[start] = True
+        queue = collections.deque([start])
+        while queue:
+            p = queue.popleft()
+            order.append(p)
+            for t in netlist.get_part_terminals(p):
+                n = term_net[t]
+                if n < 0 or n in rails:
+                    continue
+                for other in netlist.get_net_terminals(n):
+                    q = term_part[other]
+                    if q >= 0 and not visited[q]:
+                        visited[q] = True
+                        queue.append(q)
+
+    active = numpy.array([part_kind[p] >= compiled.KIND_NMOS for p in order])
+    n_active = max(active.sum(), 1)
+    cut = numpy.cumsum(active) * n_partitions // (n_active + 1)
+    partitions = [[] for i in xrange(n_partitions)]
+    for p, i in zip(order, cut.tolist()):
+        partitions[i].append(p)
+    return partitions
+
+
+def _worker(conn, netlist, parts, owned_boundary, ghosts, shared):
+    sim = Simulator(netlist, active_parts=parts)
+    boundary_outputs, outputs, inputs, net_values = shared
+    owned_terms = [t for p in parts for t in netlist.get_part_terminals(p)]
+    owned_nets = set(netlist.term_net[owned_terms].tolist())
+    owned_nets.discard(-1)
+
+    while True:
+        command, arg = conn.recv()
+
+        if command == "round":
+            for t in ghosts:
+                sim.set_output(t, boundary_outputs[t])
+            try:
+                sim.settle()
+            except OscillationError as e:
+                conn.send(("error", str(e)))
+                continue
+            changed = False
+            for t in owned_boundary:
+                if boundary_outputs[t] != sim.outputs[t]:
+                    boundary_outputs[t] = sim.outputs[t]
+                    changed = True
+            conn.send(("ok", changed))
+
+        elif command == "set_output":
+            for t, value in arg:
+                sim.set_output(t, value)
+
+        elif command == "reset":
+            sim.reset()
+
+        elif command == "gather":
+            for t in owned_terms:
+                outputs[t] = sim.outputs[t]
+                inputs[t] = sim.inputs[t]
+            for n in owned_nets:
+                net_values[n] = sim.net_values[n]
+            conn.send(("ok", None))
+
+        elif command == "close":
+            conn.close()
+            return
+
+
+class ParallelSimulator(object):
+    """Settles a `Netlist` with several worker processes.
+
+    Arguments:
+        netlist: The `Netlist` to simulate. Parts that are only simulated by
+            their `update()` method aren't supported, since they would change
+            objects in the worker processes.
+        n_workers: Number of worker processes, by default one per core.
+        partitions: Lists of part indexes owned by each worker, by default
+            from `partition_parts()`.
+
+    Call `close()` (or use it in a `with` statement) to stop the workers.
+    """
+
+    def __init__(self, netlist, n_workers=None, partitions=None):
+        if compiled.KIND_OBJECT in netlist.part_kind:
+            raise ValueError("Parallel simulation doesn't support parts that "
+                             "are only simulated by their update() method.")
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        if partitions is None:
+            partitions = partition_parts(netlist, n_workers)
+
+        self.netlist = netlist
+        self.partitions = [list(parts) for parts in partitions]
+
+        # Partition owning each part, and the partitions touching each net
+        self._part_owner = numpy.zeros(netlist.n_parts, dtype=numpy.int32)
+        for i, parts in enumerate(self.partitions):
+            self._part_owner[parts] = i
+        net_partitions = [set() for n in xrange(netlist.n_nets)]
+        for t in xrange(netlist.n_terminals):
+            n, p = netlist.term_net[t], netlist.term_part[t]
+            if n >= 0 and p >= 0:
+                net_partitions[n].add(self._part_owner[p])
+        self.boundary_nets = [n for n, owners in enumerate(net_partitions)
+                              if len(owners) > 1]
+
+        n_terms = netlist.n_terminals
+        boundary_outputs = multiprocessing.RawArray("b", n_terms)
+        boundary_outputs[:] = netlist.term_reset.tolist()
+        self._shared = (
+            boundary_outputs,
+            multiprocessing.RawArray("b", n_terms),
+            multiprocessing.RawArray("b", n_terms),
+            multiprocessing.RawArray("b", netlist.n_nets),
+        )
+
+        # Terminals on boundary nets, by the partition owning their part
+        boundary_terms = [[] for parts in self.partitions]
+        for n in self.boundary_nets:
+            for t in netlist.get_net_terminals(n):
+                boundary_terms[self._part_owner[netlist.term_part[t]]].append(t)
+
+        self._conns = []
+        self._processes = []
+        for i, parts in enumerate(self.partitions):
+            ghosts = [t for n in self.boundary_nets if i in net_partitions[n]
+                      for t in netlist.get_net_terminals(n)
+                      if self._part_owner[netlist.term_part[t]] != i]
+            conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker,
+                args=(child_conn, netlist, parts, boundary_terms[i], ghosts,
+                      self._shared))
+            process.daemon = True
+            process.start()
+            self._conns.append(conn)
+            self._processes.append(process)
+
+        self.outputs = self.inputs = self.net_values = None
+
+    @classmethod
+    def from_schematic(cls, schematic, n_workers=None):
+        """Compiles `schematic` into a flat netlist and simulates it."""
+        netlist = Netlist.from_schematic(schematic, flatten=True)
+        return cls(netlist, n_workers)
+
+    def reset(self):
+        """Puts every terminal and net in the state `Schematic.reset()` does."""
+        self._shared[0][:] = self.netlist.term_reset.tolist()
+        for conn in self._conns:
+            conn.send(("reset", None))
+
+    def set_output(self, t, value):
+        """Sets the output of terminal `t`, to be propagated by `settle()`.
+
+        `t` has to belong to a part.
+        """
+        p = self.netlist.term_part[t]
+        if p < 0:
+            raise ValueError("Terminal {} doesn't belong to a part, so no "
+                             "worker can set its output.".format(t))
+        owner = self._part_owner[p]
+        self._conns[owner].send(("set_output", [(t, value)]))
+
+    def settle(self, max_rounds=None):
+        """Runs rounds until no boundary output changes.
+
+        Returns the number of rounds, and afterwards the whole state is in
+        `outputs`, `inputs` and `net_values`. Raises `logic.OscillationError`
+        if a worker does, or after `max_rounds` rounds.
+        """
+        rounds = 0
+        while True:
+            rounds += 1
+            for conn in self._conns:
+                conn.send(("round", None))
+            if not any(self._receive_all()):
+                break
+            if max_rounds is not None and rounds >= max_rounds:
+                raise OscillationError(
+                    "Did not settle within {} rounds.".format(max_rounds))
+
+        for conn in self._conns:
+            conn.send(("gather", None))
+        self._receive_all()
+        boundary_outputs, outputs, inputs, net_values = self._shared
+        self.outputs = list(outputs)
+        self.inputs = list(inputs)
+        self.net_values = list(net_values)
+        return rounds
+
+    def _receive_all(self):
+        """Returns the reply of every worker to the last command.
+
+        Every reply is read before the first error is raised, so none are
+        left in the pipes to be taken for the reply to a later command.
+        """
+        values = []
+        error = None
+        for conn in self._conns:
+            status, value = conn.recv()
+            if status == "error" and error is None:
+                error = value
+            values.append(value)
+        if error is not None:
+            raise OscillationError(error)
+        return values
+
+    def write_back(self):
+        """Copies the state from the last settle out to the schematic objects.
+
+        Like `Simulator.write_back()`, this doesn't go through the
+        `Terminal.output` setter.
+        """
+        netlist = self.netlist
+        for t, term in enumerate(netlist.term_objects):
+            term._output = self.outputs[t]
+            term.input = self.inputs[t]
+        for n, objects in enumerate(netlist.net_objects):
+            for net in objects:
+                net._output = self.net_values[n]
+        for n in netlist.net_ports:
+            for t, output, input in netlist.get_port_states(n, self.outputs):
+                term = netlist.term_objects[t]
+                term._output = output
+                term.input = input
+
+    def close(self):
+        for conn in self._conns:
+            conn.send(("close", None))
+        for process in self._processes:
+            process.join()
+        self._conns = []
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
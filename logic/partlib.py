@@ -10,9 +10,10 @@ import logic
 class PartLibrary(OrderedDict):
 
     # See: https://wiki.python.org/moin/SubclassingDictionaries
-    __slots__ = []  # No attributes
+    __slots__ = ["_pending_folders"]  # Folders loaded on first lookup
 
     def __init__(self, classes):
+        self._pending_folders = []
         mapping = []
         for cls in classes:
             assert cls.part_type is not None
@@ -27,8 +28,17 @@ class PartLibrary(OrderedDict):
         if part_type in self:
             raise ValueError('Duplicate part name: "{}"'.format(part_type))
 
+        # Parsed on first use, since it may be made of parts that aren't
+        # loaded yet. Every instance gets a copy of this prototype, which is
+        # never modified itself.
+        prototype = []
+
         def create_part(**kwargs):
-            schematic = logic.Schematic.from_dict(d)
+            if not prototype:
+                prototype.append(logic.Schematic.from_dict(d))
+                # Hashed once here, instead of for every copy
+                logic.memo.schematic_key(prototype[0])
+            schematic = prototype[0].copy()
             return logic.parts.AggregatePart(schematic, part_type, **kwargs)
 
         self[part_type] = create_part
@@ -52,8 +62,44 @@ class PartLibrary(OrderedDict):
             print 'Error reading part file "{}": Incorrect data.'.format(filename)
             raise
 
-    def load_folder(self, path):
+    def load_folder(self, path, lazy=False):
+        """Loads every ".schem" file in `path`.
+
+        If `lazy` is True, the folder isn't read until a part type is first
+        looked up, or the library is iterated over.
+        """
+        if lazy:
+            self._pending_folders.append(path)
+            return
         for f in os.listdir(path):
             f = os.path.join(path, f)
             if os.path.isfile(f) and f.endswith(".schem"):
                 self.load_file(f)
+
+    def _load_pending(self):
+        while self._pending_folders:
+            self.load_folder(self._pending_folders.pop(0))
+
+    # Lookups load pending folders first. Everything else OrderedDict offers
+    # for reading goes through these. Note that `dict(library)` doesn't, use
+    # `dict(library.items())` instead.
+
+    def __getitem__(self, part_type):
+        self._load_pending()
+        return super(PartLibrary, self).__getitem__(part_type)
+
+    def __contains__(self, part_type):
+        self._load_pending()
+        return super(PartLibrary, self).__contains__(part_type)
+
+    def __iter__(self):
+        self._load_pending()
+        return super(PartLibrary, self).__iter__()
+
+    def __len__(self):
+        self._load_pending()
+        return super(PartLibrary, self).__len__()
+
+    def get(self, part_type, default=None):
+        self._load_pending()
+        return super(PartLibrary, self).get(part_type, default)
@@ -3,13 +3,13 @@
 from __future__ import division
 from collections import OrderedDict
 import math
-import os
 
 import numpy
-import cairo
 
 import logic
 import _geometry
+import states
+from states import FLOAT, HIGH, LOW
 
 
 class Part(object):
@@ -17,14 +17,26 @@ class Part(object):
     saved_fields = ("part_type", "name", "pos", "scale", "rot", "line_width")
     part_type = None  # Must be overwriten by subclasses
 
+    # Containers `copy()` doesn't deep-copy, because they are replaced in the
+    # copy
+    _shared_fields = ("terminals",)
+
+    # Incremented whenever `pos`, `scale` or `rot` changes, so things that
+    # cache positions in schematic space, like `Terminal.absolute_pos`, can
+    # tell whether they are out of date.
+    version = 0
+
     def __init__(self, pos=(0, 0), scale=1, rot=0, name=None, line_width=0.1):
-        self.pos = numpy.array(pos)
+        self._transform = None
+        self._inverse_transform = None
+        self._bbox = None
+        self.parent_schematic = None
+        self.terminals = {}
+        self.pos = pos
         self.scale = scale
         self.rot = rot
         self.name = name
         self.line_width = line_width
-        self.terminals = {}
-        self.parent_schematic = None
 
         assert self.part_type is not None
 
@@ -34,11 +46,24 @@ class Part(object):
         # Give unique name if none was given
         if self.name is None:
             self.name = self.parent_schematic.make_unique_part_name(self)
+        else:
+            schematic._part_renamed(self, None)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        old_name = getattr(self, "_name", None)
+        self._name = name
+        if self.parent_schematic is not None:
+            self.parent_schematic._part_renamed(self, old_name)
 
     def __getitem__(self, name):
         return self.terminals[name]
 
-    def add_terminal(self, name, pos, net=None, output="float"):
+    def add_terminal(self, name, pos, net=None, output=FLOAT):
 
         # Make unique name
         #TODO: No idea if this actually works
@@ -52,26 +77,135 @@ class Part(object):
 
         t = logic.Terminal(self, name, pos, output=output)
         self.terminals[name] = t
+        if self.parent_schematic is not None:
+            self.parent_schematic._part_moved(self)
         return t
 
+    def copy(self, memo=None):
+        """Returns a copy of this part that isn't in any schematic.
+
+        `memo` is a dict that maps already copied objects to their copies. The
+        terminals of this part are added to it.
+        """
+        if memo is None:
+            memo = {}
+        part = object.__new__(self.__class__)
+        part.__dict__.update(self.__dict__)
+        for key, value in self.__dict__.iteritems():
+            if type(value) in _CONTAINER_TYPES and \
+                    key not in self._shared_fields:
+                part.__dict__[key] = _copy_containers(value)
+        part.parent_schematic = None
+        part.terminals = {}
+        for name, term in self.terminals.iteritems():
+            part.terminals[name] = memo[term] = term.copy(part)
+        return part
+
     def get_output_dict(self):
         return {name: term.output for name, term in self.terminals.iteritems()}
 
+    # `pos`, `scale` and `rot` are properties so the cached transform
+    # matrices can be thrown away when they change. `pos` is stored as a
+    # read-only array, so it can't be changed in place behind our back.
+
+    def _transform_changed(self):
+        self._transform = self._inverse_transform = None
+        self.version += 1
+        self._bbox_changed()
+
+    def _bbox_changed(self):
+        """Throws away the cached bounding box of this part and of the nets
+        connected to it, and tells the schematic.
+
+        Called when the part moves. Subclasses have to call it when anything
+        else `_get_bbox()` depends on changes.
+        """
+        old_bbox, self._bbox = self._bbox, None
+        for term in self.terminals.itervalues():
+            if term.net is not None:
+                term.net._bbox_changed()
+        if self.parent_schematic is not None:
+            self.parent_schematic._part_moved(self)
+            self.parent_schematic._item_bbox_changed(self, old_bbox)
+
+    @property
+    def pos(self):
+        return self._pos
+
+    @pos.setter
+    def pos(self, pos):
+        pos = numpy.array(pos)
+        pos.flags.writeable = False
+        self._pos = pos
+        self._transform_changed()
+
+    @property
+    def scale(self):
+        return self._scale
+
+    @scale.setter
+    def scale(self, scale):
+        self._scale = scale
+        self._transform_changed()
+
+    @property
+    def rot(self):
+        return self._rot
+
+    @rot.setter
+    def rot(self, rot):
+        self._rot = rot
+        self._transform_changed()
+
     def transform(self, context):
         context.translate(*self.pos)
         context.scale(self.scale, self.scale)
         context.rotate(math.radians(self.rot))
 
+    def get_transform(self):
+        """Returns the 3x3 affine matrix from object to schematic space.
+
+        It does the same as `transform()`: translate, scale, then rotate.
+        """
+        if self._transform is None:
+            angle = math.radians(self.rot)
+            cos = math.cos(angle) * self.scale
+            sin = math.sin(angle) * self.scale
+            self._transform = numpy.array((
+                (cos, -sin, self.pos[0]),
+                (sin,  cos, self.pos[1]),
+                (0,    0,   1),
+            ), dtype=float)
+        return self._transform
+
+    def get_inverse_transform(self):
+        """Returns the 3x3 affine matrix from schematic to object space."""
+        if self._inverse_transform is None:
+            self._inverse_transform = numpy.linalg.inv(self.get_transform())
+        return self._inverse_transform
+
+    def transform_points(self, points, inverse=False):
+        """Transforms an Nx2 array of points at once.
+
+        Points go from object to schematic space, or the other way around
+        if `inverse` is true. Returns an Nx2 array.
+        """
+        if inverse:
+            matrix = self.get_inverse_transform()
+        else:
+            matrix = self.get_transform()
+        points = numpy.asarray(points, dtype=float)
+        return points.dot(matrix[:2, :2].T) + matrix[:2, 2]
+
     def point_schematic_to_object(self, point, _reverse=False):
         """Converts `point` from schematic to object space."""
-        dummy_surface = cairo.SVGSurface(os.devnull, 0, 0)
-        ctx = cairo.Context(dummy_surface)
-        ctx.identity_matrix()
-        self.transform(ctx)
         if _reverse:
-            return ctx.device_to_user(*point)
+            matrix = self.get_inverse_transform()
         else:
-            return ctx.user_to_device(*point)
+            matrix = self.get_transform()
+        x, y = point
+        return (matrix[0, 0]*x + matrix[0, 1]*y + matrix[0, 2],
+                matrix[1, 0]*x + matrix[1, 1]*y + matrix[1, 2])
 
     def point_object_to_schematic(self, point):
         """Converts `point` from object to schematic space."""
@@ -80,23 +214,18 @@ class Part(object):
     def rect_object_to_schematic(self, rect):
         """Converts `rect` from object to schematic space."""
 
-        # Get 4 points of the rectangle
-        point1 = (rect[0],         rect[1]        )
-        point2 = (rect[0]+rect[2], rect[1]        )
-        point3 = (rect[0]+rect[2], rect[1]+rect[3])
-        point4 = (rect[0],         rect[1]+rect[3])
-        points = (point1, point2, point3, point4)
-
-        # Transform points to schematic space, then get their bounding box
-        points = map(self.point_schematic_to_object, points)
-        xs = map(lambda p: p[0], points)
-        ys = map(lambda p: p[1], points)
-        return (
-            min(xs),
-            min(ys),
-            max(xs) - min(xs),
-            max(ys) - min(ys),
-        )
+        # Transform the 4 corners of the rectangle to schematic space, then
+        # get their bounding box
+        x, y, width, height = rect
+        points = self.transform_points((
+            (x,         y         ),
+            (x + width, y         ),
+            (x + width, y + height),
+            (x,         y + height),
+        ))
+        left, top = points.min(axis=0)
+        right, bottom = points.max(axis=0)
+        return (left, top, right - left, bottom - top)
 
     def set_draw_settings(self, ctx, **kwargs):
         self.set_color(ctx, **kwargs)
@@ -118,7 +247,9 @@ class Part(object):
             Where (x, y) is the top left of the rectangle.
 
         """
-        return self.rect_object_to_schematic(self._get_bbox())
+        if self._bbox is None:
+            self._bbox = self.rect_object_to_schematic(self._get_bbox())
+        return self._bbox
 
     def _get_bbox(self):
         """Like `get_bbox()`, but returns the bbox in object space."""
@@ -328,16 +459,16 @@ class NmosTransistorPart(Part):
 
     def update(self):
         g, s, d = self["gate"], self["source"], self["drain"]
-        g.output = "float"
-        active = (self.nmos and g.input == "high") or \
-                 (self.pmos and g.input == "low")
+        g.output = FLOAT
+        active = (self.nmos and g.input == HIGH) or \
+                 (self.pmos and g.input == LOW)
 
         if active:
             s.output = d.input
             d.output = s.input
         else:
-            s.output = "float"
-            d.output = "float"
+            s.output = FLOAT
+            d.output = FLOAT
 
     def draw(self, ctx, **kwargs):
         super(NmosTransistorPart, self).draw(ctx, **kwargs)
@@ -409,7 +540,7 @@ class VddPart(Part):
 
     def reset(self):
         super(VddPart, self).reset()
-        self['vdd'].output = "high"
+        self['vdd'].output = HIGH
 
     def draw(self, ctx, **kwargs):
         super(VddPart, self).draw(ctx, **kwargs)
@@ -443,7 +574,7 @@ class GndPart(Part):
 
     def reset(self):
         super(GndPart, self).reset()
-        self['gnd'].output = "low"
+        self['gnd'].output = LOW
 
     def draw(self, ctx, **kwargs):
         super(GndPart, self).draw(ctx, **kwargs)
@@ -489,12 +620,7 @@ class ProbePart(Part):
         ctx.stroke()
 
         # Fill
-        ctx.set_source_rgb(*{
-            "high": (0, 1, 0),
-            "low": (0, 0, 0),
-            "contention": (1, 0, 0),
-            "float": (1, 1, 1),
-        }[self["term"].input])
+        ctx.set_source_rgb(*states.FILL_COLORS[self["term"].input])
         ctx.arc(0, 0, self.r-0.05, 0, 2*math.pi)
         ctx.fill()
 
@@ -517,7 +643,8 @@ class SwitchPart(Part):
     saved_fields = ("outputs",)
 
     def __init__(self, *args, **kwargs):
-        self.outputs = kwargs.pop('outputs', ("float", "high", "low", "contention"))
+        outputs = kwargs.pop('outputs', states.NAMES)
+        self.outputs = tuple(states.from_name(name) for name in outputs)
         super(SwitchPart, self).__init__(*args, **kwargs)
         self.width = 0.5
         self.height = 1
@@ -527,18 +654,18 @@ class SwitchPart(Part):
         idx = self.outputs.index(self["term"].output)
         self["term"].output = self.outputs[(idx+1)%len(self.outputs)]
 
+    def get_dict(self):
+        d = super(SwitchPart, self).get_dict()
+        d["outputs"] = map(states.to_name, self.outputs)
+        return d
+
     def draw(self, ctx, **kwargs):
         ctx.save()
         self.transform(ctx)
         ctx.set_line_width(0.1/self.scale)
 
         # Fill
-        ctx.set_source_rgb(*{
-            "high": (0, 1, 0),
-            "low": (0, 0, 0),
-            "contention": (1, 0, 0),
-            "float": (1, 1, 1),
-        }[self["term"].output])
+        ctx.set_source_rgb(*states.FILL_COLORS[self["term"].output])
         ctx.rectangle(-self.width/2, -self.height/2, self.width, self.height)
         ctx.fill()
 
@@ -556,7 +683,7 @@ class SwitchPart(Part):
 
     def reset(self):
         t = self['term']
-        t.input = "float"
+        t.input = FLOAT
         t.output = self.outputs[0]
 
 
@@ -592,23 +719,46 @@ class IOPart(Part):
 
 
 class AggregatePart(Part):
+    _shared_fields = Part._shared_fields + ("terminal_pairs",)
+
+    # Look outputs up in a table per part type when the inner schematic is
+    # combinational. Off by default, since it hides transients, see
+    # `logic.memo`.
+    memoize = False
 
     def __init__(self, schematic, part_type, *args, **kwargs):
         self.schematic = schematic
         self.schematic.reset()
+        self.schematic.parent_part = self
         self.part_type = part_type
 
         super(AggregatePart, self).__init__(*args, **kwargs)
 
         # Pairs terminals, connecting the terminals from the aggregate part to
-        # the IO part terminals of the underlying schematic.
+        # the IO part terminals of the underlying schematic. They are sorted
+        # by name so every part of a type has them in the same order.
         self.terminal_pairs = []
-        for part in schematic.parts:
-            if isinstance(part, IOPart):
-                t = self.add_terminal(part.name, part.pos)
-                self.terminal_pairs.append((t, part['term']))
+        io_parts = [part for part in schematic.parts if isinstance(part, IOPart)]
+        for part in sorted(io_parts, key=lambda part: part.name):
+            t = self.add_terminal(part.name, part.pos)
+            self.terminal_pairs.append((t, part['term']))
+
+        # True when the outputs came from `logic.memo` without updating the
+        # inner schematic
+        self._schematic_stale = False
+
+    def copy(self, memo=None):
+        if memo is None:
+            memo = {}
+        part = super(AggregatePart, self).copy(memo)
+        part.schematic = self.schematic.copy(memo)
+        part.schematic.parent_part = part
+        part.terminal_pairs = [(memo[external], memo[internal])
+                               for external, internal in self.terminal_pairs]
+        return part
 
     def draw(self, ctx, **kwargs):
+        self.sync_schematic()
         super(AggregatePart, self).draw(ctx, **kwargs)
         del kwargs['draw_terminals']
         if 'draw_io_parts' in kwargs: del kwargs['draw_io_parts']
@@ -621,20 +771,71 @@ class AggregatePart(Part):
         self.schematic.draw(ctx, draw_io_parts=False, **kwargs)
 
     def update(self):
+        cache = logic.memo.get_cache(self) if self.memoize else None
+        if cache is not None:
+            key = 0
+            for i, (external, internal) in enumerate(self.terminal_pairs):
+                key |= external.input << 2*i
+            outputs = cache.lookup(key)
+            if outputs is not None:
+                for (external, internal), output in zip(self.terminal_pairs,
+                                                        outputs):
+                    external.output = output
+                self._schematic_stale = True
+                return
+
+        self._update_schematic()
 
+        # Copy IO Component inputs to external outputs
+        for external, internal in self.terminal_pairs:
+            external.output = internal.input
+        if cache is not None:
+            cache.store(key, tuple(internal.input
+                                   for external, internal in self.terminal_pairs))
+
+    def _update_schematic(self):
         # Copy external inputs to IO Component outputs
         for external, internal in self.terminal_pairs:
             internal.output = external.input
-
         self.schematic.update()
+        self._schematic_stale = False
 
-        # Copy IO Component inputs to external outputs
-        for external, internal in self.terminal_pairs:
-            external.output = internal.input
+    def sync_schematic(self):
+        """Brings the inner schematic up to date with the terminal inputs.
+
+        Only needed to look inside the part, since memoized updates don't
+        touch the inner schematic. Aggregate parts inside it are brought up
+        to date too.
+        """
+        if self._schematic_stale:
+            self._update_schematic()
+        for part in self.schematic.parts:
+            if isinstance(part, AggregatePart):
+                part.sync_schematic()
 
     def _get_bbox(self):
         return self.schematic.get_bbox()
 
     def reset(self):
         self.schematic.reset()
+        self._schematic_stale = False
         super(AggregatePart, self).reset()
+
+
+# Checking the exact type is a lot faster than `isinstance()`, which matters
+# when instantiating library parts
+_CONTAINER_TYPES = frozenset((list, dict, set))
+
+
+def _copy_containers(value):
+    """Copies the lists, dicts and sets in `value`, so a copied part doesn't
+    share them with the original. Anything else is assumed not to be changed
+    in place."""
+    if isinstance(value, list):
+        return [_copy_containers(item) for item in value]
+    elif isinstance(value, dict):
+        return dict((key, _copy_containers(item))
+                    for key, item in value.iteritems())
+    elif isinstance(value, set):
+        return set(value)
+    return value
@@ -0,0 +1,150 @@
+import timeit
+
+import logic
+
+# Opt-in instrumentation of `Schematic.update()`. While a `Profiler` is
+# active, every net and part evaluated by the update loop is counted and
+# timed, including the ones inside aggregate parts' schematics. When no
+# profiler is active, `Schematic.update()` only checks `active` once per
+# call.
+#
+# Compiled updates (`Schematic.update(compiled=True)`) aren't instrumented.
+
+# The `Profiler` currently recording, if any
+active = None
+
+
+class Stats(object):
+    """Counters for one part, net or part type.
+
+    Attributes:
+        name: How the report shows it. Parts and nets inside aggregate parts
+            are prefixed with the names of those parts, like "Xor-0/Not-1".
+        evaluations: Number of times it was updated.
+        flips: For nets, the number of times their value changed. For parts,
+            the number of times any of their terminal outputs changed.
+        time: Wall time spent in its updates, in seconds. The time of an
+            aggregate part includes everything inside it.
+
+    """
+
+    __slots__ = ("name", "evaluations", "flips", "time")
+
+    def __init__(self, name):
+        self.name = name
+        self.evaluations = 0
+        self.flips = 0
+        self.time = 0.0
+
+    def __str__(self):
+        return "<Stats {} {}x {} flips {:.6f}s>".format(
+            self.name, self.evaluations, self.flips, self.time)
+
+    __repr__ = __str__
+
+
+class Profiler(object):
+    """Records what `Schematic.update()` evaluates while it is active.
+
+    Use it in a `with` statement:
+
+        with logic.profiling.Profiler() as profiler:
+            schematic.update()
+        print profiler.report()
+
+    """
+
+    timer = staticmethod(timeit.default_timer)
+
+    def __init__(self):
+        self.parts = {}
+        self.nets = {}
+        self.part_types = {}
+        self.updates = 0  # Calls to `Schematic.update()`, nested ones too
+        self._prefix = ""
+        self._previous = None
+
+    def __enter__(self):
+        global active
+        self._previous = active
+        active = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global active
+        active = self._previous
+        self._previous = None
+
+    def update_part(self, part, dirty):
+        """Updates `part` and records it.
+
+        `dirty` is the set of terminals of the part's schematic with changed
+        outputs, which has to be empty before the update.
+        """
+        prefix = self._prefix
+        if isinstance(part, logic.parts.AggregatePart):
+            self._prefix = "{}{}/".format(prefix, part.name)
+        start = self.timer()
+        try:
+            part.update()
+        finally:
+            elapsed = self.timer() - start
+            self._prefix = prefix
+
+        stats = self.parts.get(part)
+        if stats is None:
+            stats = self.parts[part] = Stats(prefix + str(part.name))
+        type_stats = self.part_types.get(part.part_type)
+        if type_stats is None:
+            type_stats = self.part_types[part.part_type] = \
+                Stats(part.part_type)
+        flipped = 1 if dirty else 0
+        for s in (stats, type_stats):
+            s.evaluations += 1
+            s.flips += flipped
+            s.time += elapsed
+
+    def update_net(self, net):
+        """Updates `net`, records it, and returns what `Net.update()` did."""
+        old_value = net._output
+        start = self.timer()
+        was_updated = net.update()
+        elapsed = self.timer() - start
+
+        stats = self.nets.get(net)
+        if stats is None:
+            stats = self.nets[net] = Stats(self._prefix + ",".join(
+                sorted(str(t)[1:-1] for t in net.terminals)))
+        stats.evaluations += 1
+        stats.time += elapsed
+        if net._output != old_value:
+            stats.flips += 1
+        return was_updated
+
+    def hot_spots(self, category="parts", by="time", limit=None):
+        """Returns the `Stats` of a category, highest first.
+
+        Arguments:
+            category: "parts", "nets" or "part_types".
+            by: "time", "evaluations" or "flips".
+            limit: Maximum number of entries returned.
+
+        """
+        stats = getattr(self, category).values()
+        stats.sort(key=lambda s: (getattr(s, by), s.name), reverse=True)
+        return stats[:limit]
+
+    def report(self, by="time", limit=10):
+        """Returns a text table of the top `limit` entries of each category,
+        sorted by `by`."""
+        lines = ["{} schematic updates".format(self.updates)]
+        for category in ("part_types", "parts", "nets"):
+            lines.append("")
+            lines.append("{:<40} {:>10} {:>10} {:>12}".format(
+                category.replace("_", " ").capitalize(), "evals", "flips",
+                "time (ms)"))
+            for s in self.hot_spots(category, by, limit):
+                name = s.name if len(s.name) <= 40 else s.name[:37] + "..."
+                lines.append("{:<40} {:>10} {:>10} {:>12.3f}".format(
+                    name, s.evaluations, s.flips, s.time * 1000))
+        return "\n".join(lines)
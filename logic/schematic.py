@@ -1,4 +1,3 @@
-
 from __future__ import division
 import collections
 from copy import deepcopy
@@ -15,6 +14,14 @@ import logic
 # group 2: terminal name
 term_re = re.compile(r"^([^[]+)(\[([^\]]+)\])?$")
 
+# Schematics with at least this many parts and nets use their spatial index
+# to find what to draw, instead of checking every bounding box
+DRAW_INDEX_MIN = 256
+
+# How far outside its bounding box an item can draw, like the terminals of a
+# selected part
+DRAW_MARGIN = 0.5
+
 
 class Schematic(object):
     """A collection of parts connected by nets."""
@@ -23,12 +30,51 @@ class Schematic(object):
         self.parts = set(parts)
         self.nets = set(nets)
         self.name = name
+        self._simulator = None
+
+        # Terminals whose output changed since the schematic last settled.
+        # `update()` only propagates from these, unless the structure or the
+        # whole state of the schematic changed, in which case everything has
+        # to be re-evaluated.
+        self._dirty_terminals = set()
+        self._needs_full_update = True
+
+        # Objects covered by `get_state()`, and whether the simulator has to
+        # load the state again after `set_state()`
+        self._state_layout = None
+        self._simulator_stale = False
+
+        # `spatial.SpatialIndex` for hit-testing, built on the first query
+        self._spatial_index = None
+
+        # Edges (left, top, right, bottom) of the bounding box of everything,
+        # and the number of parts and nets it was computed from. Kept up to
+        # date as items change, see `_item_bbox_changed()`.
+        self._bbox = None
+        self._bbox_n_items = 0
+
+        # The `AggregatePart` this is the inner schematic of, if any
+        self.parent_part = None
+
+        # Hash of the structure, see `memo.schematic_key()`
+        self._memo_key = None
+
+        # Part name: part, and part type: the number `make_unique_part_name()`
+        # tries first
+        self._parts_by_name = {}
+        self._name_counters = {}
+
+        for part in self.parts:
+            part._register_schematic(self)
+        for net in self.nets:
+            net.parent_schematic = self
 
     def draw(self, context, selected=(), **kwargs):
         default_draw_connections = kwargs.get('draw_terminals', False)
         draw_io_parts = kwargs.get('draw_io_parts', True)
+        parts, nets = self._get_visible_items(context)
 
-        for part in self.parts:
+        for part in parts:
             if not draw_io_parts and isinstance(part, logic.parts.IOPart):
                 continue
 
@@ -48,19 +94,66 @@ class Schematic(object):
             context.stroke()
             """
 
-        for net in self.nets:
+        for net in nets:
             context.save()
             net.draw(context, selected=net in selected, **kwargs)
             context.restore()
 
+    def _get_visible_items(self, context):
+        """Returns `(parts, nets)` that can draw inside the clip region of
+        `context`."""
+        left, top, right, bottom = context.clip_extents()
+        left -= DRAW_MARGIN
+        top -= DRAW_MARGIN
+        right += DRAW_MARGIN
+        bottom += DRAW_MARGIN
+
+        bounded = all(abs(edge) < float('inf')
+                      for edge in (left, top, right, bottom))
+        if bounded and len(self.parts) + len(self.nets) >= DRAW_INDEX_MIN:
+            items = self._get_spatial_index().items_in_rect(
+                left, top, right, bottom)
+            parts = [item for item in items if isinstance(item, logic.Part)]
+            nets = [item for item in items if isinstance(item, logic.Net)]
+        else:
+            parts, nets = self.parts, self.nets
+
+        def visible(item):
+            x, y, width, height = item.get_bbox()
+            return not (x > right or y > bottom or x + width < left or
+                        y + height < top)
+        return filter(visible, parts), filter(visible, nets)
+
     def add_part(self, part):
         assert isinstance(part, logic.Part)
         part.reset()
         self.parts.add(part)
         part._register_schematic(self)
+        if self._spatial_index is not None:
+            self._spatial_index.add_part(part)
+        self._item_bbox_changed(part, None)
+        self._structure_changed()
 
     def add_parts(self, *parts):
-        self.parts.update(parts)
+        for part in parts:
+            self.add_part(part)
+
+    def add_net(self, net):
+        """Adds `net`, whose terminals must already be in this schematic."""
+        assert isinstance(net, logic.Net)
+        self.nets.add(net)
+        net.parent_schematic = self
+        if self._spatial_index is not None:
+            self._spatial_index.add_net(net)
+        self._item_bbox_changed(net, None)
+        self._structure_changed()
+
+    def _remove_net(self, net):
+        self.nets.remove(net)
+        net.parent_schematic = None
+        if self._spatial_index is not None:
+            self._spatial_index.remove_net(net)
+        self._item_bbox_changed(net, net._bbox)
 
     def remove(self, part):
 
@@ -81,21 +174,30 @@ class Schematic(object):
                     self.remove(net)
 
             self.parts.remove(part)
+            self._forget_part_name(part, part.name)
+            part.parent_schematic = None
+            self._dirty_terminals.difference_update(
+                part.terminals.itervalues())
+            if self._spatial_index is not None:
+                self._spatial_index.remove_part(part)
+            self._item_bbox_changed(part, part._bbox)
 
         elif isinstance(part, logic.Net):
             assert part in self.nets
             for term in part.terminals:
                 term.net = None
-                term.input = "float"
+                term.input = logic.FLOAT
 
-            self.nets.remove(part)
+            self._remove_net(part)
 
+        self._structure_changed()
         self.update()
 
     def connect(self, *terms):
         net = None
         for i in range(1, len(terms)):
             net = self._connect2(terms[i], terms[i-1], net)
+        self._structure_changed()
 
     def _connect2(self, term1, term2, net=None):
 
@@ -119,7 +221,7 @@ class Schematic(object):
         if n_disconnected == 2:
             if net is None:
                 net = logic.Net(term1, term2)
-                self.nets.add(net)
+                self.add_net(net)
             else:
                  net.connect(term1, term2)
             return net
@@ -129,10 +231,10 @@ class Schematic(object):
             net1.connect(term1, term2)
             return net1
         elif n_disconnected == 0:
-            self.nets.remove(net1)
-            self.nets.remove(net2)
+            self._remove_net(net1)
+            self._remove_net(net2)
             new_net = logic.Net.combine(net1, term1, net2, term2)
-            self.nets.add(new_net)
+            self.add_net(new_net)
             return new_net
 
     def validate(self):
@@ -157,72 +259,318 @@ class Schematic(object):
             part.reset()
         for net in self.nets:
             net.reset()
+        self._needs_full_update = True
+
+    def mark_dirty(self, terminal):
+        """Records that the output of `terminal` changed.
+
+        Called by `Terminal` whenever its output is set to a new value.
+        Terminals of parts that are not in this schematic are ignored.
+        """
+        if terminal.part in self.parts:
+            self._dirty_terminals.add(terminal)
+
+    def _structure_changed(self):
+        self._simulator = None
+        self._needs_full_update = True
+        self._state_layout = None
+        self._memo_key = None
+
+    def _part_moved(self, part):
+        """Called by `part` when it moved or its terminals changed."""
+        if self._spatial_index is not None:
+            self._spatial_index.update_part(part)
+
+    def _item_bbox_changed(self, item, old_bbox):
+        """Called when the bounding box of a part or net changed.
+
+        `old_bbox` is the bounding box it had before, or None if it was just
+        added. Items that are removed are no longer in `parts` or `nets`.
+        """
+        edges = self._bbox
+        if edges is None:
+            return
+
+        left, top, right, bot = edges
+        if not (left <= right and top <= bot):
+            # Empty, or made from items without a proper bounding box
+            self._bbox = None
+        elif old_bbox is not None and not _bbox_inside(old_bbox, edges):
+            # It might have been what the bounding box was extending to
+            self._bbox = None
+        elif item in self.parts or item in self.nets:
+            self._bbox = _add_to_edges(edges, item.get_bbox())
+            self._bbox_n_items = len(self.parts) + len(self.nets)
+        else:
+            self._bbox_n_items = len(self.parts) + len(self.nets)
+
+        if self._bbox != edges and self.parent_part is not None:
+            self.parent_part._bbox_changed()
+
+    def _net_changed(self, net):
+        """Called by `net` when its nodes changed."""
+        if self._spatial_index is not None:
+            self._spatial_index.update_net(net)
+
+    def _get_spatial_index(self):
+        """Returns the `spatial.SpatialIndex` of this schematic.
+
+        It is built on first use and kept up to date from then on. Parts and
+        nets added to `parts` and `nets` directly, instead of through
+        `add_part()` and `add_net()`, are only picked up if the number of
+        items changes.
+        """
+        index = self._spatial_index
+        if index is None or len(index) != len(self.parts) + len(self.nets):
+            index = self._spatial_index = \
+                logic.spatial.SpatialIndex.from_schematic(self)
+        return index
+
+    def _get_state_layout(self):
+        """Returns `[(schematic, terminals, nets, aggregates)]` for this
+        schematic and, recursively, the ones inside its aggregate parts."""
+        if self._state_layout is None:
+            layout = []
+            terms = [t for part in self.parts
+                     for t in part.terminals.itervalues()]
+            aggregates = [part for part in self.parts
+                          if isinstance(part, logic.parts.AggregatePart)]
+            layout.append((self, terms, list(self.nets), aggregates))
+            for part in aggregates:
+                layout.extend(part.schematic._get_state_layout())
+            self._state_layout = layout
+        return self._state_layout
+
+    def get_state(self):
+        """Returns the simulation state as one int8 array.
+
+        The array holds the output and input of every terminal, including
+        which terminals have changes waiting for `update()`, the value of
+        every net and what memoized aggregate parts have left to do, all the
+        way down through aggregate parts. Switch settings are the outputs of
+        their terminals. It can be given back to `set_state()` as long as
+        the structure of the schematic doesn't change.
+        """
+        values = []
+        for schematic, terms, nets, aggregates in self._get_state_layout():
+            dirty = schematic._dirty_terminals
+            values.append(schematic._needs_full_update)
+            values.extend(t._output | t.input << 2 | (t in dirty) << 4
+                          for t in terms)
+            values.extend(net._output for net in nets)
+            values.extend(part._schematic_stale for part in aggregates)
+        return numpy.array(values, dtype=numpy.int8)
+
+    def set_state(self, state):
+        """Restores a state returned by `get_state()`.
+
+        Nothing is re-simulated: restoring a settled state leaves the
+        schematic settled.
+        """
+        layout = self._get_state_layout()
+        values = numpy.asarray(state).tolist()
+        if len(values) != sum(1 + len(terms) + len(nets) + len(aggregates)
+                              for schematic, terms, nets, aggregates
+                              in layout):
+            raise ValueError("State doesn't match this schematic.")
+
+        i = 0
+        for schematic, terms, nets, aggregates in layout:
+            schematic._needs_full_update = bool(values[i])
+            schematic._simulator_stale = True
+            i += 1
+            dirty = schematic._dirty_terminals
+            dirty.clear()
+            for t, value in zip(terms, values[i:i+len(terms)]):
+                t._output = value & 3
+                t.input = value >> 2 & 3
+                if value & 16:
+                    dirty.add(t)
+            i += len(terms)
+            for net, value in zip(nets, values[i:i+len(nets)]):
+                net._output = value
+            i += len(nets)
+            for part, value in zip(aggregates, values[i:i+len(aggregates)]):
+                part._schematic_stale = bool(value)
+            i += len(aggregates)
+
+    def compile(self, flatten=False, gates=False):
+        """Lowers this schematic to a `logic.compiled.Simulator`.
+
+        See `logic.compiled.Netlist.from_schematic()` for `flatten` and
+        `gates`.
+        """
+        netlist = logic.compiled.Netlist.from_schematic(self, flatten, gates)
+        return logic.compiled.Simulator(netlist)
+
+    def update(self, compiled=False, full=False, flatten=False, gates=False,
+               max_events=None):
+        """Propagates values through the schematic until nothing changes.
+
+        Only the nets of terminals whose output changed since the last update
+        are re-evaluated, so the work done is proportional to what those
+        changes affect. Every part and net is re-evaluated if `full` is True,
+        or if the schematic was reset or its structure changed.
+
+        If `compiled` is True, the work is done by a `logic.compiled.Simulator`
+        instead of by the part and net objects. The simulator is kept around
+        until the structure of the schematic changes. With `flatten`, it
+        simulates aggregate parts inlined into one flat netlist, and with
+        `gates` it simulates CMOS gates it recognizes as truth tables, which
+        implies `flatten`. The transistors of those gates, and the nets
+        between them, are then left as they were. Gates settle to the same
+        values as their transistors, but can settle where the transistors
+        oscillate, see `logic.gatelevel`.
+
+        Raises `logic.OscillationError` if the schematic keeps cycling through
+        the same states, or if it hasn't settled after `max_events` net and
+        part evaluations. The schematic is left in whatever state it reached.
+
+        While a `logic.profiling.Profiler` is active, every net and part
+        evaluation is counted and timed.
+        """
+        full = full or self._needs_full_update
+        self._needs_full_update = False
+        dirty = self._dirty_terminals
+
+        if compiled:
+            self._update_compiled(full, flatten, gates, max_events)
+            return
+
+        if full:
+            to_visit = collections.deque(self.parts.union(self.nets))
+        else:
+            to_visit = collections.deque(
+                set(term.net for term in dirty if term.net is not None))
+        dirty.clear()
 
-    def update(self):
+        profiler = logic.profiling.active
+        if profiler is not None:
+            profiler.updates += 1
 
-        to_visit = collections.deque(self.parts.union(self.nets))
+        detector = logic.convergence.CycleDetector(
+            max_events, warmup=4 * (len(self.parts) + len(self.nets)))
+        n_events = 0
+        generation_left = len(to_visit)
+
+        queued = set(to_visit)
         while to_visit:
             item = to_visit.popleft()
+            queued.remove(item)
+            n_events += 1
 
             if isinstance(item, logic.Net):
-                was_updated = item.update()
+                if profiler is None:
+                    was_updated = item.update()
+                else:
+                    was_updated = profiler.update_net(item)
                 if was_updated:
-                    to_visit.extend(set([term.part for term in item.terminals]))
+                    if detector.verifying:
+                        detector.changed_nets.add(item)
+                    for part in item.parts:
+                        if part not in queued:
+                            queued.add(part)
+                            to_visit.append(part)
 
             elif isinstance(item, logic.Part):
-                prev_output = item.get_output_dict()
-                item.update()
-                cur_output = item.get_output_dict()
-                for name, term in item.terminals.iteritems():
-                    if prev_output[name] != cur_output[name]:
-                        to_visit.append(term.net)
+                if detector.armed:
+                    detector.state_hash ^= detector.hash_outputs(
+                        (t, t.output) for t in item.terminals.itervalues())
+                if profiler is None:
+                    item.update()
+                else:
+                    profiler.update_part(item, dirty)
+                if detector.armed:
+                    detector.state_hash ^= detector.hash_outputs(
+                        (t, t.output) for t in item.terminals.itervalues())
+                for term in dirty:
+                    net = term.net
+                    if net is not None and net not in queued:
+                        queued.add(net)
+                        to_visit.append(net)
+                dirty.clear()
 
-            elif item is not None:
-                print item
-                raise RuntimeError()
+            else:
+                raise RuntimeError("Unexpected item: {}".format(item))
+
+            generation_left -= 1
+            if generation_left == 0:
+                generation_left = len(to_visit)
+                if detector.end_generation(n_events, to_visit,
+                                           self._get_outputs):
+                    nets = detector.changed_nets or \
+                        [i for i in to_visit if isinstance(i, logic.Net)]
+                    raise logic.OscillationError(detector.message, nets)
+
+    def _get_outputs(self):
+        for part in self.parts:
+            for term in part.terminals.itervalues():
+                yield term, term.output
+
+    def _update_compiled(self, full, flatten, gates, max_events):
+        flatten = flatten or gates
+        sim = self._simulator
+        if sim is None or sim.netlist.flattened != flatten or \
+                sim.netlist.gate_level != gates:
+            sim = self._simulator = self.compile(flatten, gates)
+            full = True
+
+        if full or self._simulator_stale:
+            sim.load()
+            self._simulator_stale = False
+        else:
+            term_index = sim.netlist.term_index
+            for term in self._dirty_terminals:
+                index = term_index.get(term)
+                if index is not None:
+                    sim.set_output(index, term.output)
+        self._dirty_terminals.clear()
+
+        try:
+            sim.settle(max_events=max_events)
+        finally:
+            sim.write_back()
 
     def get_bbox(self):
-        left = top = float('inf')
-        right = bot = float('-inf')
-        for item in list(self.parts) + list(self.nets):
-            bbox  = item.get_bbox()
-            x1, y1 = bbox[0], bbox[1]
-            x2, y2 = bbox[0]+bbox[2], bbox[1]+bbox[3]
-            left  = min(left,  x1, x2)
-            top   = min(top,   y1, y2)
-            right = max(right, x1, x2)
-            bot   = max(bot,   y1, y2)
+        n_items = len(self.parts) + len(self.nets)
+        if self._bbox is None or self._bbox_n_items != n_items:
+            edges = (float('inf'), float('inf'), float('-inf'), float('-inf'))
+            for item in list(self.parts) + list(self.nets):
+                edges = _add_to_edges(edges, item.get_bbox())
+            self._bbox = edges
+            self._bbox_n_items = n_items
+        left, top, right, bot = self._bbox
         return (left, top, right-left, bot-top)
 
     def part_at_pos(self, pos):
-        for item in list(self.parts) + list(self.nets):
-            if item.point_intersect(pos):
-                return item
-        return None
+        return self._get_spatial_index().item_at(numpy.array(pos))
 
     def get_closest_terminal(self, pos, search_dist=float('inf')):
-        pos = numpy.array(pos)
-
-        closest_dist = float('inf')
-        closest_term = None
-        for part in self.parts:
-            for term in part.terminals.itervalues():
-                dist = numpy.linalg.norm(term.absolute_pos - pos)
-                if dist <= closest_dist:
-                    closest_dist = dist
-                    closest_term = term
-        if closest_dist > search_dist:
-            return None
-        else:
-            return closest_term
+        return self._get_spatial_index().closest_terminal(pos, search_dist)
 
     def get_part_by_name(self, name):
-        #TODO: Optimize
         #TODO: Naming conflicts
-        for part in self.parts:
-            if part.name == name:
-                return part
-        return None
+        return self._parts_by_name.get(name)
+
+    def _part_renamed(self, part, old_name):
+        """Called by `part` when its name changed from `old_name`."""
+        if old_name is not None:
+            self._forget_part_name(part, old_name)
+        if part.name is not None:
+            self._parts_by_name.setdefault(part.name, part)
+
+    def _forget_part_name(self, part, name):
+        if self._parts_by_name.get(name) is not part:
+            return
+        del self._parts_by_name[name]
+
+        # Fewer names than parts means some parts share a name, one of which
+        # can take its place
+        if len(self._parts_by_name) < len(self.parts):
+            for other in self.parts:
+                if other.name == name and other is not part:
+                    self._parts_by_name[name] = other
+                    break
 
     def get_terminal_by_name(self, name):
         match = term_re.match(name)
@@ -245,14 +593,38 @@ class Schematic(object):
         return data
 
     def make_unique_part_name(self, part):
-        part_names = set([p.name for p in self.parts])
-
-        i = 0
+        # Numbers are counted up per part type, and not reused when parts are
+        # removed, so names are found without going over the other parts
+        i = self._name_counters.get(part.part_type, 0)
         while True:
             name = "{}-{}".format(part.part_type, i)
-            if name not in part_names:
-                return name
             i += 1
+            if name not in self._parts_by_name:
+                self._name_counters[part.part_type] = i
+                return name
+
+    def copy(self, memo=None):
+        """Returns a copy of this schematic that shares no state with it.
+
+        This is much faster than a round trip through `get_dict()` and
+        `from_dict()`: nothing is parsed, validated or looked up by name.
+        `memo` is a dict that maps already copied objects to their copies.
+        """
+        if memo is None:
+            memo = {}
+        s = self.__class__(name=self.name)
+        s._bbox = self._bbox
+        s._bbox_n_items = self._bbox_n_items
+        s._memo_key = self._memo_key
+        for part in self.parts:
+            copy = part.copy(memo)
+            s.parts.add(copy)
+            copy._register_schematic(s)
+        for net in self.nets:
+            copy = net.copy(memo)
+            s.nets.add(copy)
+            copy.parent_schematic = s
+        return s
 
     @classmethod
     def from_json_str(cls, json_str):
@@ -265,7 +637,10 @@ class Schematic(object):
         s = cls(name=data.get('name', None))
 
         for desc in data.get('parts', ()):
-            part_cls = logic.part_library[desc.pop('part_type')]
+            part_type = desc.pop('part_type')
+            if part_type not in logic.part_library:
+                raise ValueError('Unknown part type "{}"'.format(part_type))
+            part_cls = logic.part_library[part_type]
             part = part_cls(**desc)
             s.add_part(part)
 
@@ -278,7 +653,7 @@ class Schematic(object):
 
         for desc in data.get('nets', ()):
             net = logic.Net(*map(node_from_dict, desc['nodes']))
-            s.nets.add(net)
+            s.add_net(net)
 
         return s
 
@@ -286,3 +661,21 @@ class Schematic(object):
     def from_file(cls, filename):
         text = open(filename, 'r').read()
         return cls.from_json_str(text)
+
+
+def _add_to_edges(edges, bbox):
+    """Grows `(left, top, right, bottom)` to include `bbox`."""
+    left, top, right, bot = edges
+    x1, y1 = bbox[0], bbox[1]
+    x2, y2 = bbox[0]+bbox[2], bbox[1]+bbox[3]
+    return (min(left,  x1, x2), min(top, y1, y2),
+            max(right, x1, x2), max(bot, y1, y2))
+
+
+def _bbox_inside(bbox, edges):
+    """True if `bbox` doesn't touch `(left, top, right, bottom)`."""
+    left, top, right, bot = edges
+    x1, y1 = bbox[0], bbox[1]
+    x2, y2 = bbox[0]+bbox[2], bbox[1]+bbox[3]
+    return min(x1, x2) > left and min(y1, y2) > top and \
+           max(x1, x2) < right and max(y1, y2) < bot
@@ -73,7 +73,7 @@ class SchematicWidget(gtk.DrawingArea):
         self.set_can_focus(True)
 
         self.schematic.reset()
-        self.schematic.update()
+        self.update_simulation()
         self.post_redraw()
 
     def on_expose(self, widget, event):
@@ -176,17 +176,21 @@ class SchematicWidget(gtk.DrawingArea):
         self.post_redraw()
 
     def fit_view(self, parts=None):
-        if parts is None: parts = self.schematic.parts
-        if not parts: return
-
-        left = top = float("inf")
-        right = bot = float("-inf")
-        for part in parts:
-            bbox = part.get_bbox()
-            left = min(left, bbox[0])
-            right = max(right, bbox[0]+bbox[2])
-            top = min(top, bbox[1])
-            bot = max(bot, bbox[1]+bbox[3])
+        if parts is None:
+            # The schematic keeps its bounding box up to date
+            if not self.schematic.parts: return
+            left, top, width, height = self.schematic.get_bbox()
+            right, bot = left + width, top + height
+        else:
+            if not parts: return
+            left = top = float("inf")
+            right = bot = float("-inf")
+            for part in parts:
+                bbox = part.get_bbox()
+                left = min(left, bbox[0])
+                right = max(right, bbox[0]+bbox[2])
+                top = min(top, bbox[1])
+                bot = max(bot, bbox[1]+bbox[3])
         center = ((left+right)/2, (top+bot)/2)
         box_w = right - left
         box_h = bot - top
@@ -205,6 +209,13 @@ class SchematicWidget(gtk.DrawingArea):
             self.window.invalidate_rect(rect, True)
             self.window.process_updates(True)
 
+    def update_simulation(self):
+        """Updates the schematic, reporting it if it doesn't settle."""
+        try:
+            self.schematic.update()
+        except logic.OscillationError as e:
+            print "Simulation did not settle: {}".format(e)
+
     def add_part(self, part, pos=None):
         if pos == None:
             _, _, width, height = self.get_allocation()
@@ -277,7 +288,10 @@ class DeleteAction(BaseAction):
 
     def on_key_press(self, widget, event):
         if event.keyval == self.key and widget.selected is not None:
-            widget.schematic.remove(widget.selected)
+            try:
+                widget.schematic.remove(widget.selected)
+            except logic.OscillationError as e:
+                print "Simulation did not settle: {}".format(e)
             widget.selected = None
             widget.post_redraw()
 
@@ -417,7 +431,7 @@ class NetCreateAction(BaseDragAction):
 
         if end_term and end_term != self.start_term:
             widget.schematic.connect(self.start_term, end_term)
-            widget.schematic.update()
+            widget.update_simulation()
             widget.post_redraw()
 
         widget.draw_all_terminals = False
@@ -512,7 +526,7 @@ class SimpleActions(BaseAction):
             widget.post_redraw()
 
         elif event.keyval == ord('u'):  # Update Simulation
-            widget.schematic.update()
+            widget.update_simulation()
             widget.post_redraw()
 
         elif event.keyval == ord('='):  # Reset Zoom
@@ -527,7 +541,7 @@ class SimpleActions(BaseAction):
         elif event.keyval == ord(' '):  # Activate part
             if isinstance(widget.selected, logic.Part):
                 widget.selected.on_activate()
-                widget.schematic.update()
+                widget.update_simulation()
                 widget.post_redraw()
 
         elif event.keyval == ord('R'):  # Rotate
@@ -541,6 +555,6 @@ class SimpleActions(BaseAction):
             part = widget.schematic.part_at_pos(pos)
             if isinstance(part, logic.Part):
                 part.on_activate()
-                widget.schematic.update()
+                widget.update_simulation()
                 widget.post_redraw()
                 return True
@@ -0,0 +1,249 @@
+from __future__ import division
+import math
+
+import logic
+
+# Spatial index for hit-testing a schematic. Space is split into square cells
+# of `CELL_SIZE`, and each part is recorded in the cells its bounding box
+# covers, each net in the cells covered by its segments, and each terminal in
+# the cell its position is in. A point query then only has to look at the
+# items of one cell, and a nearest terminal query at the rings of cells
+# around the point until no closer terminal can be found.
+#
+# The index is kept up to date by the schematic as items are added, removed
+# or moved, see `Schematic._get_spatial_index()`.
+
+# About the size of a transistor, so most parts cover a few cells
+CELL_SIZE = 2.0
+
+# Margins around bounding boxes, times the scale of the item, for parts and
+# nets that can be hit a little outside of them. A net is hit within half of
+# its line thickness, see `Net.point_intersect()`, and parts get room for the
+# width of their lines.
+NET_MARGIN = 0.1
+PART_MARGIN = 0.2
+
+
+class SpatialIndex(object):
+    """Uniform grid over the parts, nets and terminals of a schematic."""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self._cells = {}  # Cell: set of parts and nets
+        self._item_cells = {}  # Part or net: cells it is in
+        self._unbounded = set()  # Items without a finite bounding box
+        self._terminal_cells = {}  # Cell: set of terminals
+        self._terminal_cell = {}  # Terminal: its cell
+
+        # Range of cells that ever had terminals in them, which bounds the
+        # search for the nearest terminal
+        self._terminal_bounds = None
+
+    @classmethod
+    def from_schematic(cls, schematic, cell_size=CELL_SIZE):
+        index = cls(cell_size)
+        for part in schematic.parts:
+            index.add_part(part)
+        for net in schematic.nets:
+            index.add_net(net)
+        return index
+
+    def __len__(self):
+        return len(self._item_cells)
+
+    def __contains__(self, item):
+        return item in self._item_cells
+
+    def _cell(self, point):
+        return (int(math.floor(point[0] / self.cell_size)),
+                int(math.floor(point[1] / self.cell_size)))
+
+    def _rect_cells(self, left, top, right, bottom, margin):
+        i1, j1 = self._cell((left - margin, top - margin))
+        i2, j2 = self._cell((right + margin, bottom + margin))
+        return [(i, j) for i in xrange(i1, i2+1) for j in xrange(j1, j2+1)]
+
+    def _get_cells(self, item):
+        """Returns the cells `item` covers, or None if it has no finite
+        bounding box."""
+        if isinstance(item, logic.Net):
+            margin = NET_MARGIN * item.scale
+            cells = set()
+            for i, node in enumerate(item.nodes):
+                x1, y1 = node.pos
+                for j in node.neighbors:
+                    if j > i:
+                        x2, y2 = item.nodes[j].pos
+                        cells.update(self._rect_cells(
+                            min(x1, x2), min(y1, y2), max(x1, x2),
+                            max(y1, y2), margin))
+            return cells
+        else:
+            x, y, width, height = item.get_bbox()
+            if not all(map(_is_finite, (x, y, width, height))):
+                return None
+            return self._rect_cells(x, y, x + width, y + height,
+                                    PART_MARGIN * item.scale)
+
+    def _add(self, item):
+        cells = self._get_cells(item)
+        if cells is None:
+            self._unbounded.add(item)
+            cells = ()
+        for cell in cells:
+            items = self._cells.get(cell)
+            if items is None:
+                items = self._cells[cell] = set()
+            items.add(item)
+        self._item_cells[item] = cells
+
+    def _remove(self, item):
+        for cell in self._item_cells.pop(item):
+            items = self._cells[cell]
+            items.discard(item)
+            if not items:
+                del self._cells[cell]
+        self._unbounded.discard(item)
+
+    def _add_terminal(self, term):
+        cell = self._cell(term.absolute_pos)
+        terms = self._terminal_cells.get(cell)
+        if terms is None:
+            terms = self._terminal_cells[cell] = set()
+        terms.add(term)
+        self._terminal_cell[term] = cell
+
+        i, j = cell
+        if self._terminal_bounds is None:
+            self._terminal_bounds = (i, j, i, j)
+        else:
+            i1, j1, i2, j2 = self._terminal_bounds
+            self._terminal_bounds = (min(i1, i), min(j1, j), max(i2, i),
+                                     max(j2, j))
+
+    def _remove_terminal(self, term):
+        cell = self._terminal_cell.pop(term, None)
+        if cell is not None:
+            terms = self._terminal_cells[cell]
+            terms.discard(term)
+            if not terms:
+                del self._terminal_cells[cell]
+
+    def add_part(self, part):
+        self._add(part)
+        for term in part.terminals.itervalues():
+            self._add_terminal(term)
+
+    def remove_part(self, part):
+        self._remove(part)
+        for term in part.terminals.itervalues():
+            self._remove_terminal(term)
+
+    def update_part(self, part):
+        """Updates the index after `part` moved or its terminals changed.
+
+        The nets connected to it move along and are updated too.
+        """
+        if part not in self._item_cells:
+            return
+        self.remove_part(part)
+        self.add_part(part)
+        for term in part.terminals.itervalues():
+            if term.net in self._item_cells:
+                self.update_net(term.net)
+
+    def add_net(self, net):
+        self._add(net)
+
+    def remove_net(self, net):
+        self._remove(net)
+
+    def update_net(self, net):
+        """Updates the index after the nodes of `net` changed."""
+        if net in self._item_cells:
+            self._remove(net)
+            self._add(net)
+
+    def items_at(self, point):
+        """Returns the parts and nets that might intersect `point`."""
+        items = self._cells.get(self._cell(point), ())
+        if self._unbounded:
+            items = set(items) | self._unbounded
+        return items
+
+    def items_in_rect(self, left, top, right, bottom):
+        """Returns the parts and nets that might be inside the rectangle."""
+        i1, j1 = self._cell((left, top))
+        i2, j2 = self._cell((right, bottom))
+        items = set(self._unbounded)
+        if (i2 - i1 + 1) * (j2 - j1 + 1) > len(self._cells):
+            # Fewer cells with items in them than cells in the rectangle
+            for (i, j), cell_items in self._cells.iteritems():
+                if i1 <= i <= i2 and j1 <= j <= j2:
+                    items.update(cell_items)
+        else:
+            for i in xrange(i1, i2+1):
+                for j in xrange(j1, j2+1):
+                    cell_items = self._cells.get((i, j))
+                    if cell_items:
+                        items.update(cell_items)
+        return items
+
+    def item_at(self, point):
+        """Returns a part or net that intersects `point`, parts first, or
+        None."""
+        items = self.items_at(point)
+        nets = []
+        for item in items:
+            if isinstance(item, logic.Net):
+                nets.append(item)
+            elif item.point_intersect(point):
+                return item
+        for net in nets:
+            if net.point_intersect(point):
+                return net
+        return None
+
+    def closest_terminal(self, point, max_dist=float('inf')):
+        """Returns the terminal closest to `point` no further than
+        `max_dist` away, or None."""
+        if self._terminal_bounds is None:
+            return None
+        x, y = point
+        ci, cj = self._cell(point)
+        i1, j1, i2, j2 = self._terminal_bounds
+        last_ring = max(ci - i1, i2 - ci, cj - j1, j2 - cj, 0)
+
+        closest_dist = max_dist
+        closest_term = None
+        ring = 0
+        while ring <= last_ring:
+            # Every point in this ring is at least this far from `point`
+            if (ring - 1) * self.cell_size > closest_dist:
+                break
+            for cell in _ring_cells(ci, cj, ring):
+                for term in self._terminal_cells.get(cell, ()):
+                    tx, ty = term.absolute_pos
+                    dist = math.hypot(tx - x, ty - y)
+                    if dist <= closest_dist:
+                        closest_dist = dist
+                        closest_term = term
+            ring += 1
+        return closest_term
+
+
+def _ring_cells(ci, cj, ring):
+    """Yields the cells exactly `ring` cells away from `(ci, cj)`."""
+    if ring == 0:
+        yield (ci, cj)
+        return
+    for i in xrange(ci - ring, ci + ring + 1):
+        yield (i, cj - ring)
+        yield (i, cj + ring)
+    for j in xrange(cj - ring + 1, cj + ring):
+        yield (ci - ring, j)
+        yield (ci + ring, j)
+
+
+def _is_finite(value):
+    return not (math.isinf(value) or math.isnan(value))
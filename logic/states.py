@@ -0,0 +1,29 @@
+# Logic states of terminals and nets.
+#
+# States are small integers. The encoding is chosen so that resolving several
+# drivers is a bitwise OR: FLOAT contributes nothing, and HIGH | LOW gives
+# CONTENTION. The names are only used at the edges, in saved schematics and
+# anything shown to the user.
+FLOAT, HIGH, LOW, CONTENTION = 0, 1, 2, 3
+ALL = (FLOAT, HIGH, LOW, CONTENTION)
+
+NAMES = ("float", "high", "low", "contention")
+_CODES = dict((name, state) for state, name in enumerate(NAMES))
+
+# Colors indexed by state. Nets are drawn grey when floating, while probes and
+# switches are filled white.
+NET_COLORS = ((0.7, 0.7, 0.7), (0, 1, 0), (0, 0, 0), (1, 0, 0))
+FILL_COLORS = ((1, 1, 1), (0, 1, 0), (0, 0, 0), (1, 0, 0))
+
+
+def from_name(name):
+    """Returns the state called `name`, such as "high"."""
+    try:
+        return _CODES[name]
+    except KeyError:
+        raise ValueError('Unknown logic state: "{}"'.format(name))
+
+
+def to_name(state):
+    """Returns the name of `state`, such as "high"."""
+    return NAMES[state]
@@ -1,25 +1,38 @@
 
 import numpy
 
+from states import FLOAT
+
 
 class Terminal(object):
 
-    def __init__(self, part, name, pos, net=None, output="float"):
+    def __init__(self, part, name, pos, net=None, output=FLOAT):
         self.part = part
         self.name = name
         self.pos = pos
         self.net = net
-        self.output = output
-        self._input = "float"
+        self._output = output
+        self.input = FLOAT
+        self._absolute_pos = None
+        self._absolute_pos_version = None
 
     @property
-    def input(self):
-        return self._input
+    def output(self):
+        return self._output
+
+    @output.setter
+    def output(self, value):
+        if value != self._output:
+            self._output = value
+            schematic = self.part.parent_schematic
+            if schematic is not None:
+                schematic.mark_dirty(self)
 
-    @input.setter
-    def input(self, value):
-        assert value in ("high", "low", "float", "contention")
-        self._input = value
+    def copy(self, part):
+        """Returns a copy of this terminal belonging to `part`."""
+        term = Terminal(part, self.name, self.pos, output=self._output)
+        term.input = self.input
+        return term
 
     def connect(self, net):
         if net is None:
@@ -28,8 +41,8 @@ class Terminal(object):
         self.net = net
 
     def reset(self):
-        self.output = "float"
-        self.input = "float"
+        self.output = FLOAT
+        self.input = FLOAT
 
     def point_intersect(self, point):
         dist = numpy.linalg.norm(point - self.absolute_pos)
@@ -41,7 +54,12 @@ class Terminal(object):
 
     @property
     def absolute_pos(self):
-        return self.part.point_schematic_to_object(self.pos)
+        """Position in schematic space, cached until the part moves."""
+        part = self.part
+        if self._absolute_pos_version != part.version:
+            self._absolute_pos = part.point_schematic_to_object(self.pos)
+            self._absolute_pos_version = part.version
+        return self._absolute_pos
 
     def __str__(self):
         if self.part.name:
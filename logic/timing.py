@@ -0,0 +1,262 @@
+import compiled
+from compiled import Simulator, KIND_NMOS, KIND_PMOS, KIND_GATE
+from convergence import OscillationError
+from states import FLOAT, HIGH, LOW
+
+# Timed simulation gives every part a propagation delay, in integer time
+# units, that depends on its part type. Nets are wires: they resolve as soon
+# as one of their terminals' outputs changes. When the inputs of a part
+# change at time `t`, the part is evaluated right away and the outputs it
+# computes are scheduled to appear at `t + delay`.
+#
+# Delays are transport delays: every scheduled change happens, so a pulse
+# shorter than a part's delay still makes it through, and glitches show up.
+# Scheduling only compares against the last value already scheduled for a
+# terminal, so events on one terminal are always in time order.
+#
+# Events are kept in a `TimingWheel` rather than a heap, so scheduling and
+# popping are O(1) amortized when delays are short compared to the size of
+# the wheel.
+
+
+class TimingWheel(object):
+    """A calendar queue of events keyed by integer time.
+
+    Events less than `n_slots` time units after `now` go into a ring of
+    buckets, one per time unit. Later events wait in an overflow dict and are
+    moved into the ring when the wheel gets close to them.
+    """
+
+    def __init__(self, n_slots=256):
+        self.n_slots = n_slots
+        self.now = 0
+        self._slots = [[] for i in xrange(n_slots)]
+        self._n_in_slots = 0
+        self._overflow = {}
+        self._overflow_min = None
+        self._n_overflow = 0
+
+    def __len__(self):
+        return self._n_in_slots + self._n_overflow
+
+    def schedule(self, time, event):
+        """Adds `event` to happen at `time`, which can't be before `now`."""
+        if time < self.now:
+            raise ValueError("Can't schedule an event in the past.")
+        if time < self.now + self.n_slots:
+            self._slots[time % self.n_slots].append(event)
+            self._n_in_slots += 1
+        else:
+            self._overflow.setdefault(time, []).append(event)
+            self._n_overflow += 1
+            if self._overflow_min is None or time < self._overflow_min:
+                self._overflow_min = time
+
+    def next_time(self):
+        """Advances `now` to the time of the next event and returns it.
+
+        Returns None, leaving `now` alone, if there are no events.
+        """
+        if not len(self):
+            return None
+        if not self._n_in_slots:
+            self._advance(self._overflow_min)
+        while not self._slots[self.now % self.n_slots]:
+            self._advance(self.now + 1)
+        return self.now
+
+    def pop(self):
+        """Removes and returns the list of events at `now`."""
+        slot = self.now % self.n_slots
+        events = self._slots[slot]
+        self._slots[slot] = []
+        self._n_in_slots -= len(events)
+        return events
+
+    def _advance(self, time):
+        self.now = time
+        if self._overflow_min is not None and \
+                self._overflow_min < time + self.n_slots:
+            # Move every overflow event that is now in range into the ring
+            for t in [t for t in self._overflow if t < time + self.n_slots]:
+                events = self._overflow.pop(t)
+                self._slots[t % self.n_slots].extend(events)
+                self._n_in_slots += len(events)
+                self._n_overflow -= len(events)
+            self._overflow_min = min(self._overflow) if self._overflow \
+                else None
+
+
+class TimedSimulator(Simulator):
+    """Simulates a `Netlist` with per-part-type propagation delays.
+
+    Arguments:
+        netlist: The `Netlist` to simulate. Aggregate parts that aren't
+            flattened are simulated without any delay inside, and their
+            outputs change after the aggregate's own delay.
+        delays: Dict mapping part types, like "NmosTransistor" or "Nand", to
+            their delay.
+        default_delay: Delay of part types not in `delays`.
+        wheel_size: Number of slots in the `TimingWheel`. Should be larger
+            than most delays.
+
+    Listeners in `net_listeners` are called as `listener(time, n, value)`
+    whenever the value of net `n` changes.
+    """
+
+    def __init__(self, netlist, delays=None, default_delay=1, wheel_size=256):
+        if compiled.KIND_OBJECT in netlist.part_kind:
+            raise ValueError("Timed simulation doesn't support parts that "
+                             "are only simulated by their update() method.")
+
+        delays = delays or {}
+        self.part_delay = [
+            delays.get(part.part_type, default_delay)
+            for part in netlist.part_objects]
+        if any(delay < 0 for delay in self.part_delay):
+            raise ValueError("Delays can't be negative.")
+
+        self.wheel_size = wheel_size
+        self.net_listeners = []
+        super(TimedSimulator, self).__init__(netlist)
+
+    @property
+    def time(self):
+        return self.wheel.now
+
+    def _state_replaced(self):
+        super(TimedSimulator, self)._state_replaced()
+        self.wheel = TimingWheel(self.wheel_size)
+        self._scheduled = list(self.outputs)
+
+    def set_state(self, state):
+        """Restores a state returned by `get_state()`.
+
+        Events that were scheduled when the state was taken aren't part of
+        it, so they are lost. Time carries on from where it is.
+        """
+        super(TimedSimulator, self).set_state(state)
+        now = self.wheel.now
+        self.wheel = TimingWheel(self.wheel_size)
+        self.wheel.now = now
+        self._scheduled = list(self.outputs)
+
+    def set_output(self, t, value, time=None):
+        """Schedules the output of terminal `t` to change at `time`.
+
+        `time` defaults to the current time.
+        """
+        if time is None:
+            time = self.wheel.now
+        self._scheduled[t] = value
+        self.wheel.schedule(time, (t, value))
+
+    def settle(self, full=False, max_events=None):
+        """Runs until no events are left. See `run()`."""
+        if full:
+            self._needs_full_settle = True
+        return self.run(max_events=max_events)
+
+    def run(self, until=None, max_events=None):
+        """Processes events in time order.
+
+        Stops when there are no events left, or before the first event after
+        `until`. Returns the time of the last event processed. Raises
+        `logic.OscillationError` after more than `max_events` events.
+        """
+        wheel = self.wheel
+        outputs = self.outputs
+        term_net = self._term_net
+        n_events = 0
+        last_time = wheel.now
+
+        if self._needs_full_settle:
+            self._needs_full_settle = False
+            self._propagate(wheel.now, xrange(self.netlist.n_nets),
+                            [p for p in xrange(self.netlist.n_parts)
+                             if self._part_active[p]])
+
+        while True:
+            time = wheel.next_time()
+            if time is None or (until is not None and time > until):
+                break
+
+            events = wheel.pop()
+            n_events += len(events)
+            if max_events is not None and n_events > max_events:
+                raise OscillationError(
+                    "Did not settle within {} events.".format(max_events))
+
+            nets = set()
+            for t, value in events:
+                if outputs[t] != value:
+                    outputs[t] = value
+                    if self._term_part[t] >= 0:
+                        self._touched_parts.add(self._term_part[t])
+                    n = term_net[t]
+                    if n >= 0:
+                        nets.add(n)
+            self._propagate(time, nets)
+            last_time = time
+
+        return last_time
+
+    def _propagate(self, time, nets, parts=()):
+        """Resolves `nets` and schedules the outputs of the parts they drive.
+
+        The parts in `parts` are evaluated even if their inputs didn't change.
+        """
+        net_values = self.net_values
+        net_offsets = self._net_offsets
+        net_terms = self._net_terms
+        term_part = self._term_part
+        part_active = self._part_active
+
+        parts = set(parts)
+        for n in nets:
+            self._touched_nets.add(n)
+            old_value = net_values[n]
+            if self._update_net(n):
+                for t in net_terms[net_offsets[n]:net_offsets[n+1]]:
+                    p = term_part[t]
+                    if part_active[p]:
+                        parts.add(p)
+            if net_values[n] != old_value:
+                for listener in self.net_listeners:
+                    listener(time, n, net_values[n])
+        for p in parts:
+            self._touched_parts.add(p)
+            arrival = time + self.part_delay[p]
+            for t, value in self._evaluate_part(p):
+                if self._scheduled[t] != value:
+                    self._scheduled[t] = value
+                    self.wheel.schedule(arrival, (t, value))
+
+    def _evaluate_part(self, p):
+        """Returns the `(terminal, output)` pairs part `p` is driving to."""
+        kind = self._part_kind[p]
+        inputs = self.inputs
+        terms = self._part_terms[self._part_offsets[p]:self._part_offsets[p+1]]
+
+        if kind == KIND_NMOS or kind == KIND_PMOS:
+            g, s, d = terms
+            gate = inputs[g]
+            if (kind == KIND_NMOS and gate == HIGH) or \
+                    (kind == KIND_PMOS and gate == LOW):
+                return ((g, FLOAT), (s, inputs[d]), (d, inputs[s]))
+            else:
+                return ((g, FLOAT), (s, FLOAT), (d, FLOAT))
+
+        elif kind == KIND_GATE:
+            index = 0
+            for i in xrange(len(terms) - 1):
+                index |= inputs[terms[i]] << 2*i
+            return ((terms[-1], self._gate_tables[p][index]),)
+
+        else:  # KIND_AGGREGATE
+            child, ports = self.children[p]
+            for external, internal in ports:
+                child.set_output(internal, inputs[external])
+            child.settle()
+            return [(external, child.inputs[internal])
+                    for external, internal in ports]
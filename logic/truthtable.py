@@ -0,0 +1,196 @@
+from __future__ import division
+import itertools
+import multiprocessing
+import os
+import re
+
+import numpy
+
+import logic
+import compiled
+from batch import BatchRunner
+from states import HIGH, LOW
+
+# A truth table holds the settled state of every output IO part for each
+# combination of HIGH and LOW on the input IO parts. Row `i` has input `j`
+# HIGH if bit `j` of `i` is set, and LOW otherwise.
+#
+# Tables are generated in chunks of rows. Each chunk is settled on its own by
+# a worker process, which loads the schematic from its file once and keeps a
+# `BatchRunner` for it, so only row indexes and results cross process
+# boundaries.
+#
+# States are stored packed, four to a byte, in a compressed ".npz" file saved
+# next to the ".schem" file.
+
+CHUNK_BITS = 16
+
+
+def table_filename(schem_filename):
+    """Returns the file a truth table for `schem_filename` is saved to."""
+    return os.path.splitext(schem_filename)[0] + ".truth.npz"
+
+
+def _name_key(name):
+    return [int(s) if s.isdigit() else s for s in re.split(r"(\d+)", name)]
+
+
+def find_io_parts(schematic):
+    """Splits the IO parts of `schematic` into `(inputs, outputs)` lists.
+
+    An IO part is an output if something on its net could drive it: a
+    source, a switch, or the source or drain of a transistor. Both lists are
+    sorted by name, with numbers in names compared by value ("in2" comes
+    before "in10").
+    """
+    netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+    driven = set()
+    for p in xrange(netlist.n_parts):
+        kind = netlist.part_kind[p]
+        terms = netlist.get_part_terminals(p)
+        if kind in (compiled.KIND_NMOS, compiled.KIND_PMOS):
+            terms = terms[1:]  # The gate never drives
+        elif kind not in (compiled.KIND_VDD, compiled.KIND_GND,
+                          compiled.KIND_SWITCH):
+            continue
+        driven.update(netlist.term_net[terms].tolist())
+    driven.discard(-1)
+
+    inputs = []
+    outputs = []
+    for part in schematic.parts:
+        if isinstance(part, logic.parts.IOPart):
+            n = netlist.term_net[netlist.term_index[part["term"]]]
+            (outputs if n in driven else inputs).append(part.name)
+    return sorted(inputs, key=_name_key), sorted(outputs, key=_name_key)
+
+
+def _rows(start, stop, n_inputs):
+    """Returns the input states of rows `start` to `stop`."""
+    bits = (numpy.arange(start, stop)[:, None] >> numpy.arange(n_inputs)) & 1
+    return numpy.where(bits, HIGH, LOW).astype(numpy.int8)
+
+
+def _pack(table):
+    """Packs an array of states four to a byte."""
+    flat = numpy.zeros(-(-table.size // 4) * 4, dtype=numpy.uint8)
+    flat[:table.size] = table.ravel()
+    flat = flat.reshape(-1, 4) << numpy.array([0, 2, 4, 6], dtype=numpy.uint8)
+    return numpy.bitwise_or.reduce(flat, axis=1).astype(numpy.uint8)
+
+
+def _unpack(packed, shape):
+    size = int(numpy.prod(shape))
+    states = (packed[:, None] >> numpy.array([0, 2, 4, 6], dtype=numpy.uint8))
+    return (states & 3).astype(numpy.int8).ravel()[:size].reshape(shape)
+
+
+class TruthTable(object):
+
+    def __init__(self, input_names, output_names, table):
+        self.input_names = list(input_names)
+        self.output_names = list(output_names)
+        self.table = numpy.asarray(table, dtype=numpy.int8)
+
+    def lookup(self, input_states):
+        """Returns the output states for a sequence of input states.
+
+        The inputs must all be HIGH or LOW.
+        """
+        index = 0
+        for j, state in enumerate(input_states):
+            if state == HIGH:
+                index |= 1 << j
+            elif state != LOW:
+                raise ValueError("Truth tables only cover HIGH and LOW "
+                                 "inputs.")
+        return self.table[index]
+
+    def save(self, filename):
+        numpy.savez_compressed(
+            filename,
+            input_names=numpy.array(self.input_names, dtype=numpy.unicode_),
+            output_names=numpy.array(self.output_names, dtype=numpy.unicode_),
+            shape=numpy.array(self.table.shape),
+            packed=_pack(self.table),
+        )
+
+    @classmethod
+    def load(cls, filename):
+        data = numpy.load(filename)
+        table = _unpack(data["packed"], tuple(data["shape"]))
+        return cls(data["input_names"].tolist(), data["output_names"].tolist(),
+                   table)
+
+    def __str__(self):
+        return "<TruthTable {} -> {}>".format(
+            ", ".join(self.input_names), ", ".join(self.output_names))
+
+    __repr__ = __str__
+
+
+# Per-process state of the worker pool, set up by `_init_worker()`
+_worker_runner = None
+
+
+def _init_worker(schem_filename, inputs, outputs):
+    global _worker_runner
+    schematic = logic.Schematic.from_file(schem_filename)
+    _worker_runner = BatchRunner(schematic, inputs, outputs)
+
+
+def _run_chunk(args):
+    start, stop = args
+    n_inputs = len(_worker_runner.input_names)
+    return start, _worker_runner.run(_rows(start, stop, n_inputs),
+                                     independent_rows=True)
+
+
+def generate(schem_filename, inputs=None, outputs=None, processes=None,
+             chunk_bits=CHUNK_BITS):
+    """Generates the truth table of the schematic in `schem_filename`.
+
+    `inputs` and `outputs` are lists of IO part names, and default to the
+    ones `find_io_parts()` finds. The input space is split into chunks of
+    `2**chunk_bits` rows that are settled by a pool of `processes` worker
+    processes (by default one per core). With `processes=1`, everything is
+    done in this process.
+    """
+    if inputs is None or outputs is None:
+        schematic = logic.Schematic.from_file(schem_filename)
+        found_inputs, found_outputs = find_io_parts(schematic)
+        inputs = found_inputs if inputs is None else inputs
+        outputs = found_outputs if outputs is None else outputs
+
+    n_rows = 1 << len(inputs)
+    chunk_size = 1 << chunk_bits
+    chunks = [(start, min(start + chunk_size, n_rows))
+              for start in xrange(0, n_rows, chunk_size)]
+    table = numpy.empty((n_rows, len(outputs)), dtype=numpy.int8)
+
+    pool = None
+    if processes == 1 or len(chunks) == 1:
+        _init_worker(schem_filename, inputs, outputs)
+        results = itertools.imap(_run_chunk, chunks)
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker,
+                                    (schem_filename, inputs, outputs))
+        results = pool.imap_unordered(_run_chunk, chunks)
+
+    try:
+        for start, chunk in results:
+            table[start:start+len(chunk)] = chunk
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return TruthTable(inputs, outputs, table)
+
+
+def generate_folder(path, processes=None):
+    """Generates and saves a truth table for every ".schem" file in `path`."""
+    for f in sorted(os.listdir(path)):
+        f = os.path.join(path, f)
+        if os.path.isfile(f) and f.endswith(".schem"):
+            table = generate(f, processes=processes)
+            table.save(table_filename(f))
+            print "{}: {}".format(f, table)
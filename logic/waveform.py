@@ -0,0 +1,211 @@
+import numpy
+
+import logic
+from states import FLOAT, HIGH, LOW, CONTENTION
+
+# A `WaveformRecorder` keeps value changes of a fixed set of signals as
+# (time, signal, value) records in a preallocated numpy ring buffer. When
+# streaming to a VCD (Value Change Dump) file, the buffer is written out
+# whenever it fills up, so memory use stays constant however long the run.
+# Without a file, the oldest records are overwritten instead.
+#
+# Changes are fed to the recorder by `watch_simulator()`, which listens to the
+# net changes of a `logic.timing.TimedSimulator`, or by a `SchematicRecorder`,
+# which compares the selected nets and probes of a schematic against their
+# last recorded values each time it samples.
+
+RECORD_DTYPE = numpy.dtype([
+    ("time", numpy.int64),
+    ("signal", numpy.int32),
+    ("value", numpy.int8),
+])
+
+# VCD value characters, indexed by state
+VCD_VALUES = {FLOAT: "z", HIGH: "1", LOW: "0", CONTENTION: "x"}
+
+
+def vcd_identifier(i):
+    """Returns the short VCD identifier code of signal `i`."""
+    chars = []
+    while True:
+        chars.append(chr(33 + i % 94))
+        i //= 94
+        if not i:
+            return "".join(chars)
+
+
+class WaveformRecorder(object):
+    """Records value changes of a set of signals.
+
+    Arguments:
+        names: Names of the signals. Signals are referred to by their index
+            in this list.
+        vcd_file: File name or file object to stream a VCD file to, or None
+            to only keep the last `capacity` changes in memory.
+        capacity: Size of the ring buffer, in records.
+        timescale: VCD time unit.
+        scope: VCD module name the signals are put in.
+
+    """
+
+    def __init__(self, names, vcd_file=None, capacity=1 << 16,
+                 timescale="1ns", scope="logic"):
+        self.names = list(names)
+        self.capacity = capacity
+        self.timescale = timescale
+        self.scope = scope
+        self._buffer = numpy.zeros(capacity, dtype=RECORD_DTYPE)
+        self._n_records = 0  # Ever recorded
+        self._n_flushed = 0  # Of those, written to the VCD file
+
+        if isinstance(vcd_file, basestring):
+            vcd_file = open(vcd_file, "w")
+            self._owns_file = True
+        else:
+            self._owns_file = False
+        self.vcd_file = vcd_file
+        self._last_vcd_time = None
+        if vcd_file is not None:
+            self._write_header()
+
+    def __len__(self):
+        """Number of records held in the buffer."""
+        if self.vcd_file is not None:
+            return self._n_records - self._n_flushed
+        return min(self._n_records, self.capacity)
+
+    def record(self, time, signal, value):
+        """Records that `signal` changed to `value` at `time`.
+
+        Times must not decrease from one record to the next.
+        """
+        if self.vcd_file is not None and \
+                self._n_records - self._n_flushed == self.capacity:
+            self.flush()
+        self._buffer[self._n_records % self.capacity] = (time, signal, value)
+        self._n_records += 1
+
+    def records(self):
+        """Returns a copy of the buffered records, oldest first."""
+        n = len(self)
+        start = (self._n_records - n) % self.capacity
+        return numpy.roll(self._buffer, -start)[:n].copy()
+
+    def flush(self):
+        """Writes the buffered records to the VCD file."""
+        if self.vcd_file is None:
+            return
+        lines = []
+        last_time = self._last_vcd_time
+        for time, signal, value in self.records().tolist():
+            if time != last_time:
+                lines.append("#{}\n".format(time))
+                last_time = time
+            lines.append(VCD_VALUES[value] + vcd_identifier(signal) + "\n")
+        self.vcd_file.write("".join(lines))
+        self.vcd_file.flush()
+        self._last_vcd_time = last_time
+        self._n_flushed = self._n_records
+
+    def close(self):
+        """Flushes, and closes the VCD file if the recorder opened it."""
+        self.flush()
+        if self._owns_file:
+            self.vcd_file.close()
+
+    def _write_header(self):
+        lines = ["$timescale {} $end\n".format(self.timescale),
+                 "$scope module {} $end\n".format(self.scope)]
+        for i, name in enumerate(self.names):
+            lines.append("$var wire 1 {} {} $end\n".format(
+                vcd_identifier(i), name.replace(" ", "_")))
+        lines.append("$upscope $end\n$enddefinitions $end\n")
+        self.vcd_file.write("".join(lines))
+
+    def watch_simulator(self, sim, nets):
+        """Records changes of the nets of a `TimedSimulator`.
+
+        `nets` are net indexes of `sim.netlist`, in the order of `names`.
+        Their current values are recorded at the current time.
+        """
+        signals = numpy.full(sim.netlist.n_nets, -1, dtype=numpy.int32)
+        signals[list(nets)] = numpy.arange(len(nets))
+        signals = signals.tolist()
+        record = self.record
+
+        def listener(time, n, value):
+            signal = signals[n]
+            if signal >= 0:
+                record(time, signal, value)
+
+        for i, n in enumerate(nets):
+            record(sim.time, i, sim.net_values[n])
+        sim.net_listeners.append(listener)
+        return listener
+
+
+def _signal_name(signal):
+    if isinstance(signal, logic.Terminal):
+        if len(signal.part.terminals) == 1:
+            return str(signal.part.name)
+        return "{}.{}".format(signal.part.name, signal.name)
+    return None
+
+
+class SchematicRecorder(object):
+    """Samples nets and terminals of a schematic into a `WaveformRecorder`.
+
+    Arguments:
+        signals: `Net` objects, `Terminal` objects or parts with a single
+            terminal, such as probes or switches, or `(name, signal)` pairs
+            of them. For a terminal, the value of its net is recorded, or its
+            input if it isn't connected.
+        **kwargs: Passed on to `WaveformRecorder`.
+
+    Call `sample()` after each `Schematic.update()`. Only the selected
+    signals are looked at, and only the ones that changed are recorded.
+    """
+
+    def __init__(self, signals, **kwargs):
+        names = []
+        self.signals = []
+        for signal in signals:
+            if isinstance(signal, tuple):
+                name, signal = signal
+            else:
+                name = None
+            if isinstance(signal, logic.Part):
+                assert len(signal.terminals) == 1
+                signal = signal.terminals.values()[0]
+            names.append(name or _signal_name(signal) or
+                         "net{}".format(len(names)))
+            self.signals.append(signal)
+
+        self.recorder = WaveformRecorder(names, **kwargs)
+        self.time = None
+        self._last_values = [None] * len(self.signals)
+
+    def sample(self, time=None):
+        """Records the signals that changed since the last sample.
+
+        `time` defaults to 0 for the first sample, and to one more than the
+        time of the last sample after that.
+        """
+        if time is None:
+            time = 0 if self.time is None else self.time + 1
+        self.time = time
+        last_values = self._last_values
+        for i, signal in enumerate(self.signals):
+            if isinstance(signal, logic.Terminal):
+                if signal.net is None:
+                    value = signal.input
+                else:
+                    value = signal.net._output
+            else:
+                value = signal._output
+            if value != last_values[i]:
+                last_values[i] = value
+                self.recorder.record(time, i, value)
+
+    def close(self):
+        self.recorder.close()
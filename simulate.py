@@ -0,0 +1,190 @@
+"""
+Simulates schematics without the GUI.
+
+Loads each schematic, sets switches and IO parts, settles it and prints the
+states of its probes. With a stimulus file, the inputs are set from each row
+of the file in turn, and the probes are printed after every row.
+
+A stimulus file is CSV, with the names of the inputs in the first row and
+their states in the others. States are "high", "low", "float",
+"contention", or 1 and 0.
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+import logic
+from logic import states
+
+
+def parse_state(text):
+    text = text.strip().lower()
+    if text == "1":
+        return states.HIGH
+    elif text == "0":
+        return states.LOW
+    return states.from_name(text)
+
+
+def parse_setting(text):
+    """Parses "name=state" into `(name, state)`."""
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(
+            'Expected "name=state", got "{}"'.format(text))
+    try:
+        return name.strip(), parse_state(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def read_stimulus(filename):
+    """Returns `(input_names, rows)` from a stimulus file."""
+    with open(filename, "rb") as f:
+        reader = csv.reader(f)
+        names = [name.strip() for name in next(reader)]
+        rows = []
+        for line, row in enumerate(reader, 2):
+            if not row:
+                continue
+            if len(row) != len(names):
+                raise ValueError("{}:{}: Expected {} values, got {}".format(
+                    filename, line, len(names), len(row)))
+            rows.append([parse_state(value) for value in row])
+    return names, rows
+
+
+def get_terminal(schematic, name):
+    """Like `Schematic.get_terminal_by_name()`, with a readable error."""
+    match = logic.schematic.term_re.match(name)
+    part = match and schematic.get_part_by_name(match.group(1))
+    if part is None:
+        raise ValueError('No part named "{}"'.format(name))
+    if not match.group(3) and len(part.terminals) != 1:
+        raise ValueError(
+            'Part "{}" has several terminals, name one of {}'.format(
+                name, ", ".join('"{}[{}]"'.format(name, terminal)
+                                for terminal in sorted(part.terminals))))
+    try:
+        return schematic.get_terminal_by_name(name)
+    except KeyError:
+        raise ValueError('No terminal named "{}"'.format(name))
+
+
+def default_probes(schematic):
+    """Names of every probe of `schematic`, sorted."""
+    return sorted(part.name for part in schematic.parts
+                  if isinstance(part, logic.parts.ProbePart))
+
+
+def simulate(schematic, settings=(), stimulus=None, probes=None,
+             compiled=True):
+    """Simulates `schematic` and returns the states its probes see.
+
+    Arguments:
+        schematic: The `Schematic`, which is reset first.
+        settings: `(name, state)` pairs for switches and IO parts, applied
+            before every row.
+        stimulus: `(input_names, rows)` as returned by `read_stimulus()`, or
+            None to settle once.
+        probes: Names of the terminals to read, by default every probe.
+        compiled: Use the compiled simulator, which simulates aggregate
+            parts like `AggregatePart.update()` does.
+
+    Returns `(probe_names, rows)`, with one row of states per stimulus row.
+    """
+    if probes is None:
+        probes = default_probes(schematic)
+    probe_terms = [get_terminal(schematic, name) for name in probes]
+    names, rows = stimulus if stimulus is not None else ([], [[]])
+    setting_terms = [(get_terminal(schematic, name), state)
+                     for name, state in settings]
+    input_terms = [get_terminal(schematic, name) for name in names]
+
+    schematic.reset()
+    results = []
+    for row in rows:
+        for term, state in setting_terms:
+            term.output = state
+        for term, state in zip(input_terms, row):
+            term.output = state
+        schematic.update(compiled=compiled)
+        results.append([term.input for term in probe_terms])
+    return probes, results
+
+
+def write_text(out, filename, inputs, probes, rows, show_filename):
+    if show_filename:
+        out.write("# {}\n".format(filename))
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(list(inputs) + list(probes))
+    for row in rows:
+        writer.writerow([states.to_name(state) for state in row])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split("\n")[0])
+    parser.add_argument("schematics", nargs="+", metavar="SCHEM",
+                        help="schematic files to simulate")
+    parser.add_argument("-s", "--set", dest="settings", action="append",
+                        type=parse_setting, default=[], metavar="NAME=STATE",
+                        help="set a switch or IO part, can be repeated")
+    parser.add_argument("-i", "--stimulus",
+                        help="CSV file of input states, one row per step")
+    parser.add_argument("-p", "--probe", dest="probes", action="append",
+                        metavar="NAME",
+                        help="terminal to print, can be repeated (default: "
+                             "every probe)")
+    parser.add_argument("-o", "--output",
+                        help="file to write to (default: standard output)")
+    parser.add_argument("--json", action="store_true",
+                        help="write JSON instead of CSV")
+    parser.add_argument("--objects", action="store_true",
+                        help="simulate with the part and net objects "
+                             "instead of the compiled simulator")
+    args = parser.parse_args()
+
+    stimulus = read_stimulus(args.stimulus) if args.stimulus else None
+    inputs = stimulus[0] if stimulus else []
+    out = open(args.output, "w") if args.output else sys.stdout
+
+    failed = False
+    results = {}
+    for filename in args.schematics:
+        try:
+            schematic = logic.Schematic.from_file(filename)
+            probes, rows = simulate(schematic, args.settings, stimulus,
+                                    args.probes, not args.objects)
+        except (IOError, ValueError, AssertionError,
+                logic.OscillationError) as e:
+            print >>sys.stderr, 'Error simulating "{}": {}'.format(
+                filename, e)
+            failed = True
+            continue
+
+        if stimulus:
+            rows = [list(values) + row
+                    for values, row in zip(stimulus[1], rows)]
+        if args.json:
+            results[filename] = {
+                "inputs": inputs,
+                "probes": probes,
+                "rows": [[states.to_name(state) for state in row]
+                         for row in rows],
+            }
+        else:
+            write_text(out, filename, inputs, probes, rows,
+                       len(args.schematics) > 1)
+
+    if args.json:
+        json.dump(results, out, indent=4, sort_keys=True)
+        out.write("\n")
+    if out is not sys.stdout:
+        out.close()
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import itertools
+import os
+import sys
+import unittest
+
+import numpy
+
+import logic
+from logic import batch
+from logic.states import FLOAT, HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+INPUTS = ["in0", "in1", "in2"]
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schematic = circuits.parity_chain(3)
+        self.stimulus = numpy.array(
+            list(itertools.product((FLOAT, HIGH, LOW), repeat=3)),
+            dtype=numpy.int8)
+
+    def expected(self):
+        """The output of each row, settled with `Schematic.update()`."""
+        results = []
+        for row in self.stimulus.tolist():
+            for name, state in zip(INPUTS, row):
+                self.schematic.get_terminal_by_name(name).output = state
+            self.schematic.update()
+            results.append([self.schematic.get_terminal_by_name("out").input])
+        return results
+
+    def test_sequential(self):
+        result = batch.run_batch(self.schematic, INPUTS, ["out"],
+                                 self.stimulus)
+        self.assertEqual(result.dtype, numpy.int8)
+        self.assertEqual(result.tolist(), self.expected())
+
+    def test_independent_rows(self):
+        # One word per net, so the 27 rows don't fill a pass
+        result = batch.run_batch(self.schematic, INPUTS, ["out"],
+                                 self.stimulus, independent_rows=True,
+                                 n_words=1)
+        self.assertEqual(result.tolist(), self.expected())
+
+    def test_several_passes(self):
+        stimulus = numpy.tile(self.stimulus, (5, 1))
+        runner = batch.BatchRunner(self.schematic, INPUTS, ["out"])
+        result = runner.run(stimulus, independent_rows=True, n_words=1)
+        self.assertEqual(len(result), len(stimulus))
+        self.assertEqual(result.tolist(), self.expected() * 5)
+
+    def test_state_names(self):
+        names = numpy.array([["high", "low", "low"], ["high", "high", "low"]])
+        result = batch.run_batch(self.schematic, INPUTS, ["out"], names)
+        self.assertEqual(result.tolist(), [[HIGH], [LOW]])
+
+    def test_schematic_untouched(self):
+        batch.run_batch(self.schematic, INPUTS, ["out"], self.stimulus)
+        for part in self.schematic.parts:
+            for term in part.terminals.itervalues():
+                self.assertEqual(term.input, FLOAT)
+
+    def test_inputs_must_be_sources(self):
+        s = logic.Schematic()
+        probe = logic.parts.ProbePart(name="p")
+        s.add_part(probe)
+        self.assertRaises(ValueError, batch.BatchRunner, s, ["p"], ["p"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import random
+import sys
+import unittest
+
+import logic
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+def uncached_bbox(item):
+    """Bounding box of a part or net, computed from scratch."""
+    if isinstance(item, logic.Part):
+        return item.rect_object_to_schematic(item._get_bbox())
+    xs = [node.pos[0] for node in item.nodes]
+    ys = [node.pos[1] for node in item.nodes]
+    return (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+
+def uncached_schematic_bbox(schematic):
+    left = top = float('inf')
+    right = bottom = float('-inf')
+    for item in list(schematic.parts) + list(schematic.nets):
+        x, y, width, height = uncached_bbox(item)
+        left, top = min(left, x), min(top, y)
+        right, bottom = max(right, x + width), max(bottom, y + height)
+    return (left, top, right - left, bottom - top)
+
+
+class ClipContext(object):
+    """Just enough of a cairo context for `Schematic._get_visible_items()`."""
+
+    def __init__(self, extents):
+        self.extents = extents
+
+    def clip_extents(self):
+        return self.extents
+
+
+class BBoxTest(unittest.TestCase):
+
+    def test_random_edits(self):
+        rng = random.Random(5)
+        for schematic in (circuits.ripple_carry_adder(2),
+                          circuits.nand_array(3, 3)[0]):
+            schematic.get_bbox()
+            for step in range(60):
+                parts = sorted(schematic.parts, key=lambda p: p.name)
+                part = rng.choice(parts)
+                r = rng.random()
+                if r < 0.5:
+                    part.pos = part.pos + (rng.randint(-8, 8),
+                                           rng.randint(-8, 8))
+                elif r < 0.7:
+                    part.rotate(90)
+                elif r < 0.8:
+                    part.scale *= rng.choice((0.5, 2))
+                elif r < 0.9 and len(parts) > 3:
+                    schematic.remove(part)
+                else:
+                    schematic.add_part(logic.parts.NmosTransistorPart(
+                        pos=(rng.randint(-30, 30), rng.randint(-30, 30))))
+
+                self.assertEqual(schematic.get_bbox(),
+                                 uncached_schematic_bbox(schematic))
+                for item in list(schematic.parts) + list(schematic.nets):
+                    self.assertEqual(item.get_bbox(), uncached_bbox(item))
+
+    def test_nested(self):
+        schematic = circuits.nand_array(2, 2)[0]
+        aggregate = [part for part in schematic.parts
+                     if isinstance(part, logic.parts.AggregatePart)][0]
+        before = schematic.get_bbox(), aggregate.get_bbox()
+
+        inner = sorted(aggregate.schematic.parts, key=lambda p: p.name)[0]
+        inner.pos = inner.pos + (50, 0)
+        self.assertNotEqual((schematic.get_bbox(), aggregate.get_bbox()),
+                            before)
+        self.assertEqual(aggregate.get_bbox(),
+                         uncached_bbox(aggregate))
+        self.assertEqual(schematic.get_bbox(),
+                         uncached_schematic_bbox(schematic))
+
+    def test_visible_items(self):
+        for n in (2, 20):
+            schematic = circuits.nand_array(n, n)[0]
+            x, y, width, height = schematic.get_bbox()
+            parts, nets = schematic._get_visible_items(
+                ClipContext((x, y, x + width, y + height)))
+            self.assertEqual(set(parts), schematic.parts)
+            self.assertEqual(set(nets), schematic.nets)
+
+            clip = (x, y, x + width / 4, y + height / 4)
+            parts, nets = schematic._get_visible_items(ClipContext(clip))
+            self.assertTrue(parts)
+            self.assertLess(len(parts), len(schematic.parts))
+            for item in parts + nets:
+                bx, by, bwidth, bheight = item.get_bbox()
+                self.assertTrue(bx <= clip[2] + logic.schematic.DRAW_MARGIN)
+                self.assertTrue(by <= clip[3] + logic.schematic.DRAW_MARGIN)
+
+
+if __name__ == "__main__":
+    unittest.main()
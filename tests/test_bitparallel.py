@@ -0,0 +1,62 @@
+import itertools
+import os
+import sys
+import unittest
+
+import numpy
+
+from logic import bitparallel, compiled
+from logic.states import ALL, FLOAT, HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+class BitParallelTest(unittest.TestCase):
+
+    def test_pack_unpack(self):
+        states = numpy.array(list(ALL) * 40, dtype=numpy.int8)
+        high, low = bitparallel.pack(states, 3)
+        self.assertEqual(high.shape, (3,))
+        unpacked = bitparallel.unpack(high, low)
+        self.assertEqual(len(unpacked), 3*64)
+        self.assertEqual(unpacked[:len(states)].tolist(), states.tolist())
+        self.assertFalse(unpacked[len(states):].any())
+
+    def test_lanes_match_event_driven(self):
+        schematic = circuits.parity_chain(4)
+        netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+        inputs = [netlist.term_index[
+            schematic.get_terminal_by_name("in{}".format(i))]
+            for i in range(4)]
+        rows = list(itertools.product((FLOAT, HIGH, LOW), repeat=4))
+
+        sim = bitparallel.BitParallelSimulator(netlist, n_words=2)
+        sim.reset()
+        for i, t in enumerate(inputs):
+            sim.set_output(t, [row[i] for row in rows])
+        sim.settle()
+
+        for lane, row in enumerate(rows):
+            reference = compiled.Simulator(netlist)
+            for t, state in zip(inputs, row):
+                reference.set_output(t, state)
+            reference.settle()
+            for t in xrange(netlist.n_terminals):
+                if netlist.term_net[t] >= 0 and netlist.term_part[t] >= 0:
+                    self.assertEqual(sim.get_input(t)[lane],
+                                     reference.inputs[t])
+            for n in xrange(netlist.n_nets):
+                self.assertEqual(sim.get_net(n)[lane],
+                                 reference.net_values[n])
+
+    def test_needs_flat_netlist(self):
+        schematic = circuits.parity_chain(2)
+        netlist = compiled.Netlist.from_schematic(schematic)
+        self.assertRaises(ValueError, bitparallel.BitParallelSimulator,
+                          netlist)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import itertools
+import unittest
+
+import logic
+from logic import compiled
+from logic.states import FLOAT, HIGH, LOW
+
+
+def terminal_states(schematic, prefix=""):
+    """Returns `{name: (output, input)}` for every terminal and `{nets:
+    value}` for every net, including the ones inside aggregate parts."""
+    states = {}
+    for part in schematic.parts:
+        for term in part.terminals.itervalues():
+            states[prefix + str(term)] = (term.output, term.input)
+        if isinstance(part, logic.parts.AggregatePart):
+            part.sync_schematic()
+            states.update(terminal_states(part.schematic,
+                                          prefix + part.name + "/"))
+    for net in schematic.nets:
+        names = ",".join(sorted(str(term) for term in net.terminals))
+        states[prefix + names] = net._output
+    return states
+
+
+def io_parts(schematic):
+    return sorted((part for part in schematic.parts
+                   if isinstance(part, logic.parts.IOPart)),
+                  key=lambda part: part.name)
+
+
+class CompiledTest(unittest.TestCase):
+
+    def test_library_parts(self):
+        # Every combination of inputs on the schematic of every library
+        # part, starting from the state the last combination left
+        for part_type in ("And", "Nand", "Nor", "Not", "Or", "Xor"):
+            schematics = [logic.part_library[part_type]().schematic
+                          for i in range(3)]
+            modes = [{}, {"compiled": True},
+                     {"compiled": True, "flatten": True}]
+            inputs = [part for part in io_parts(schematics[0])
+                      if part.name != "out"]
+            for values in itertools.product((FLOAT, HIGH, LOW),
+                                            repeat=len(inputs)):
+                for schematic, mode in zip(schematics, modes):
+                    for part, value in zip(io_parts(schematic), values):
+                        part["term"].output = value
+                    schematic.update(**mode)
+                expected = terminal_states(schematics[0])
+                for schematic in schematics[1:]:
+                    self.assertEqual(terminal_states(schematic), expected)
+
+    def test_netlist(self):
+        s = logic.Schematic()
+        switch = logic.parts.SwitchPart()
+        not_ = logic.part_library["Not"]()
+        probe = logic.parts.ProbePart()
+        s.add_parts(switch, not_, probe)
+        s.connect(switch["term"], not_["in"])
+        s.connect(not_["out"], probe["term"])
+
+        netlist = compiled.Netlist.from_schematic(s)
+        self.assertEqual((netlist.n_parts, netlist.n_nets), (3, 2))
+        self.assertEqual(len(netlist.subnetlists), 1)
+        self.assertFalse(netlist.flattened)
+
+        flat = compiled.Netlist.from_schematic(s, flatten=True)
+        self.assertTrue(flat.flattened)
+        self.assertEqual(flat.subnetlists, {})
+        kinds = flat.part_kind.tolist()
+        self.assertEqual(kinds.count(compiled.KIND_NMOS), 1)
+        self.assertEqual(kinds.count(compiled.KIND_PMOS), 1)
+
+    def test_simulator_kept_until_structure_changes(self):
+        s = logic.part_library["Nand"]().schematic
+        s.update(compiled=True)
+        sim = s._simulator
+        s.update(compiled=True)
+        self.assertIs(s._simulator, sim)
+        s.add_part(logic.parts.ProbePart())
+        s.update(compiled=True)
+        self.assertIsNot(s._simulator, sim)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+
+import logic
+from logic import convergence
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+MODES = [{}, {"compiled": True}, {"compiled": True, "flatten": True}]
+
+
+def ring_oscillator():
+    """A Nand and two Nots in a ring, enabled by a switch starting LOW."""
+    s = logic.Schematic()
+    switch = logic.parts.SwitchPart(outputs=["low", "high"])
+    nand = logic.part_library["Nand"]()
+    not1 = logic.part_library["Not"]()
+    not2 = logic.part_library["Not"]()
+    s.add_parts(switch, nand, not1, not2)
+    s.connect(switch["term"], nand["in1"])
+    s.connect(nand["out"], not1["in"])
+    s.connect(not1["out"], not2["in"])
+    s.connect(not2["out"], nand["in2"])
+    return s, switch
+
+
+class ConvergenceTest(unittest.TestCase):
+
+    def test_ring_oscillator(self):
+        for mode in MODES:
+            s, switch = ring_oscillator()
+            s.update(**mode)
+            switch.on_activate()
+            with self.assertRaises(logic.OscillationError) as context:
+                s.update(**mode)
+            self.assertIn("Oscillating", str(context.exception))
+            self.assertTrue(context.exception.nets)
+            for net in context.exception.nets:
+                self.assertIsInstance(net, logic.Net)
+
+    def test_max_events(self):
+        for mode in MODES:
+            s, switches = circuits.inverter_chains(2, 20)
+            with self.assertRaises(logic.OscillationError) as context:
+                s.update(max_events=10, **mode)
+            self.assertIn("10 events", str(context.exception))
+
+    def test_settles(self):
+        for mode in MODES:
+            s, switches = circuits.inverter_chains(3, 20)
+            for switch in switches:
+                switch.on_activate()
+                s.update(**mode)
+
+    def test_keys(self):
+        detector = convergence.CycleDetector()
+        self.assertEqual(detector.key(3, 1), detector.key(3, 1))
+        self.assertNotEqual(detector.key(3, 1), detector.key(3, 2))
+        self.assertEqual(detector.hash_outputs([(1, 2), (3, 1)]),
+                         detector.key(1, 2) ^ detector.key(3, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+import logic
+from logic.parts import LinesPart
+
+
+class PartCopyTest(unittest.TestCase):
+
+    def test_mutable_fields_not_shared(self):
+        lines = LinesPart(points=[[0, 0], [1, 0], [1, 1]], color=[0, 0, 0])
+        copy = lines.copy()
+        copy.points.append([0, 1])
+        copy.points[0][1] = 5
+        copy.color[0] = 1
+        self.assertEqual(lines.points, [[0, 0], [1, 0], [1, 1]])
+        self.assertEqual(lines.color, [0, 0, 0])
+
+    def test_terminals_belong_to_copy(self):
+        nand = logic.part_library["Nand"]()
+        copy = nand.copy()
+        self.assertEqual(sorted(copy.terminals), sorted(nand.terminals))
+        for name, term in copy.terminals.iteritems():
+            self.assertIs(term.part, copy)
+            self.assertIsNot(term, nand[name])
+        for external, internal in copy.terminal_pairs:
+            self.assertIs(external.part, copy)
+            self.assertIn(internal.part, copy.schematic.parts)
+        self.assertIsNot(copy.schematic, nand.schematic)
+        self.assertIs(copy.schematic.parent_part, copy)
+
+    def test_copy_is_detached(self):
+        s = logic.Schematic()
+        part = logic.parts.NmosTransistorPart(pos=(1, 2))
+        s.add_part(part)
+        copy = part.copy()
+        self.assertIsNone(copy.parent_schematic)
+        copy.pos = (3, 4)
+        self.assertEqual(tuple(part.pos), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+import unittest
+
+import logic
+from logic import compiled, parallel
+from logic.states import FLOAT, HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+def terminal_states(schematic, prefix=""):
+    """Returns `{name: (output, input)}` for every terminal, including the
+    ones inside aggregate parts."""
+    states = {}
+    for part in schematic.parts:
+        for name, term in part.terminals.iteritems():
+            states[prefix + str(term)] = (term.output, term.input)
+        if isinstance(part, logic.parts.AggregatePart):
+            part.sync_schematic()
+            states.update(terminal_states(part.schematic,
+                                          prefix + part.name + "/"))
+    return states
+
+
+def inputs(schematic):
+    return sorted((part for part in schematic.parts
+                   if isinstance(part, logic.parts.IOPart) and
+                   part.name[0] in "abci"),
+                  key=lambda part: part.name)
+
+
+class FlattenTest(unittest.TestCase):
+
+    def check_terminals(self, make):
+        modes = [{}, {"compiled": True},
+                 {"compiled": True, "flatten": True}]
+        schematics = [make() for mode in modes]
+        rng = random.Random(3)
+        for step in range(10):
+            i = rng.randrange(len(inputs(schematics[0])))
+            value = rng.choice((HIGH, LOW, FLOAT))
+            for schematic, mode in zip(schematics, modes):
+                inputs(schematic)[i]["term"].output = value
+                schematic.update(**mode)
+
+            expected = terminal_states(schematics[0])
+            for schematic in schematics[1:]:
+                self.assertEqual(terminal_states(schematic), expected)
+
+    def test_adder_terminals(self):
+        self.check_terminals(lambda: circuits.ripple_carry_adder(2))
+
+    def test_parity_terminals(self):
+        self.check_terminals(lambda: circuits.parity_chain(4))
+
+    def test_parallel_write_back(self):
+        reference = circuits.parity_chain(4)
+        schematic = circuits.parity_chain(4)
+        values = [HIGH, FLOAT, LOW, HIGH]
+        for part, value in zip(inputs(reference), values):
+            part["term"].output = value
+        reference.update()
+
+        netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+        with parallel.ParallelSimulator(netlist, 2) as sim:
+            for part, value in zip(inputs(schematic), values):
+                sim.set_output(netlist.term_index[part["term"]], value)
+            sim.settle()
+            sim.write_back()
+        self.assertEqual(terminal_states(schematic),
+                         terminal_states(reference))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import random
+import sys
+import unittest
+
+import logic
+from logic import compiled, gatelevel
+from logic.states import HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+def adder():
+    s = circuits.ripple_carry_adder(3)
+    inputs = [part for part in s.parts
+              if isinstance(part, logic.parts.IOPart) and part.name[0] in "abc"]
+    return s, sorted(inputs, key=lambda part: part.name)
+
+
+def nand_array():
+    return circuits.nand_array(3, 3)
+
+
+def inverter_chains():
+    return circuits.inverter_chains(3, 5)[:2]
+
+
+def run(make, seed, **kwargs):
+    """Drives random values into the inputs of a generated circuit, one at
+    a time, and returns the values of the terminals of every part that
+    isn't a transistor after each step, up to an oscillation."""
+    schematic, drivers = make()
+    rng = random.Random(seed)
+    results = []
+    for step in range(15):
+        rng.choice(drivers)["term"].output = rng.choice((HIGH, LOW))
+        try:
+            schematic.update(compiled=True, **kwargs)
+        except logic.OscillationError:
+            break
+        results.append(sorted(
+            (part.name, term.name, term.input, term.output)
+            for part in schematic.parts
+            if part.part_type not in ("NmosTransistor", "PmosTransistor")
+            for term in part.terminals.itervalues()))
+    return results
+
+
+class GateLevelTest(unittest.TestCase):
+
+    def test_settles_like_switch_level(self):
+        for make in (adder, nand_array, inverter_chains):
+            for seed in range(10):
+                switch_level = run(make, seed, flatten=True)
+                gate_level = run(make, seed, gates=True)
+
+                # Only whether and when it oscillates may differ
+                n_steps = min(len(switch_level), len(gate_level))
+                self.assertEqual(switch_level[:n_steps],
+                                 gate_level[:n_steps])
+
+    def test_finds_gates(self):
+        s = circuits.nand_array(2, 2)[0]
+        netlist = compiled.Netlist.from_schematic(s, flatten=True)
+        self.assertEqual(len(gatelevel.find_gates(netlist)), 4)
+
+    def test_cell_output_not_replaced(self):
+        # The output of a library cell's own schematic is an IO part, which
+        # could drive it from outside
+        s = logic.part_library["Nand"]().schematic
+        netlist = compiled.Netlist.from_schematic(s, flatten=True)
+        self.assertEqual(gatelevel.find_gates(netlist), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
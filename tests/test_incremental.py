@@ -0,0 +1,74 @@
+import os
+import random
+import sys
+import unittest
+
+import logic
+from logic.states import HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+def io_values(schematic):
+    """Returns the value seen by each IO part, by name."""
+    return dict((part.name, part["term"].input) for part in schematic.parts
+                if isinstance(part, logic.parts.IOPart))
+
+
+def drive(schematic, values):
+    for name, value in values.iteritems():
+        schematic.get_part_by_name(name)["term"].output = value
+
+
+class IncrementalUpdateTest(unittest.TestCase):
+
+    def test_matches_full_update(self):
+        n_bits = 3
+        inputs = ["cin"] + ["{}{}".format(c, i) for i in range(n_bits)
+                            for c in "ab"]
+        incremental = circuits.ripple_carry_adder(n_bits)
+        compiled = circuits.ripple_carry_adder(n_bits)
+        full = circuits.ripple_carry_adder(n_bits)
+
+        rng = random.Random(1)
+        for step in range(40):
+            # Change one input at a time, so most of the circuit stays
+            # settled. Changing both inputs of a transistor-level Xor at once
+            # can make it oscillate.
+            values = {rng.choice(inputs): rng.choice((HIGH, LOW))}
+            for schematic in (incremental, compiled, full):
+                drive(schematic, values)
+            incremental.update()
+            compiled.update(compiled=True)
+            full.update(full=True)
+            expected = io_values(full)
+            self.assertEqual(io_values(incremental), expected)
+            self.assertEqual(io_values(compiled), expected)
+
+    def test_remove_then_update(self):
+        for compiled in (False, True):
+            s, switches = circuits.nand_array(2, 2)
+            s.update(compiled=compiled)
+
+            switch = switches[0]
+            switch.on_activate()
+            s.remove(switch)
+            switch.on_activate()
+            self.assertNotIn(switch["term"], s._dirty_terminals)
+            s.update(compiled=compiled)
+
+            # Terminals of parts outside the schematic are ignored
+            s.mark_dirty(switch["term"])
+            self.assertNotIn(switch["term"], s._dirty_terminals)
+            switches[1].on_activate()
+            s.update(compiled=compiled)
+
+            reference = s.copy()
+            reference.update(full=True)
+            self.assertEqual(io_values(s), io_values(reference))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import logic
+from logic.partlib import PartLibrary
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHECK_IMPORTS = """
+import sys
+import logic
+print sorted(name for name in sys.modules
+             if name.split(".")[0] in ("gtk", "gobject", "cairo") or
+             name in ("logic.schematicwidget", "logic.interface"))
+"""
+
+
+class LazyImportTest(unittest.TestCase):
+
+    def test_no_gui_imports(self):
+        output = subprocess.check_output([sys.executable, "-c",
+                                          CHECK_IMPORTS], cwd=ROOT)
+        self.assertEqual(output.strip(), "[]")
+
+    def test_package_names(self):
+        for name in ("sys", "types", "_LazyModule__original"):
+            self.assertFalse(hasattr(logic, name), name)
+        self.assertIn("SchematicWidget", dir(logic))
+        self.assertIn("Schematic", dir(logic))
+        self.assertRaises(AttributeError, getattr, logic, "not_a_name")
+
+    def test_library_loaded_on_lookup(self):
+        library = PartLibrary([logic.parts.ProbePart])
+        library.load_folder(os.path.join(ROOT, "logic", "part_library"),
+                            lazy=True)
+        self.assertEqual(dict.__len__(library), 1)
+        self.assertIn("Nand", library)
+        self.assertGreater(dict.__len__(library), 1)
+        self.assertEqual(list(library)[0], "Probe")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import random
+import sys
+import unittest
+
+import logic
+from logic.states import HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+def evaluate(part, value):
+    """Sets every input of a 2 input gate to `value` and returns its output."""
+    part["in1"].input = part["in2"].input = value
+    part.update()
+    return part["out"].output
+
+
+def run(schematic, drivers, seed, n_steps=15):
+    """Drives random values into `drivers`, one at a time, and returns the
+    values of every terminal after each step, up to an oscillation."""
+    rng = random.Random(seed)
+    results = []
+    for step in range(n_steps):
+        rng.choice(drivers)["term"].output = rng.choice((HIGH, LOW))
+        try:
+            schematic.update()
+        except logic.OscillationError:
+            break
+        results.append(sorted((part.name, term.name, term.input, term.output)
+                              for part in schematic.parts
+                              for term in part.terminals.itervalues()))
+    return results
+
+
+class MemoTest(unittest.TestCase):
+
+    def setUp(self):
+        logic.memo.clear()
+        logic.parts.AggregatePart.memoize = True
+
+    def tearDown(self):
+        logic.memo.clear()
+        logic.parts.AggregatePart.memoize = False
+
+    def test_same_part_type_different_schematic(self):
+        nand = logic.part_library["Nand"]()
+        self.assertEqual(evaluate(nand, HIGH), LOW)
+
+        # An And schematic under the name of a Nand must not get the outputs
+        # of the Nand's table
+        schematic = logic.part_library["And"]().schematic.copy()
+        fake = logic.parts.AggregatePart(schematic, "Nand")
+        plain = logic.parts.AggregatePart(schematic.copy(), "Nand")
+        plain.memoize = False
+        self.assertEqual(evaluate(plain, HIGH), HIGH)
+        self.assertEqual(evaluate(fake, HIGH), HIGH)
+
+    def test_copies_share_a_table(self):
+        parts = [logic.part_library["Nand"]() for i in range(3)]
+        for part in parts:
+            evaluate(part, HIGH)
+        entries, hits, misses = logic.memo.stats()["Nand"]
+        self.assertEqual((entries, hits, misses), (1, 2, 1))
+
+    def test_settles_like_unmemoized(self):
+        def adder():
+            s = circuits.ripple_carry_adder(3)
+            inputs = [part for part in s.parts
+                      if isinstance(part, logic.parts.IOPart) and
+                      part.name[0] in "abc"]
+            return s, sorted(inputs, key=lambda part: part.name)
+
+        def nand_array():
+            return circuits.nand_array(3, 3)
+
+        for make in (adder, nand_array):
+            for seed in range(10):
+                logic.parts.AggregatePart.memoize = False
+                plain = run(*make(), seed=seed)
+                logic.parts.AggregatePart.memoize = True
+                memoized = run(*make(), seed=seed)
+
+                # Only whether and when it oscillates may differ
+                n_steps = min(len(plain), len(memoized))
+                self.assertEqual(plain[:n_steps], memoized[:n_steps])
+
+
+class MemoDefaultTest(unittest.TestCase):
+
+    def test_off_by_default(self):
+        logic.memo.clear()
+        evaluate(logic.part_library["Nand"](), HIGH)
+        self.assertEqual(logic.memo.stats(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import logic
+from logic.parts import NmosTransistorPart, SwitchPart
+
+
+class NameIndexTest(unittest.TestCase):
+
+    def test_unique_names(self):
+        s = logic.Schematic()
+        parts = [NmosTransistorPart() for i in range(3)]
+        s.add_parts(*parts)
+        self.assertEqual([p.name for p in parts],
+                         ["NmosTransistor-0", "NmosTransistor-1",
+                          "NmosTransistor-2"])
+        for part in parts:
+            self.assertIs(s.get_part_by_name(part.name), part)
+
+        # Numbers of removed parts aren't reused
+        s.remove(parts[1])
+        part = NmosTransistorPart()
+        s.add_part(part)
+        self.assertEqual(part.name, "NmosTransistor-3")
+        self.assertIsNone(s.get_part_by_name("NmosTransistor-1"))
+
+    def test_skips_taken_names(self):
+        s = logic.Schematic()
+        taken = NmosTransistorPart(name="NmosTransistor-0")
+        s.add_part(taken)
+        part = NmosTransistorPart()
+        s.add_part(part)
+        self.assertEqual(part.name, "NmosTransistor-1")
+
+    def test_rename(self):
+        s = logic.Schematic()
+        part = NmosTransistorPart()
+        s.add_part(part)
+        old_name = part.name
+        part.name = "m1"
+        self.assertIs(s.get_part_by_name("m1"), part)
+        self.assertIsNone(s.get_part_by_name(old_name))
+        self.assertIs(s.get_terminal_by_name("m1[gate]"), part["gate"])
+
+    def test_rename_after_remove(self):
+        s = logic.Schematic()
+        sw = SwitchPart()
+        s.add_part(sw)
+        s.remove(sw)
+        self.assertIsNone(sw.parent_schematic)
+        sw.name = "ghost"
+        self.assertIsNone(s.get_part_by_name("ghost"))
+
+    def test_shared_names(self):
+        s = logic.Schematic()
+        first = NmosTransistorPart(name="m")
+        second = NmosTransistorPart(name="m")
+        s.add_parts(first, second)
+        s.remove(s.get_part_by_name("m"))
+        self.assertIn(s.get_part_by_name("m"), (first, second))
+        self.assertIn(s.get_part_by_name("m"), s.parts)
+
+
+if __name__ == "__main__":
+    unittest.main()
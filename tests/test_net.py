@@ -0,0 +1,57 @@
+import os
+import random
+import sys
+import unittest
+
+from logic.states import ALL, FLOAT, HIGH, LOW, CONTENTION
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+class NetUpdateTest(unittest.TestCase):
+
+    def test_each_terminal_sees_the_others(self):
+        s, rail = circuits.wide_rail(50)
+        terms = list(rail.terminals)
+        rng = random.Random(0)
+        for i in range(20):
+            for term in terms:
+                term._output = rng.choice(ALL)
+            rail.update()
+
+            expected_net = FLOAT
+            for term in terms:
+                expected_net |= term.output
+            self.assertEqual(rail._output, expected_net)
+            for term in terms:
+                others = FLOAT
+                for other in terms:
+                    if other is not term:
+                        others |= other.output
+                self.assertEqual(term.input, others)
+
+    def test_single_driver(self):
+        s, rail = circuits.wide_rail(4)
+        terms = list(rail.terminals)
+        for term in terms:
+            term._output = FLOAT
+        driver = terms[0]
+        driver._output = HIGH
+        self.assertTrue(rail.update())
+        self.assertEqual(driver.input, FLOAT)
+        for term in terms[1:]:
+            self.assertEqual(term.input, HIGH)
+        self.assertFalse(rail.update())
+
+        terms[1]._output = LOW
+        self.assertTrue(rail.update())
+        self.assertEqual(rail._output, CONTENTION)
+        self.assertEqual(driver.input, LOW)
+        self.assertEqual(terms[1].input, HIGH)
+        self.assertEqual(terms[2].input, CONTENTION)
+
+
+if __name__ == "__main__":
+    unittest.main()
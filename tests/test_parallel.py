@@ -0,0 +1,74 @@
+import os
+import random
+import sys
+import unittest
+
+import logic
+from logic import compiled, parallel
+from logic.states import HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+class UpdatingProbe(logic.parts.ProbePart):
+
+    def update(self):
+        pass
+
+
+class ParallelSimulatorTest(unittest.TestCase):
+
+    def test_partitions_cover_parts(self):
+        schematic, switches = circuits.inverter_chains(4, 5)
+        netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+        partitions = parallel.partition_parts(netlist, 3)
+        self.assertEqual(len(partitions), 3)
+        self.assertEqual(sorted(p for parts in partitions for p in parts),
+                         range(netlist.n_parts))
+
+    def test_matches_simulator(self):
+        schematic, switches = circuits.inverter_chains(6, 7)
+        netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+        terms = [netlist.term_index[switch["term"]] for switch in switches]
+        rng = random.Random(0)
+        for n_workers in (1, 3):
+            reference = compiled.Simulator(netlist)
+            with parallel.ParallelSimulator(netlist, n_workers) as sim:
+                for step in range(4):
+                    for t in rng.sample(terms, 3):
+                        value = rng.choice((HIGH, LOW))
+                        reference.set_output(t, value)
+                        sim.set_output(t, value)
+                    reference.settle()
+                    sim.settle()
+                    self.assertEqual(sim.outputs, reference.outputs)
+                    self.assertEqual(sim.inputs, reference.inputs)
+                    self.assertEqual(sim.net_values, reference.net_values)
+
+    def test_write_back(self):
+        schematic = circuits.parity_chain(4)
+        netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+        reference = compiled.Simulator(netlist)
+        reference.settle()
+        reference.write_back()
+        expected = [(term.output, term.input)
+                    for term in netlist.term_objects]
+
+        schematic.reset()
+        with parallel.ParallelSimulator(netlist, 2) as sim:
+            sim.settle()
+            sim.write_back()
+        self.assertEqual([(term.output, term.input)
+                          for term in netlist.term_objects], expected)
+
+    def test_rejects_object_parts(self):
+        schematic, switches = circuits.inverter_chains(1, 2)
+        schematic.add_part(UpdatingProbe())
+        netlist = compiled.Netlist.from_schematic(schematic, flatten=True)
+        self.assertRaises(ValueError, parallel.ParallelSimulator, netlist, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
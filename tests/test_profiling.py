@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+
+import logic
+from logic import profiling
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def test_active(self):
+        self.assertIsNone(profiling.active)
+        with profiling.Profiler() as outer:
+            self.assertIs(profiling.active, outer)
+            with profiling.Profiler() as inner:
+                self.assertIs(profiling.active, inner)
+            self.assertIs(profiling.active, outer)
+        self.assertIsNone(profiling.active)
+
+    def test_counts(self):
+        schematic, switches = circuits.inverter_chains(2, 3)
+        schematic.update()
+        with profiling.Profiler() as profiler:
+            switches[0].on_activate()
+            schematic.update()
+        self.assertEqual(profiler.updates, 1)
+
+        # Only the first chain had anything to do
+        chain = set(part.name for part in profiler.parts)
+        self.assertIn(switches[0].name, chain)
+        self.assertNotIn(switches[1].name, chain)
+        for part_type in ("NmosTransistor", "PmosTransistor"):
+            self.assertEqual(
+                profiler.part_types[part_type].evaluations,
+                sum(stats.evaluations
+                    for part, stats in profiler.parts.iteritems()
+                    if part.part_type == part_type))
+        self.assertTrue(any(stats.flips for stats in profiler.nets.values()))
+
+        hot = profiler.hot_spots("parts", by="evaluations", limit=3)
+        self.assertEqual(len(hot), 3)
+        self.assertEqual([s.evaluations for s in hot],
+                         sorted([s.evaluations for s in hot], reverse=True))
+        self.assertIn("schematic updates", profiler.report())
+
+    def test_aggregate_names(self):
+        schematic = circuits.ripple_carry_adder(1)
+        with profiling.Profiler() as profiler:
+            schematic.update()
+        self.assertGreater(profiler.updates, 1)
+        aggregates = [part for part in schematic.parts
+                      if isinstance(part, logic.parts.AggregatePart)]
+        self.assertTrue(aggregates)
+        names = [stats.name for stats in profiler.parts.itervalues()]
+        for part in aggregates:
+            self.assertIn(part, profiler.parts)
+            self.assertTrue(any(name.startswith(part.name + "/")
+                                for name in names))
+
+    def test_compiled_not_recorded(self):
+        schematic, switches = circuits.inverter_chains(1, 3)
+        with profiling.Profiler() as profiler:
+            schematic.update(compiled=True)
+        self.assertEqual(profiler.parts, {})
+        self.assertEqual(profiler.nets, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
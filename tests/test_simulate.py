@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+import logic
+from logic.states import HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import simulate
+
+
+def make_inverter():
+    """A library Not between an IO part "a" and a probe "y"."""
+    s = logic.Schematic()
+    a = logic.parts.IOPart(name="a")
+    not_ = logic.part_library["Not"](name="not")
+    y = logic.parts.ProbePart(name="y")
+    s.add_parts(a, not_, y)
+    s.connect(a["term"], not_["in"])
+    s.connect(not_["out"], y["term"])
+    return s
+
+
+class SimulateTest(unittest.TestCase):
+
+    def test_stimulus(self):
+        stimulus = (["a"], [[HIGH], [LOW]])
+        for compiled in (False, True):
+            probes, rows = simulate.simulate(make_inverter(), (), stimulus,
+                                             compiled=compiled)
+            self.assertEqual(probes, ["y"])
+            self.assertEqual(rows, [[LOW], [HIGH]])
+
+    def test_hierarchical_by_default(self):
+        s = make_inverter()
+        simulate.simulate(s, [("a", HIGH)])
+        self.assertFalse(s._simulator.netlist.flattened)
+
+    def test_multi_terminal_part(self):
+        with self.assertRaises(ValueError) as context:
+            simulate.get_terminal(make_inverter(), "not")
+        message = str(context.exception)
+        self.assertIn('"not"', message)
+        self.assertIn('"not[in]"', message)
+        self.assertIn('"not[out]"', message)
+
+    def test_bad_names(self):
+        s = make_inverter()
+        self.assertRaises(ValueError, simulate.get_terminal, s, "b")
+        self.assertRaises(ValueError, simulate.get_terminal, s, "not[x]")
+        self.assertIs(simulate.get_terminal(s, "not[in]"),
+                      s.get_part_by_name("not")["in"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import unittest
+
+import logic
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+class SpatialIndexTest(unittest.TestCase):
+
+    def test_scaled_net_on_cell_boundary(self):
+        # The wire is in the cells of row 0, but with scale 5 it can be hit
+        # up to 0.5 away, which is in row 1
+        s = logic.Schematic()
+        net = logic.Net((10, 1.7), (30, 1.7), scale=5)
+        s.add_net(net)
+        self.assertTrue(net.point_intersect((20, 2.1)))
+        self.assertIs(s.part_at_pos((20, 2.1)), net)
+
+    def test_scaled_part(self):
+        s = logic.Schematic()
+        part = logic.parts.NmosTransistorPart(pos=(0, 0))
+        s.add_part(part)
+        part.scale = 3
+        x, y, width, height = part.get_bbox()
+        point = (x + width / 2, y + height - 0.01)
+        self.assertTrue(part.point_intersect(point))
+        self.assertIs(s.part_at_pos(point), part)
+
+    def test_matches_linear_scan(self):
+        s = logic.Schematic.from_file(os.path.join(ROOT, "test.schem"))
+        x, y, width, height = s.get_bbox()
+        for i in range(21):
+            for j in range(21):
+                point = (x - 1 + (width + 2) * i / 20.0,
+                         y - 1 + (height + 2) * j / 20.0)
+                hits = [item for item in list(s.parts) + list(s.nets)
+                        if item.point_intersect(point)]
+                found = s.part_at_pos(point)
+                if hits:
+                    self.assertIn(found, hits)
+                else:
+                    self.assertIsNone(found)
+
+
+if __name__ == "__main__":
+    unittest.main()
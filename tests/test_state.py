@@ -0,0 +1,99 @@
+import os
+import sys
+import unittest
+
+import logic
+from logic import compiled
+from logic.states import HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+def adder(n_bits):
+    """A ripple carry adder with every input driven LOW."""
+    s = circuits.ripple_carry_adder(n_bits)
+    for name in ["cin"] + ["{}{}".format(c, i) for i in range(n_bits)
+                           for c in "ab"]:
+        s.get_part_by_name(name)["term"].output = LOW
+    return s
+
+
+def io_values(schematic):
+    return dict((part.name, part["term"].input) for part in schematic.parts
+                if isinstance(part, logic.parts.IOPart))
+
+
+class SchematicStateTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for use_compiled in (False, True):
+            s = adder(2)
+            s.get_part_by_name("a0")["term"].output = HIGH
+            s.update(compiled=use_compiled)
+            state = s.get_state()
+            expected = io_values(s)
+
+            s.get_part_by_name("b0")["term"].output = HIGH
+            s.update(compiled=use_compiled)
+            self.assertNotEqual(io_values(s), expected)
+
+            s.set_state(state)
+            self.assertEqual(io_values(s), expected)
+            self.assertEqual(s.get_state().tolist(), state.tolist())
+            s.update(compiled=use_compiled)
+            self.assertEqual(io_values(s), expected)
+
+    def test_pending_changes(self):
+        s = adder(2)
+        s.update()
+        s.get_part_by_name("cin")["term"].output = HIGH
+        state = s.get_state()
+        s.update()
+        expected = io_values(s)
+
+        s.get_part_by_name("cin")["term"].output = LOW
+        s.update()
+        s.set_state(state)
+        s.update()
+        self.assertEqual(io_values(s), expected)
+
+    def test_mismatch(self):
+        state = circuits.ripple_carry_adder(2).get_state()
+        s = circuits.ripple_carry_adder(3)
+        self.assertRaises(ValueError, s.set_state, state)
+
+
+class SimulatorStateTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        s = adder(2)
+        netlist = compiled.Netlist.from_schematic(s)
+        sim = compiled.Simulator(netlist)
+        cin = netlist.term_index[s.get_part_by_name("cin")["term"]]
+        sim.settle()
+        state = sim.get_state()
+        self.assertEqual(len(state), sim.state_size)
+        expected = (list(sim.outputs), list(sim.inputs),
+                    list(sim.net_values))
+
+        sim.set_output(cin, HIGH)
+        sim.settle()
+        sim.set_state(state)
+        self.assertEqual((sim.outputs, sim.inputs, sim.net_values), expected)
+        self.assertEqual(sim.get_state().tolist(), state.tolist())
+
+        # Restoring a settled state leaves nothing to do
+        sim.settle()
+        self.assertEqual((sim.outputs, sim.inputs, sim.net_values), expected)
+
+    def test_mismatch(self):
+        sim = compiled.Simulator(compiled.Netlist.from_schematic(
+            circuits.ripple_carry_adder(2)))
+        self.assertRaises(ValueError, sim.set_state,
+                          sim.get_state()[:-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+import logic
+from logic import states
+from logic.states import ALL, FLOAT, HIGH, LOW, CONTENTION
+
+
+class StatesTest(unittest.TestCase):
+
+    def test_names(self):
+        for state in ALL:
+            self.assertEqual(states.from_name(states.to_name(state)), state)
+        self.assertEqual(states.from_name("high"), HIGH)
+        self.assertRaises(ValueError, states.from_name, "HIGH")
+
+    def test_drivers_combine_with_or(self):
+        self.assertEqual(FLOAT | HIGH, HIGH)
+        self.assertEqual(HIGH | LOW, CONTENTION)
+        for state in ALL:
+            self.assertEqual(state | FLOAT, state)
+            self.assertEqual(state | CONTENTION, CONTENTION)
+
+    def test_colors(self):
+        self.assertEqual(len(states.NET_COLORS), len(ALL))
+        self.assertEqual(len(states.FILL_COLORS), len(ALL))
+
+    def test_switch_saves_names(self):
+        switch = logic.parts.SwitchPart(outputs=["low", "high"])
+        self.assertEqual(switch.outputs, (LOW, HIGH))
+        self.assertEqual(switch["term"].output, LOW)
+        self.assertEqual(switch.get_dict()["outputs"], ["low", "high"])
+
+        s = logic.Schematic()
+        s.add_part(switch)
+        copy = logic.Schematic.from_dict(s.get_dict())
+        self.assertEqual(list(copy.parts)[0].outputs, (LOW, HIGH))
+
+    def test_switch_cycles_outputs(self):
+        switch = logic.parts.SwitchPart()
+        seen = []
+        for i in range(len(ALL)):
+            seen.append(switch["term"].output)
+            switch.on_activate()
+        self.assertEqual(seen, list(ALL))
+        self.assertEqual(switch["term"].output, FLOAT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy
+
+import logic
+
+
+class AbsolutePosTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schematic = logic.Schematic()
+        self.part = logic.parts.NmosTransistorPart(pos=(2, 3))
+        self.probe = logic.parts.ProbePart(pos=(10, 10))
+        self.schematic.add_parts(self.part, self.probe)
+        self.schematic.connect(self.part["drain"], self.probe["term"])
+        self.term = self.part["drain"]
+
+    def expected(self, term):
+        return term.part.point_schematic_to_object(term.pos)
+
+    def test_cached(self):
+        pos = self.term.absolute_pos
+        numpy.testing.assert_allclose(pos, self.expected(self.term))
+        self.assertIs(self.term.absolute_pos, pos)
+
+    def test_follows_part(self):
+        for change in (lambda: setattr(self.part, "pos", (-4, 1)),
+                       lambda: self.part.rotate(90),
+                       lambda: setattr(self.part, "scale", 3)):
+            old_pos = self.term.absolute_pos
+            change()
+            numpy.testing.assert_allclose(self.term.absolute_pos,
+                                          self.expected(self.term))
+            self.assertFalse(numpy.allclose(self.term.absolute_pos, old_pos))
+            self.assertTrue(self.term.point_intersect(
+                numpy.array(self.term.absolute_pos)))
+
+        node = [node for node in self.term.net.nodes
+                if node.terminal is self.term][0]
+        numpy.testing.assert_allclose(node.pos, self.term.absolute_pos)
+
+    def test_copy(self):
+        self.term.absolute_pos
+        copy = self.part.copy()
+        copy.pos = (100, 100)
+        numpy.testing.assert_allclose(copy["drain"].absolute_pos,
+                                      self.expected(copy["drain"]))
+        numpy.testing.assert_allclose(self.term.absolute_pos,
+                                      self.expected(self.term))
+
+
+if __name__ == "__main__":
+    unittest.main()
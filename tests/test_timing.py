@@ -0,0 +1,97 @@
+import os
+import random
+import sys
+import unittest
+
+from logic import compiled, timing
+from logic.states import HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+class TimingWheelTest(unittest.TestCase):
+
+    def test_time_order(self):
+        wheel = timing.TimingWheel(n_slots=4)
+        rng = random.Random(0)
+        times = [rng.randrange(50) for i in range(100)]
+        for i, time in enumerate(times):
+            wheel.schedule(time, i)
+        self.assertEqual(len(wheel), len(times))
+
+        # Events can be added while running, also beyond the ring
+        first = min(times)
+        popped = []
+        added = False
+        while wheel.next_time() is not None:
+            now = wheel.now
+            popped.extend((now, i) for i in wheel.pop())
+            if not added:
+                added = True
+                wheel.schedule(now, "now")
+                wheel.schedule(now + 30, "later")
+        expected = sorted([(time, i) for i, time in enumerate(times)] +
+                          [(first, "now"), (first + 30, "later")])
+        self.assertEqual(sorted(popped), expected)
+        self.assertEqual([time for time, i in popped],
+                         [time for time, i in expected])
+        self.assertEqual(len(wheel), 0)
+
+    def test_no_events_in_the_past(self):
+        wheel = timing.TimingWheel()
+        wheel.schedule(5, "a")
+        wheel.next_time()
+        wheel.pop()
+        self.assertRaises(ValueError, wheel.schedule, 4, "b")
+
+
+class TimedSimulatorTest(unittest.TestCase):
+
+    def setUp(self):
+        schematic, switches = circuits.inverter_chains(1, 5)
+        self.netlist = compiled.Netlist.from_schematic(schematic)
+        self.switch = self.netlist.term_index[switches[0]["term"]]
+        probe = [part for part in schematic.parts
+                 if part.part_type == "Probe"][0]
+        self.probe_net = self.netlist.term_net[
+            self.netlist.term_index[probe["term"]]]
+
+    def test_delays_add_up(self):
+        sim = timing.TimedSimulator(
+            self.netlist, {"NmosTransistor": 3, "PmosTransistor": 3})
+        sim.settle()
+        self.assertEqual(sim.net_values[self.probe_net], HIGH)
+
+        changes = []
+        sim.net_listeners.append(
+            lambda time, n, value: changes.append((time, n, value)))
+        start = sim.time
+        sim.set_output(self.switch, HIGH)
+        sim.settle()
+        self.assertIn((start + 5*3, self.probe_net, LOW), changes)
+        self.assertEqual(sim.net_values[self.probe_net], LOW)
+
+        reference = compiled.Simulator(self.netlist)
+        reference.set_output(self.switch, HIGH)
+        reference.settle()
+        self.assertEqual(sim.net_values, reference.net_values)
+
+    def test_run_until(self):
+        sim = timing.TimedSimulator(self.netlist, default_delay=2)
+        sim.settle()
+        start = sim.time
+        sim.set_output(self.switch, HIGH)
+        sim.run(until=start + 5)
+        self.assertEqual(sim.net_values[self.probe_net], HIGH)
+        sim.run()
+        self.assertEqual(sim.net_values[self.probe_net], LOW)
+
+    def test_negative_delay(self):
+        self.assertRaises(ValueError, timing.TimedSimulator, self.netlist,
+                          {"NmosTransistor": -1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import math
+import random
+import unittest
+
+import numpy
+
+import logic
+
+
+def reference_point(part, point):
+    """Object to schematic space the way `Part.transform()` does it:
+    translate, scale, then rotate."""
+    angle = math.radians(part.rot)
+    x, y = point
+    x, y = (x*math.cos(angle) - y*math.sin(angle),
+            x*math.sin(angle) + y*math.cos(angle))
+    return (part.pos[0] + part.scale*x, part.pos[1] + part.scale*y)
+
+
+class TransformTest(unittest.TestCase):
+
+    def setUp(self):
+        self.part = logic.parts.NmosTransistorPart(pos=(3, -2), scale=2,
+                                                   rot=30)
+        rng = random.Random(0)
+        self.points = [(rng.uniform(-5, 5), rng.uniform(-5, 5))
+                       for i in range(20)]
+
+    def test_matches_reference(self):
+        for point in self.points:
+            numpy.testing.assert_allclose(
+                self.part.point_schematic_to_object(point),
+                reference_point(self.part, point))
+            numpy.testing.assert_allclose(
+                self.part.point_object_to_schematic(
+                    self.part.point_schematic_to_object(point)),
+                point, atol=1e-12)
+
+    def test_transform_points(self):
+        expected = [self.part.point_schematic_to_object(point)
+                    for point in self.points]
+        transformed = self.part.transform_points(self.points)
+        self.assertEqual(transformed.shape, (len(self.points), 2))
+        numpy.testing.assert_allclose(transformed, expected)
+        numpy.testing.assert_allclose(
+            self.part.transform_points(transformed, inverse=True),
+            self.points, atol=1e-12)
+
+    def test_rect(self):
+        part = logic.parts.NmosTransistorPart(pos=(1, 1), scale=2, rot=90)
+        numpy.testing.assert_allclose(
+            part.rect_object_to_schematic((0, 0, 2, 1)), (-1, 1, 2, 4),
+            atol=1e-12)
+
+    def test_invalidated(self):
+        part = self.part
+        for attribute, value in (("pos", (0, 5)), ("scale", 0.5),
+                                 ("rot", 270)):
+            matrix = part.get_transform()
+            inverse = part.get_inverse_transform()
+            version = part.version
+            setattr(part, attribute, value)
+            self.assertGreater(part.version, version)
+            self.assertIsNot(part.get_transform(), matrix)
+            self.assertIsNot(part.get_inverse_transform(), inverse)
+            numpy.testing.assert_allclose(
+                part.point_schematic_to_object((1, 2)),
+                reference_point(part, (1, 2)))
+
+    def test_pos_read_only(self):
+        with self.assertRaises(ValueError):
+            self.part.pos[0] = 10
+        self.part.pos = self.part.pos + (1, 0)
+        self.assertEqual(self.part.pos.tolist(), [4, -2])
+
+
+if __name__ == "__main__":
+    unittest.main()
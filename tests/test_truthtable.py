@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import logic
+from logic import truthtable, _json
+from logic.states import FLOAT, HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+LIBRARY = os.path.join(ROOT, "logic", "part_library")
+
+
+class TruthTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_parity_chain(self, n_inputs):
+        filename = os.path.join(self.directory, "parity.schem")
+        with open(filename, "w") as f:
+            json.dump(circuits.parity_chain(n_inputs).get_dict(), f,
+                      cls=_json.JsonEncoder)
+        return filename
+
+    def test_library_xor(self):
+        table = truthtable.generate(os.path.join(LIBRARY, "xor.schem"),
+                                    processes=1)
+        self.assertEqual(table.input_names, ["in1", "in2"])
+        self.assertEqual(table.output_names, ["out"])
+        self.assertEqual(table.table[:, 0].tolist(), [LOW, HIGH, HIGH, LOW])
+        self.assertEqual(table.lookup([HIGH, LOW]).tolist(), [HIGH])
+        self.assertRaises(ValueError, table.lookup, [HIGH, FLOAT])
+
+    def test_parallel_chunks(self):
+        filename = self.write_parity_chain(11)
+        inputs, outputs = truthtable.find_io_parts(
+            logic.Schematic.from_file(filename))
+        # Numbers in names are compared by value
+        self.assertEqual(inputs, ["in{}".format(i) for i in range(11)])
+        self.assertEqual(outputs, ["out"])
+
+        table = truthtable.generate(filename, processes=2, chunk_bits=8)
+        for row in range(1 << 11):
+            parity = bin(row).count("1") % 2
+            self.assertEqual(table.table[row, 0], HIGH if parity else LOW)
+        serial = truthtable.generate(filename, processes=1, chunk_bits=8)
+        self.assertEqual(serial.table.tolist(), table.table.tolist())
+
+    def test_save_load(self):
+        filename = self.write_parity_chain(3)
+        table = truthtable.generate(filename, processes=1)
+        table.save(truthtable.table_filename(filename))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, "parity.truth.npz")))
+        loaded = truthtable.TruthTable.load(
+            truthtable.table_filename(filename))
+        self.assertEqual(loaded.input_names, table.input_names)
+        self.assertEqual(loaded.output_names, table.output_names)
+        self.assertEqual(loaded.table.tolist(), table.table.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
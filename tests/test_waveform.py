@@ -0,0 +1,94 @@
+import os
+import StringIO
+import sys
+import unittest
+
+from logic import compiled, timing, waveform
+from logic.states import FLOAT, HIGH, LOW
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import circuits
+
+
+class WaveformRecorderTest(unittest.TestCase):
+
+    def test_identifiers_unique(self):
+        ids = [waveform.vcd_identifier(i) for i in range(94*94 + 10)]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(waveform.vcd_identifier(0), "!")
+
+    def test_ring_buffer(self):
+        recorder = waveform.WaveformRecorder(["a", "b"], capacity=4)
+        for time in range(6):
+            recorder.record(time, time % 2, HIGH if time % 2 else LOW)
+        self.assertEqual(len(recorder), 4)
+        self.assertEqual(recorder.records()["time"].tolist(), [2, 3, 4, 5])
+
+    def test_vcd_streaming(self):
+        vcd = StringIO.StringIO()
+        recorder = waveform.WaveformRecorder(["a", "b c"], vcd_file=vcd,
+                                             capacity=2)
+        recorder.record(0, 0, FLOAT)
+        recorder.record(0, 1, LOW)
+        recorder.record(3, 0, HIGH)
+        recorder.record(5, 1, HIGH)
+        recorder.record(5, 0, LOW)
+        self.assertEqual(len(recorder), 1)
+        recorder.close()
+        self.assertEqual(len(recorder), 0)
+
+        header, body = vcd.getvalue().split("$enddefinitions $end\n")
+        self.assertIn("$var wire 1 \" b_c $end", header)
+        self.assertEqual(body, "#0\nz!\n0\"\n#3\n1!\n#5\n1\"\n0!\n")
+
+
+class RecordingTest(unittest.TestCase):
+
+    def test_watch_simulator(self):
+        schematic, switches = circuits.inverter_chains(1, 3)
+        netlist = compiled.Netlist.from_schematic(schematic)
+        probe = [part for part in schematic.parts
+                 if part.part_type == "Probe"][0]
+        probe_net = netlist.term_net[netlist.term_index[probe["term"]]]
+
+        sim = timing.TimedSimulator(netlist, default_delay=2)
+        sim.settle()
+        recorder = waveform.WaveformRecorder(["out"])
+        recorder.watch_simulator(sim, [probe_net])
+        changes = []
+        sim.net_listeners.append(
+            lambda time, n, value: changes.append((time, n, value)))
+        start = sim.time
+        sim.set_output(netlist.term_index[switches[0]["term"]], HIGH)
+        sim.settle()
+
+        # Transistors pass values both ways, so the output can glitch after
+        # its first change. Every change of the probe net is recorded.
+        expected = [(start, 0, HIGH)] + [(time, 0, value)
+                                         for time, n, value in changes
+                                         if n == probe_net]
+        self.assertEqual(recorder.records().tolist(), expected)
+        self.assertEqual(expected[1], (start + 3*2, 0, LOW))
+        self.assertEqual(expected[-1][2], LOW)
+
+    def test_schematic_recorder(self):
+        schematic, switches = circuits.inverter_chains(1, 1)
+        schematic.update()
+        probe = [part for part in schematic.parts
+                 if part.part_type == "Probe"][0]
+        recorder = waveform.SchematicRecorder([switches[0], probe])
+        self.assertEqual(recorder.recorder.names,
+                         [switches[0].name, probe.name])
+
+        recorder.sample()
+        recorder.sample()
+        switches[0].on_activate()
+        schematic.update()
+        recorder.sample()
+        self.assertEqual(recorder.recorder.records().tolist(), [
+            (0, 0, LOW), (0, 1, HIGH), (2, 0, HIGH), (2, 1, LOW)])
+
+
+if __name__ == "__main__":
+    unittest.main()